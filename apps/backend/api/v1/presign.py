@@ -1,10 +1,60 @@
-from fastapi import APIRouter
-from apps.backend.schemas import PresignIn, PresignOut
-from apps.backend.services.storage import presign_put
+from fastapi import APIRouter, HTTPException
+from typing import List
+from apps.backend.schemas import (
+    PresignIn, PresignOut, PresignBatchIn,
+    MultipartCreateOut, MultipartPartsIn, MultipartPartUrl,
+    MultipartCompleteIn, MultipartCompleteOut, MultipartAbortIn
+)
+from apps.backend.services.storage import (
+    presign_put, create_multipart_upload, presign_upload_parts,
+    complete_multipart_upload, abort_multipart_upload, public_url
+)
+from apps.backend.core.config import MAX_BATCH_SIZE
 
 router = APIRouter()
 
+# Giới hạn của S3: part number 1..10000
+MAX_MULTIPART_PARTS = 10000
+
 @router.post("/uploads/presign", response_model=PresignOut)
 def presign(body: PresignIn):
     url, key = presign_put(body.file_name, body.content_type)
     return {"upload_url": url, "file_key": key}
+
+@router.post("/uploads/presign/batch", response_model=List[PresignOut])
+def presign_batch(body: PresignBatchIn):
+    if len(body.files) > MAX_BATCH_SIZE:
+        raise HTTPException(400, f"Too many files. Maximum batch size is {MAX_BATCH_SIZE}")
+    result = []
+    for f in body.files:
+        url, key = presign_put(f.file_name, f.content_type)
+        result.append({"upload_url": url, "file_key": key})
+    return result
+
+@router.post("/uploads/multipart", response_model=MultipartCreateOut)
+def multipart_create(body: PresignIn):
+    upload_id, key = create_multipart_upload(body.file_name, body.content_type)
+    return {"upload_id": upload_id, "file_key": key}
+
+@router.post("/uploads/multipart/parts", response_model=List[MultipartPartUrl])
+def multipart_part_urls(body: MultipartPartsIn):
+    # Bỏ part number trùng, giữ thứ tự client gửi
+    part_numbers = list(dict.fromkeys(body.part_numbers))
+    if len(part_numbers) > MAX_BATCH_SIZE:
+        raise HTTPException(400, f"Too many parts. Maximum batch size is {MAX_BATCH_SIZE}, request the URLs in batches")
+    if any(n < 1 or n > MAX_MULTIPART_PARTS for n in part_numbers):
+        raise HTTPException(400, f"Part numbers must be between 1 and {MAX_MULTIPART_PARTS}")
+    urls = presign_upload_parts(body.file_key, body.upload_id, part_numbers)
+    return [{"part_number": n, "upload_url": url} for n, url in urls]
+
+@router.post("/uploads/multipart/complete", response_model=MultipartCompleteOut)
+def multipart_complete(body: MultipartCompleteIn):
+    if not body.parts:
+        raise HTTPException(400, "No parts to complete")
+    complete_multipart_upload(body.file_key, body.upload_id, [(p.part_number, p.etag) for p in body.parts])
+    return {"file_key": body.file_key, "file_url": public_url(body.file_key)}
+
+@router.post("/uploads/multipart/abort")
+def multipart_abort(body: MultipartAbortIn):
+    abort_multipart_upload(body.file_key, body.upload_id)
+    return {"ok": True}
@@ -1,7 +1,8 @@
 from fastapi import APIRouter
-from apps.backend.api.v1 import transcription, youtube, presign
+from apps.backend.api.v1 import transcription, youtube, presign, search
 
 router = APIRouter()
 router.include_router(transcription.router)
 router.include_router(youtube.router)
-router.include_router(presign.router)
\ No newline at end of file
+router.include_router(presign.router)
+router.include_router(search.router)
\ No newline at end of file
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from apps.backend.core.db import get_async_db
+from apps.backend.schemas import SearchResultOut
+from apps.backend.services.search import search_segments
+
+router = APIRouter()
+
+@router.get("/search", response_model=List[SearchResultOut])
+async def search_transcriptions(
+    q: str = Query(..., max_length=200, description="Search text, websearch syntax (\"phrase\", or, -word)"),
+    limit: int = Query(default=20, ge=1, le=100, description="Number of jobs to return"),
+    hits: int = Query(default=5, ge=1, le=50, description="Matching segments returned per job"),
+    language: str = Query(default=None),
+    channel_crawler_id: str = Query(default=None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if not q.strip():
+        raise HTTPException(400, "Empty search query")
+    return await db.run_sync(
+        search_segments, q.strip(), limit=limit, hits_per_job=hits,
+        language=language, channel_crawler_id=channel_crawler_id
+    )
@@ -1,37 +1,96 @@
-import os, json, uuid
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+import os, uuid, base64, json
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from apps.backend.core.db import SessionLocal, get_db
-from apps.backend.models.transcription import TranscriptionJob, TranscriptionDetail, TranscriptionImage, ImageType
+from apps.backend.core.config import MAX_BATCH_SIZE
+from apps.backend.core.db import get_async_db
+from apps.backend.models.transcription import TranscriptionJob, TranscriptionDetail, TranscriptionImage, TranscriptionSegment, ImageType
 from apps.backend.models.enums import JobStatus
 from apps.backend.schemas import (
-	TranscriptionIn, TranscriptionOut, TranscriptionDetailIn, TranscriptionDetailOut, TranscriptionImageIn, TranscriptionImageOut, TranscriptionFullOut
+	TranscriptionIn, TranscriptionBatchIn, TranscriptionOut, TranscriptionSummaryOut, TranscriptionDetailIn, TranscriptionDetailOut, TranscriptionImageIn, TranscriptionImageOut, TranscriptionFullOut, TranscriptionSegmentOut
 )
 from apps.backend.schemas.transcription import TranscriptionJobOut
-from apps.backend.services.redis_queue import q
+from apps.backend.services.redis_queue import enqueue_stage_async, enqueue_stage_many_async
+from apps.backend.services.job_batch import create_jobs_bulk
+from apps.backend.services.segment_store import load_segments, load_segments_many, load_result, unpack_result
+from apps.backend.services.result_cache import params_fingerprint, etag_content_hash, find_cached_job, link_cached_result
+from apps.backend.services.storage import object_etag
+from apps.backend.services.response_cache import (
+	job_version, response_etag, etag_matches, cache_control, get_response, put_response, invalidate_job_async, FINISHED_STATUSES
+)
 
 router = APIRouter()
 
+async def get_job(db: AsyncSession, job_id: str, *relationships):
+	# Session async không lazy load được: relationship cần dùng phải eager load (selectinload)
+	return await db.get(TranscriptionJob, job_id, options=[selectinload(r) for r in relationships])
+
+async def cached_job_response(request: Request, db: AsyncSession, route: str, job_id: str, build, not_found: str):
+	"""
+	GET theo job với ETag/If-None-Match + cache body đã serialize.
+	Chỉ đọc (status, updated_at) để lấy version; 304 hoặc cache hit thì không load detail/segment.
+	"""
+	row = (await db.execute(
+		select(TranscriptionJob.status, TranscriptionJob.updated_at, TranscriptionJob.progress).where(TranscriptionJob.id == job_id)
+	)).first()
+	if not row:
+		raise HTTPException(404, not_found)
+	finished = row.status in FINISHED_STATUSES
+	segments = None
+	if not finished:
+		# seg_index tăng dần theo thứ tự flush: max = số segment đã ghi (index-only trên (job_id, seg_index))
+		segments = (await db.execute(
+			select(func.max(TranscriptionSegment.seg_index)).where(TranscriptionSegment.job_id == job_id)
+		)).scalar()
+	version = job_version(row.status, row.updated_at, row.progress, segments)
+	headers = {"ETag": response_etag(route, job_id, version), "Cache-Control": cache_control(row.status)}
+	if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+		return Response(status_code=304, headers=headers)
+	body = await get_response(route, job_id, version) if finished else None
+	if body is None:
+		body = JSONResponse(jsonable_encoder(await build())).body
+		if finished:
+			await put_response(route, job_id, version, body)
+	return Response(content=body, media_type="application/json", headers=headers)
+
 @router.post("/transcriptions", response_model=TranscriptionOut)
-def create_transcription(body: TranscriptionIn, db: Session = Depends(get_db)):
+async def create_transcription(body: TranscriptionIn, db: AsyncSession = Depends(get_async_db)):
 	tid = str(uuid.uuid4())
 	file_url = f"{os.getenv('S3_PUBLIC_ENDPOINT', 'http://localhost:9000')}/{os.getenv('S3_BUCKET', 'uploads')}/{body.fileKey}"
+	fingerprint = params_fingerprint(body.language, body.engine or "local")
+	# ETag của upload non-multipart là MD5 nội dung - tra cache mà không cần tải file
+	try:
+		content_hash = etag_content_hash(await run_in_threadpool(object_etag, body.fileKey))
+	except Exception:
+		content_hash = None
 	t = TranscriptionJob(
 		id=tid,
 		status=JobStatus.queued,
 		file_key=body.fileKey,
 		engine=body.engine or "local",
 		language=body.language,
-		file_url=file_url
+		file_url=file_url,
+		content_hash=content_hash,
+		params_fingerprint=fingerprint
 	)
 	db.add(t)
-	db.commit()
-	db.refresh(t)
-	q.enqueue("apps.backend.worker.transcribe_job", tid, job_timeout=7200)
+	cached = await db.run_sync(find_cached_job, fingerprint, content_hash=content_hash)
+	if cached:
+		await db.flush()
+		await db.run_sync(link_cached_result, t, cached, str(uuid.uuid4()))
+	await db.commit()
+	await db.refresh(t)
+	if not cached:
+		await enqueue_stage_async("transcribe", "apps.backend.worker.transcribe_job", tid, priority=True)
 	return TranscriptionOut(
 		id=tid,
-		status="queued",
+		status=t.status.value,
 		result=None,
 		error=None,
 		file_url=file_url,
@@ -40,55 +99,137 @@ def create_transcription(body: TranscriptionIn, db: Session = Depends(get_db)):
 		language=body.language
 	)
 
-@router.get("/transcriptions", response_model=List[TranscriptionOut])
-def list_transcriptions(
-	limit: int = Query(default=20, le=100, description="Number of items to return"),
-	offset: int = Query(default=0, ge=0, description="Number of items to skip"),
+@router.post("/transcriptions/batch", response_model=List[TranscriptionOut])
+async def create_transcriptions_batch(body: TranscriptionBatchIn, db: AsyncSession = Depends(get_async_db)):
+	if len(body.fileKeys) > MAX_BATCH_SIZE:
+		raise HTTPException(400, f"Too many files. Maximum batch size is {MAX_BATCH_SIZE}")
+	engine = body.engine or "local"
+	fingerprint = params_fingerprint(body.language, engine)
+	public_base = f"{os.getenv('S3_PUBLIC_ENDPOINT', 'http://localhost:9000')}/{os.getenv('S3_BUCKET', 'uploads')}"
+	rows = [{
+		"id": str(uuid.uuid4()),
+		"status": JobStatus.queued,
+		"file_key": file_key,
+		"engine": engine,
+		"language": body.language,
+		"file_url": f"{public_base}/{file_key}",
+		"params_fingerprint": fingerprint
+	} for file_key in body.fileKeys]
+	# Một multi-row INSERT + một Redis pipeline; cache theo nội dung được kiểm tra ở worker
+	pending = await db.run_sync(create_jobs_bulk, rows)
+	await enqueue_stage_many_async("transcribe", "apps.backend.worker.transcribe_job", [(tid,) for tid in pending], priority=True)
+	return [TranscriptionOut(
+		id=row["id"],
+		status=row["status"].value,
+		file_url=row["file_url"],
+		file_key=row["file_key"],
+		engine=engine,
+		language=body.language
+	) for row in rows]
+
+def encode_cursor(created_at, job_id: str) -> str:
+	# Cursor keyset (created_at, id) của row cuối trang, opaque với client
+	raw = f"{created_at.isoformat() if created_at else ''}|{job_id}"
+	return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+	try:
+		raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+		created_at, job_id = raw.split("|", 1)
+		return datetime.fromisoformat(created_at), job_id
+	except Exception:
+		raise HTTPException(400, "Invalid cursor")
+
+@router.get("/transcriptions", response_model=List[TranscriptionSummaryOut])
+async def list_transcriptions(
+	response: Response,
+	limit: int = Query(default=20, ge=1, le=100, description="Number of items to return"),
+	cursor: str = Query(default=None, description="X-Next-Cursor header of the previous page"),
+	offset: int = Query(default=0, ge=0, description="Deprecated: number of items to skip, use cursor"),
 	status: str = Query(default=None, description="Filter by status: queued, processing, done, error"),
-	db: Session = Depends(get_db)
+	include_result: bool = Query(default=False, description="Include the full result (segments) of each job"),
+	db: AsyncSession = Depends(get_async_db)
 ):
-	query = db.query(TranscriptionJob)
+	# Projection các cột cần cho trang list, không load ORM object, không decode result_json
+	columns = [
+		TranscriptionJob.id, TranscriptionJob.status, TranscriptionJob.title, TranscriptionJob.duration,
+		TranscriptionJob.progress, TranscriptionJob.error, TranscriptionJob.file_key, TranscriptionJob.file_url,
+		TranscriptionJob.youtube_url, TranscriptionJob.language, TranscriptionJob.engine,
+		TranscriptionJob.created_at, TranscriptionDetail.word_count
+	]
+	if include_result:
+		columns += [TranscriptionDetail.result_json, TranscriptionDetail.formatted_text]
+	# Outer join: job chưa có detail (queued/processing/error) vẫn có trong list
+	query = select(*columns).outerjoin(TranscriptionDetail, TranscriptionDetail.job_id == TranscriptionJob.id)
 	if status:
 		try:
 			status_enum = JobStatus(status)
-			query = query.filter(TranscriptionJob.status == status_enum)
+			query = query.where(TranscriptionJob.status == status_enum)
 		except ValueError:
 			raise HTTPException(400, f"Invalid status. Must be one of: {[s.value for s in JobStatus]}")
-	query = query.order_by(TranscriptionJob.created_at.desc())
-	transcriptions = query.offset(offset).limit(limit).all()
-	results = []
-	for t in transcriptions:
-		result = None
-		if t.transcription_detail and t.transcription_detail.result_json:
-			result = json.loads(t.transcription_detail.result_json)
-			results.append(TranscriptionOut(
-				id=t.id,
-				status=t.status.value,
-				result=result,
-				error=t.error,
-				file_url=t.file_url,
-				file_key=t.file_key,
-				youtube_url=getattr(t, 'youtube_url', None),
-				title=getattr(t, 'title', None),
-				created_at=t.created_at,
-				language=t.language,
-				engine=t.engine
-		))
-	return results
+	if cursor:
+		# Keyset pagination: chi phí không tăng theo số trang như OFFSET
+		created_at, job_id = decode_cursor(cursor)
+		query = query.where(tuple_(TranscriptionJob.created_at, TranscriptionJob.id) < tuple_(created_at, job_id))
+	elif offset:
+		query = query.offset(offset)
+	query = query.order_by(TranscriptionJob.created_at.desc(), TranscriptionJob.id.desc()).limit(limit)
+	rows = (await db.execute(query)).all()
+	if len(rows) == limit:
+		response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+	results = {}
+	if include_result:
+		# Segment của cả trang trong một query
+		segments = await db.run_sync(load_segments_many, [row.id for row in rows if row.result_json])
+		results = {
+			row.id: unpack_result(row.result_json, row.formatted_text, segments.get(row.id))
+			for row in rows if row.result_json
+		}
+	return [TranscriptionSummaryOut(
+		id=row.id,
+		status=row.status.value,
+		title=row.title,
+		duration=row.duration,
+		word_count=row.word_count,
+		progress=row.progress,
+		error=row.error,
+		file_key=row.file_key,
+		file_url=row.file_url,
+		youtube_url=row.youtube_url,
+		language=row.language,
+		engine=row.engine,
+		created_at=row.created_at,
+		result=results.get(row.id)
+	) for row in rows]
 
 @router.get("/transcriptions/{tid}", response_model=TranscriptionOut)
-def get_transcription(tid: str, db: Session = Depends(get_db)):
-	t = db.get(TranscriptionJob, tid)
+async def get_transcription(tid: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+	return await cached_job_response(request, db, "job", tid, lambda: build_transcription(db, tid), "Not found")
+
+async def build_transcription(db: AsyncSession, tid: str) -> TranscriptionOut:
+	t = await get_job(db, tid, TranscriptionJob.transcription_detail)
 	if not t:
 		raise HTTPException(404, "Not found")
 	result = None
 	if t.transcription_detail and t.transcription_detail.result_json:
-		result = json.loads(t.transcription_detail.result_json)
+		detail = t.transcription_detail
+		result = await db.run_sync(load_result, t.id, detail.result_json, detail.formatted_text)
+	elif t.status == JobStatus.processing:
+		# Kết quả từng phần trong lúc worker đang decode
+		segments = await db.run_sync(load_segments, t.id)
+		if segments:
+			result = {
+				"text": " ".join(s["text"] for s in segments).strip(),
+				"language": t.language or "auto",
+				"segments": segments,
+				"partial": True
+			}
 	return TranscriptionOut(
 		id=t.id,
 		status=t.status.value,
 		result=result,
 		error=t.error,
+		progress=t.progress,
 		file_url=t.file_url,
 		file_key=t.file_key,
 		engine=t.engine,
@@ -96,14 +237,41 @@ def get_transcription(tid: str, db: Session = Depends(get_db)):
 		youtube_url=t.youtube_url,
 		title=t.title,
 		duration=t.duration,
+		audio_codec=t.audio_codec,
 		channel_crawler_id=t.channel_crawler_id,
 		created_at=t.created_at,
-		updated_at=t.updated_at
+		updated_at=t.updated_at,
+		metrics=json.loads(t.metrics_json) if t.metrics_json else None
 	)
 
+@router.get("/transcriptions/{job_id}/segments", response_model=List[TranscriptionSegmentOut])
+async def get_transcription_segments(
+	job_id: str,
+	start: float = Query(default=None, ge=0, description="Window start in seconds"),
+	end: float = Query(default=None, ge=0, description="Window end in seconds"),
+	db: AsyncSession = Depends(get_async_db)
+):
+	if start is not None and end is not None and end <= start:
+		raise HTTPException(400, "end must be greater than start")
+	job = await get_job(db, job_id, TranscriptionJob.transcription_detail)
+	if not job:
+		raise HTTPException(404, "Transcription job not found")
+	detail = job.transcription_detail
+	if detail and detail.result_json:
+		# Range query trên transcription_segments (job_id, start), blob cũ thì lọc trong result_json
+		result = await db.run_sync(load_result, job.id, detail.result_json, detail.formatted_text, start, end)
+		return result.get("segments", [])
+	# Job đang chạy: các segment đã flush
+	return await db.run_sync(load_segments, job.id, start, end)
+
 @router.get("/transcriptions/{job_id}/detail", response_model=TranscriptionDetailOut)
-def get_transcription_detail(job_id: str, db: Session = Depends(get_db)):
-	job = db.get(TranscriptionJob, job_id)
+async def get_transcription_detail(job_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+	return await cached_job_response(
+		request, db, "detail", job_id, lambda: build_transcription_detail(db, job_id), "Transcription job not found"
+	)
+
+async def build_transcription_detail(db: AsyncSession, job_id: str) -> TranscriptionDetailOut:
+	job = await get_job(db, job_id, TranscriptionJob.transcription_detail)
 	if not job:
 		raise HTTPException(404, "Transcription job not found")
 	if not job.transcription_detail:
@@ -123,8 +291,8 @@ def get_transcription_detail(job_id: str, db: Session = Depends(get_db)):
 	)
 
 @router.post("/transcriptions/{job_id}/detail", response_model=TranscriptionDetailOut)
-def update_transcription_detail(job_id: str, body: TranscriptionDetailIn, db: Session = Depends(get_db)):
-	job = db.get(TranscriptionJob, job_id)
+async def update_transcription_detail(job_id: str, body: TranscriptionDetailIn, db: AsyncSession = Depends(get_async_db)):
+	job = await get_job(db, job_id, TranscriptionJob.transcription_detail)
 	if not job:
 		raise HTTPException(404, "Transcription job not found")
 	if job.transcription_detail:
@@ -135,8 +303,8 @@ def update_transcription_detail(job_id: str, body: TranscriptionDetailIn, db: Se
 			detail.formatted_text = body.formatted_text
 		if body.summary is not None:
 			detail.summary = body.summary
-	if body.keywords is not None:
-		detail.keywords = body.keywords
+		if body.keywords is not None:
+			detail.keywords = body.keywords
 	else:
 		detail = TranscriptionDetail(
 			id=str(uuid.uuid4()),
@@ -147,13 +315,14 @@ def update_transcription_detail(job_id: str, body: TranscriptionDetailIn, db: Se
 			keywords=body.keywords
 		)
 		db.add(detail)
-	db.commit()
-	db.refresh(detail)
+	await invalidate_job_async(job)
+	await db.commit()
+	await db.refresh(detail)
 	return detail
 
 @router.get("/transcriptions/{job_id}/images", response_model=List[TranscriptionImageOut])
-def get_transcription_images(job_id: str, db: Session = Depends(get_db)):
-	job = db.get(TranscriptionJob, job_id)
+async def get_transcription_images(job_id: str, db: AsyncSession = Depends(get_async_db)):
+	job = await get_job(db, job_id, TranscriptionJob.images)
 	if not job:
 		raise HTTPException(404, "Transcription job not found")
 	return [TranscriptionImageOut(
@@ -173,8 +342,8 @@ def get_transcription_images(job_id: str, db: Session = Depends(get_db)):
 	) for img in job.images]
 
 @router.post("/transcriptions/{job_id}/images", response_model=TranscriptionImageOut)
-def add_transcription_image(job_id: str, body: TranscriptionImageIn, db: Session = Depends(get_db)):
-	job = db.get(TranscriptionJob, job_id)
+async def add_transcription_image(job_id: str, body: TranscriptionImageIn, db: AsyncSession = Depends(get_async_db)):
+	job = await db.get(TranscriptionJob, job_id)
 	if not job:
 		raise HTTPException(404, "Transcription job not found")
 	try:
@@ -192,15 +361,25 @@ def add_transcription_image(job_id: str, body: TranscriptionImageIn, db: Session
 		description=body.description
 	)
 	db.add(image)
-	db.commit()
-	db.refresh(image)
+	await invalidate_job_async(job)
+	await db.commit()
+	await db.refresh(image)
 	return image
 
 @router.get("/transcriptions/{job_id}/full", response_model=TranscriptionFullOut)
-def get_transcription_full(job_id: str, db: Session = Depends(get_db)):
-	job = db.get(TranscriptionJob, job_id)
+async def get_transcription_full(job_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+	return await cached_job_response(
+		request, db, "full", job_id, lambda: build_transcription_full(db, job_id), "Transcription job not found"
+	)
+
+async def build_transcription_full(db: AsyncSession, job_id: str) -> TranscriptionFullOut:
+	job = await get_job(db, job_id, TranscriptionJob.transcription_detail, TranscriptionJob.images)
 	if not job:
 		raise HTTPException(404, "Transcription job not found")
+	result = None
+	if job.transcription_detail and job.transcription_detail.result_json:
+		detail = job.transcription_detail
+		result = await db.run_sync(load_result, job.id, detail.result_json, detail.formatted_text)
 	job_out = TranscriptionJobOut(
 		id=job.id,
 		status=job.status.value,
@@ -209,12 +388,16 @@ def get_transcription_full(job_id: str, db: Session = Depends(get_db)):
 		language=job.language,
 		file_url=job.file_url,
 		error=job.error,
+		progress=job.progress,
 		youtube_url=job.youtube_url,
 		title=job.title,
 		duration=job.duration,
+		audio_codec=job.audio_codec,
 		channel_crawler_id=job.channel_crawler_id,
 		created_at=job.created_at,
-		updated_at=job.updated_at
+		updated_at=job.updated_at,
+		result=result,
+		metrics=json.loads(job.metrics_json) if job.metrics_json else None
 	)
 	detail_out = None
 	if job.transcription_detail:
@@ -253,9 +436,8 @@ def get_transcription_full(job_id: str, db: Session = Depends(get_db)):
 	)
 
 @router.post("/transcriptions/{tid}/format-dialogue")
-def format_dialogue_with_openai(tid: str, db: Session = Depends(get_db)):
-	from apps.backend.services.openai_service import format_as_dialogue
-	job = db.get(TranscriptionJob, tid)
+async def format_dialogue_with_openai(tid: str, db: AsyncSession = Depends(get_async_db)):
+	job = await get_job(db, tid, TranscriptionJob.transcription_detail)
 	if not job or not job.transcription_detail:
 		raise HTTPException(404, "Transcription not found or not completed")
 	original_text = job.transcription_detail.formatted_text
@@ -263,30 +445,34 @@ def format_dialogue_with_openai(tid: str, db: Session = Depends(get_db)):
 		raise HTTPException(400, "No transcription text available")
 	try:
 		job_id = f"format_dialogue_{tid}"
-		q.enqueue_call(
-			func='apps.backend.worker.format_dialogue_job',
-			args=[tid, original_text],
+		await enqueue_stage_async(
+			"llm",
+			'apps.backend.worker.format_dialogue_job',
+			tid, original_text,
 			job_id=job_id,
-			timeout=300
+			job_timeout=300,
+			priority=True
 		)
 		return {"message": "Dialogue formatting started", "job_id": job_id}
 	except Exception as e:
 		raise HTTPException(500, f"Failed to start dialogue formatting: {str(e)}")
 
 @router.post("/transcriptions/{tid}/generate-image")
-def generate_image_for_dialogue(tid: str, prompt: str = None, db: Session = Depends(get_db)):
-	job = db.get(TranscriptionJob, tid)
+async def generate_image_for_dialogue(tid: str, prompt: str = None, db: AsyncSession = Depends(get_async_db)):
+	job = await get_job(db, tid, TranscriptionJob.transcription_detail)
 	if not job or not job.transcription_detail:
 		raise HTTPException(404, "Transcription not found or not completed")
 	if not prompt:
 		prompt = job.transcription_detail.formatted_text[:500] + "..."
 	try:
 		job_id = f"generate_image_{tid}"
-		q.enqueue_call(
-			func='apps.backend.worker.generate_image_job',
-			args=[tid, prompt],
+		await enqueue_stage_async(
+			"llm",
+			'apps.backend.worker.generate_image_job',
+			tid, prompt,
 			job_id=job_id,
-			timeout=600
+			job_timeout=600,
+			priority=True
 		)
 		return {"message": "Image generation started", "job_id": job_id, "prompt": prompt}
 	except Exception as e:
@@ -1,11 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
-from apps.backend.core.db import SessionLocal, get_db, get_db
+from typing import List
+from apps.backend.core.config import MAX_BATCH_SIZE
+from apps.backend.core.db import get_async_db
 from apps.backend.models.transcription import Transcription, TranscriptionJob
 from apps.backend.models.enums import JobStatus
-from apps.backend.schemas import YouTubeTranscriptionIn, YouTubeTranscriptionOut
-from apps.backend.services.redis_queue import q
+from apps.backend.schemas import YouTubeTranscriptionIn, YouTubeTranscriptionBatchIn, YouTubeTranscriptionOut
+from apps.backend.services.redis_queue import enqueue_stage_async, enqueue_stage_many_async, YOUTUBE_PREPARE_STAGE
+from apps.backend.services.job_batch import create_jobs_bulk
+from apps.backend.services.result_cache import params_fingerprint, youtube_video_id, find_cached_job, link_cached_result
 from apps.backend.schemas.channel import ChannelCrawlerIn, ChannelCrawlerOut
 from apps.backend.models.channel_crawler import ChannelCrawler
 
@@ -13,8 +18,10 @@ from apps.backend.models.channel_crawler import ChannelCrawler
 router = APIRouter()
 
 @router.post("/youtube/transcriptions", response_model=YouTubeTranscriptionOut)
-def create_youtube_transcription(body: YouTubeTranscriptionIn, db: Session = Depends(get_db)):
+async def create_youtube_transcription(body: YouTubeTranscriptionIn, db: AsyncSession = Depends(get_async_db)):
     tid = str(uuid.uuid4())
+    fingerprint = params_fingerprint(body.language, body.engine or "local")
+    video_id = youtube_video_id(body.youtube_url)
     t = TranscriptionJob(
         id=tid,
         status=JobStatus.queued,
@@ -22,24 +29,67 @@ def create_youtube_transcription(body: YouTubeTranscriptionIn, db: Session = Dep
         engine=body.engine or "local",
         language=body.language,
         youtube_url=body.youtube_url,
-        file_url=""
+        file_url="",
+        video_id=video_id,
+        params_fingerprint=fingerprint
     )
     db.add(t)
-    db.commit()
-    db.refresh(t)
-    q.enqueue("apps.backend.worker.prepare_youtube_job", tid, job_timeout=7200)
+    # Video đã transcribe với cùng model/params: dùng lại kết quả, không download
+    cached = await db.run_sync(find_cached_job, fingerprint, video_id=video_id)
+    if cached:
+        await db.flush()
+        await db.run_sync(link_cached_result, t, cached, str(uuid.uuid4()))
+    await db.commit()
+    await db.refresh(t)
+    if not cached:
+        # Job từ API đi lane ưu tiên, transcribe_job tiếp theo cũng giữ priority
+        # (queue download hoặc transcribe tuỳ YOUTUBE_PIPELINE_MODE)
+        await enqueue_stage_async(YOUTUBE_PREPARE_STAGE, "apps.backend.worker.prepare_youtube_job", tid, True, priority=True)
     return YouTubeTranscriptionOut(
         id=tid,
-        status="queued",
+        status=t.status.value,
         youtube_url=body.youtube_url,
+        title=t.title,
         result=None,
         error=None,
-        file_url="",
+        file_url=t.file_url,
         file_key=t.file_key
     )
 
+@router.post("/youtube/transcriptions/batch", response_model=List[YouTubeTranscriptionOut])
+async def create_youtube_transcriptions_batch(body: YouTubeTranscriptionBatchIn, db: AsyncSession = Depends(get_async_db)):
+    if len(body.youtube_urls) > MAX_BATCH_SIZE:
+        raise HTTPException(400, f"Too many videos. Maximum batch size is {MAX_BATCH_SIZE}")
+    engine = body.engine or "local"
+    fingerprint = params_fingerprint(body.language, engine)
+    rows = []
+    for url in body.youtube_urls:
+        tid = str(uuid.uuid4())
+        rows.append({
+            "id": tid,
+            "status": JobStatus.queued,
+            "file_key": f"youtube/{tid}.mp3",
+            "engine": engine,
+            "language": body.language,
+            "youtube_url": url,
+            "file_url": "",
+            "video_id": youtube_video_id(url),
+            "params_fingerprint": fingerprint
+        })
+    # Một multi-row INSERT + một Redis pipeline, video đã có kết quả không cần enqueue
+    pending = await db.run_sync(create_jobs_bulk, rows)
+    await enqueue_stage_many_async(YOUTUBE_PREPARE_STAGE, "apps.backend.worker.prepare_youtube_job", [(tid, True) for tid in pending], priority=True)
+    return [YouTubeTranscriptionOut(
+        id=row["id"],
+        status=row["status"].value,
+        youtube_url=row["youtube_url"],
+        title=row.get("title"),
+        file_url=row["file_url"],
+        file_key=row["file_key"]
+    ) for row in rows]
+
 @router.post("/channel/crawler", response_model=ChannelCrawlerOut)
-def crawl_channel(body: ChannelCrawlerIn, db: Session = Depends(get_db)):
+async def crawl_channel(body: ChannelCrawlerIn, db: AsyncSession = Depends(get_async_db)):
     crawler_id = str(uuid.uuid4())
     crawler = ChannelCrawler(
         id=crawler_id,
@@ -48,12 +98,13 @@ def crawl_channel(body: ChannelCrawlerIn, db: Session = Depends(get_db)):
         language=body.language,
         engine=body.engine,
         max_videos=body.max_videos,
-        video_type=body.video_type
+        video_type=body.video_type,
+        incremental=body.incremental
     )
     db.add(crawler)
-    db.commit()
-    db.refresh(crawler)
-    q.enqueue("apps.backend.worker.crawl_channel_job", crawler_id, job_timeout=3600)
+    await db.commit()
+    await db.refresh(crawler)
+    await enqueue_stage_async("download", "apps.backend.worker.crawl_channel_job", crawler_id, priority=True)
     return ChannelCrawlerOut(
         channel_crawler_id=crawler_id,
         status="queued",
@@ -65,12 +116,14 @@ def crawl_channel(body: ChannelCrawlerIn, db: Session = Depends(get_db)):
     )
 
 @router.get("/channel/crawler/{crawler_id}", response_model=ChannelCrawlerOut)
-def get_channel_crawler(crawler_id: str, db: Session = Depends(get_db)):
-    crawler = db.query(ChannelCrawler).filter(ChannelCrawler.id == crawler_id).first()
+async def get_channel_crawler(crawler_id: str, db: AsyncSession = Depends(get_async_db)):
+    crawler = await db.get(ChannelCrawler, crawler_id)
     if not crawler:
         raise HTTPException(404, "Channel crawler not found")
     jobs = []
-    transcriptions = db.query(Transcription).filter(Transcription.channel_crawler_id == crawler_id).all()
+    transcriptions = (await db.execute(
+        select(Transcription).where(Transcription.channel_crawler_id == crawler_id)
+    )).scalars().all()
     for t in transcriptions:
         jobs.append({
             "job_id": t.id,
@@ -84,6 +137,7 @@ def get_channel_crawler(crawler_id: str, db: Session = Depends(get_db)):
         channel_url=crawler.channel_url,
         total_videos_found=crawler.total_videos_found,
         total_jobs_created=crawler.total_jobs_created,
+        total_videos_skipped=crawler.total_videos_skipped or 0,
         jobs=jobs,
         error=crawler.error
     )
\ No newline at end of file
@@ -0,0 +1,91 @@
+import glob
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import Dict, NamedTuple
+
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+ESPEAK_BIN = os.getenv("ESPEAK_BIN", "espeak-ng")
+# Fixture được sinh một lần rồi dùng lại; đặt file thật (cùng tên, vd 20min-vi.m4a) vào đây để đo trên giọng nói thật
+BENCH_FIXTURE_DIR = os.getenv("BENCH_FIXTURE_DIR", os.path.join(os.path.dirname(__file__), "fixtures"))
+AUDIO_EXTENSIONS = (".m4a", ".mp3", ".wav", ".opus", ".webm", ".ogg")
+
+class FixtureSpec(NamedTuple):
+    name: str
+    language: str
+    duration: int   # seconds
+
+FIXTURES: Dict[str, FixtureSpec] = {spec.name: spec for spec in [
+    FixtureSpec("short-en", "en", 30),
+    FixtureSpec("short-vi", "vi", 30),
+    FixtureSpec("20min-en", "en", 1200),
+    FixtureSpec("20min-vi", "vi", 1200),
+    FixtureSpec("60min-en", "en", 3600),
+    FixtureSpec("60min-vi", "vi", 3600),
+]}
+
+# Văn bản cố định cho TTS: cùng input thì fixture giống nhau giữa các lần sinh
+SPEECH_TEXT = {
+    "en": (
+        "Welcome back to the channel. Today we are looking at how a transcription service "
+        "turns long recordings into searchable text. First the audio is uploaded to object storage. "
+        "Then a worker downloads it, detects the language and decodes it segment by segment. "
+        "Finally the results are saved so that the web page can show them while the job is still running. "
+        "Thank you for watching, and see you in the next video."
+    ),
+    "vi": (
+        "Xin chào các bạn và chào mừng các bạn quay trở lại kênh. Hôm nay chúng ta sẽ tìm hiểu "
+        "cách một dịch vụ chuyển giọng nói thành văn bản xử lý những bản ghi âm dài. Đầu tiên tệp âm thanh "
+        "được tải lên kho lưu trữ. Sau đó worker tải về, nhận diện ngôn ngữ và giải mã từng đoạn. "
+        "Cuối cùng kết quả được lưu lại để trang web hiển thị ngay cả khi công việc chưa xong. "
+        "Cảm ơn các bạn đã theo dõi và hẹn gặp lại trong video tiếp theo."
+    ),
+}
+
+def find_fixture(name: str):
+    for path in sorted(glob.glob(os.path.join(BENCH_FIXTURE_DIR, f"{name}.*"))):
+        if path.endswith(AUDIO_EXTENSIONS):
+            return path
+    return None
+
+def _run(cmd):
+    subprocess.run(cmd, check=True, capture_output=True)
+
+def _speech_seed(language: str, workdir: str):
+    """Một đoạn giọng đọc ngắn bằng espeak-ng, None nếu không có espeak-ng"""
+    if not shutil.which(ESPEAK_BIN):
+        return None
+    path = os.path.join(workdir, f"seed-{language}.wav")
+    # Khoảng lặng giữa các câu để VAD/chunked mode có chỗ cắt
+    _run([ESPEAK_BIN, "-v", language, "-s", "150", "-g", "12", "-w", path, SPEECH_TEXT[language]])
+    return path
+
+def generate_fixture(spec: FixtureSpec) -> str:
+    """
+    Sinh fixture AAC 16 kHz mono (như audio YouTube native): giọng đọc espeak-ng lặp lại đến đủ duration.
+    Không có espeak-ng thì dùng tone + pink noise với seed cố định: RTF vẫn so sánh được giữa các lần chạy,
+    số segment thì không có ý nghĩa.
+    """
+    os.makedirs(BENCH_FIXTURE_DIR, exist_ok=True)
+    out = os.path.join(BENCH_FIXTURE_DIR, f"{spec.name}.m4a")
+    encode = ["-t", str(spec.duration), "-ac", "1", "-ar", "16000", "-c:a", "aac", "-b:a", "64k", out]
+    with tempfile.TemporaryDirectory() as workdir:
+        seed = _speech_seed(spec.language, workdir)
+        if seed:
+            _run([FFMPEG_BIN, "-nostdin", "-y", "-v", "error", "-stream_loop", "-1", "-i", seed, *encode])
+        else:
+            print(f"⚠️ {ESPEAK_BIN} not found: {spec.name} is a synthetic tone, segment counts are not meaningful")
+            _run([
+                FFMPEG_BIN, "-nostdin", "-y", "-v", "error",
+                "-f", "lavfi", "-i", "sine=frequency=220:sample_rate=16000",
+                "-f", "lavfi", "-i", "anoisesrc=color=pink:seed=42:amplitude=0.05:sample_rate=16000",
+                "-filter_complex", "amix=inputs=2:duration=shortest", *encode
+            ])
+    return out
+
+def ensure_fixture(name: str) -> str:
+    """Path của fixture: file có sẵn trong BENCH_FIXTURE_DIR, không có thì sinh mới"""
+    if name not in FIXTURES:
+        raise ValueError(f"Unknown fixture {name}. Available: {', '.join(FIXTURES)}")
+    return find_fixture(name) or generate_fixture(FIXTURES[name])
@@ -0,0 +1,221 @@
+"""
+Benchmark offline cho transcribe_job: real-time factor, wall time theo stage, peak RSS, segments/sec.
+
+    python -m apps.backend.benchmarks.transcribe_bench --fixtures short-en,short-vi \\
+        --beam-size 1,5 --compute-type int8,float32 --vad off,on --out bench.jsonl
+
+    # So với kết quả trước khi đổi transcription_params, exit code 1 nếu RTF chậm hơn quá ngưỡng
+    python -m apps.backend.benchmarks.transcribe_bench --fixtures short-en --baseline bench.jsonl
+
+Mỗi run là một process riêng: peak RSS đúng theo từng cấu hình và model không được dùng lại giữa các run.
+Stand-in cho hạ tầng: SQLite thay Postgres (DATABASE_URL), moto server thay MinIO (S3_ENDPOINT).
+transcribe_job được gọi trực tiếp như RQ gọi, không đi qua Redis.
+Model Whisper phải có sẵn trong cache của Hugging Face nếu máy không có mạng.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from apps.backend.benchmarks.fixtures import FIXTURES, ensure_fixture
+from apps.backend.standins import REPO_ROOT, migrate, start_s3
+
+BENCH_BUCKET = "bench"
+CONFIG_KEYS = ("model", "compute_type", "beam_size", "vad", "stream")
+TABLE_STAGES = ("download", "probe", "model_load", "inference", "persist")
+
+def parse_list(value: str, cast=str):
+    return [cast(item.strip()) for item in value.split(",") if item.strip()]
+
+def parse_bool(value: str) -> bool:
+    return value.lower() in ("on", "true", "1", "yes")
+
+def upload_fixtures(endpoint: str, paths: dict) -> dict:
+    import boto3
+    client = boto3.client("s3", endpoint_url=endpoint, region_name="us-east-1",
+                          aws_access_key_id="bench", aws_secret_access_key="bench")
+    client.create_bucket(Bucket=BENCH_BUCKET)
+    keys = {}
+    for name, path in paths.items():
+        keys[name] = f"bench/{os.path.basename(path)}"
+        client.upload_file(path, BENCH_BUCKET, keys[name])
+    return keys
+
+def config_grid(args):
+    for values in itertools.product(args.model, args.compute_type, args.beam_size, args.vad, args.stream):
+        yield dict(zip(CONFIG_KEYS, values))
+
+def run_one(fixture: str, key: str, config: dict, endpoint: str, workdir: str, verbose: bool) -> dict:
+    result_file = os.path.join(workdir, f"{uuid.uuid4()}.json")
+    database_url = f"sqlite:///{os.path.join(workdir, uuid.uuid4().hex)}.db"
+    # Migrate ở process cha: không tính vào thời gian của run
+    migrate(database_url)
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")])),
+        "DATABASE_URL": database_url,
+        "S3_ENDPOINT": endpoint,
+        "S3_PUBLIC_ENDPOINT": endpoint,
+        "S3_REGION": "us-east-1",
+        "S3_ACCESS_KEY": "bench",
+        "S3_SECRET_KEY": "bench",
+        "S3_BUCKET": BENCH_BUCKET,
+        "S3_STREAM_READS": "true" if config["stream"] else "false",
+        "WHISPER_MODEL_SIZE": config["model"],
+        "WHISPER_COMPUTE_TYPE": config["compute_type"],
+        "WHISPER_PARAM_OVERRIDES": json.dumps({"beam_size": config["beam_size"], "vad_filter": config["vad"]}),
+    })
+    cmd = [sys.executable, "-m", "apps.backend.benchmarks.transcribe_bench",
+           "--child", key, "--language", FIXTURES[fixture].language, "--result-file", result_file]
+    output = None if verbose else subprocess.DEVNULL
+    subprocess.run(cmd, env=env, cwd=REPO_ROOT, check=True, stdout=output, stderr=output)
+    with open(result_file) as f:
+        run = json.load(f)
+
+    audio_seconds = run["audio_seconds"] or FIXTURES[fixture].duration
+    inference = run["stages"].get("inference", 0.0)
+    return {
+        "fixture": fixture,
+        **config,
+        **run,
+        "audio_seconds": audio_seconds,
+        "rtf": round(inference / audio_seconds, 4),
+        "job_rtf": round(run["wall"] / audio_seconds, 4),
+        "segments_per_sec": round(run["segments"] / inference, 2) if inference else None,
+        "cpu_count": os.cpu_count(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def child_main(key: str, language: str, result_file: str):
+    """Chạy trong process riêng, env đã trỏ vào SQLite + moto"""
+    from sqlalchemy import select, func
+    from apps.backend.core.db import SessionLocal
+    from apps.backend.models import TranscriptionJob, TranscriptionDetail, TranscriptionSegment, JobStatus
+    from apps.backend import worker
+
+    job_id = str(uuid.uuid4())
+    with SessionLocal() as db:
+        db.add(TranscriptionJob(id=job_id, status=JobStatus.queued, file_key=key, engine="local", language=language))
+        db.commit()
+
+    started = time.perf_counter()
+    stages = (worker.transcribe_job(job_id) or {}).get("stages", {})
+    wall = time.perf_counter() - started
+
+    with SessionLocal() as db:
+        job = db.get(TranscriptionJob, job_id)
+        detail = db.scalar(select(TranscriptionDetail).where(TranscriptionDetail.job_id == job_id))
+        segments = db.scalar(select(func.count()).select_from(TranscriptionSegment)
+                             .where(TranscriptionSegment.job_id == job_id))
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        result = {
+            "status": job.status.value,
+            "error": job.error,
+            "audio_seconds": job.duration,
+            "detected_language": json.loads(detail.result_json).get("language") if detail else None,
+            "segments": segments,
+            "words": detail.word_count if detail else 0,
+            "wall": round(wall, 3),
+            "stages": stages,
+            # ru_maxrss tính bằng KB trên Linux
+            "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+            "children_peak_rss_mb": round(children.ru_maxrss / 1024, 1),
+            "cpu_seconds": round(usage.ru_utime + usage.ru_stime + children.ru_utime + children.ru_stime, 2),
+        }
+    with open(result_file, "w") as f:
+        json.dump(result, f)
+
+def run_key(row: dict):
+    return (row["fixture"],) + tuple(row[k] for k in CONFIG_KEYS)
+
+def print_table(rows):
+    header = ["fixture", *CONFIG_KEYS, "rtf", "job_rtf", *TABLE_STAGES, "peak_rss_mb", "seg/s", "status"]
+    print("\t".join(header))
+    for row in rows:
+        stages = [f"{row['stages'].get(s, 0.0):.2f}" for s in TABLE_STAGES]
+        print("\t".join(map(str, [
+            row["fixture"], *(row[k] for k in CONFIG_KEYS), row["rtf"], row["job_rtf"], *stages,
+            max(row["peak_rss_mb"], row["children_peak_rss_mb"]), row["segments_per_sec"], row["status"]
+        ])))
+
+def median_rtf(rows) -> dict:
+    grouped = {}
+    for row in rows:
+        if row.get("status") == "done":
+            grouped.setdefault(run_key(row), []).append(row["rtf"])
+    return {key: statistics.median(values) for key, values in grouped.items()}
+
+def compare_baseline(rows, baseline_path: str, max_regression: float) -> bool:
+    """In các cấu hình có RTF chậm hơn baseline quá max_regression, trả về True nếu có regression"""
+    with open(baseline_path) as f:
+        baseline = median_rtf(json.loads(line) for line in f if line.strip())
+    regressed = False
+    for key, rtf in median_rtf(rows).items():
+        if key not in baseline:
+            continue
+        change = rtf / baseline[key] - 1 if baseline[key] else 0.0
+        marker = "❌" if change > max_regression else "✅"
+        regressed |= change > max_regression
+        print(f"{marker} {' '.join(map(str, key))}: rtf {baseline[key]:.4f} -> {rtf:.4f} ({change:+.1%})")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline transcription throughput benchmark")
+    parser.add_argument("--fixtures", type=parse_list, default=["short-en", "short-vi"],
+                        help=f"Comma separated, available: {','.join(FIXTURES)}")
+    parser.add_argument("--model", type=parse_list, default=[os.getenv("WHISPER_MODEL_SIZE", "small")])
+    parser.add_argument("--compute-type", type=parse_list, default=[os.getenv("WHISPER_COMPUTE_TYPE", "int8")])
+    parser.add_argument("--beam-size", type=lambda v: parse_list(v, int), default=[5])
+    parser.add_argument("--vad", type=lambda v: parse_list(v, parse_bool), default=[False])
+    parser.add_argument("--stream", type=lambda v: parse_list(v, parse_bool), default=[True],
+                        help="S3_STREAM_READS values: on (ranged GET) / off (download to /tmp)")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--out", help="Append results as JSON lines")
+    parser.add_argument("--baseline", help="JSON lines from a previous run to compare RTF against")
+    parser.add_argument("--max-regression", type=float, default=0.10, help="Allowed RTF slowdown, 0.10 = 10%%")
+    parser.add_argument("--verbose", action="store_true", help="Show worker output")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--language", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_main(args.child, args.language, args.result_file)
+        return
+
+    paths = {name: ensure_fixture(name) for name in args.fixtures}
+    server, endpoint = start_s3()
+    rows = []
+    try:
+        keys = upload_fixtures(endpoint, paths)
+        with tempfile.TemporaryDirectory() as workdir:
+            for fixture in args.fixtures:
+                for config in config_grid(args):
+                    for _ in range(args.repeat):
+                        row = run_one(fixture, keys[fixture], config, endpoint, workdir, args.verbose)
+                        rows.append(row)
+                        if args.out:
+                            with open(args.out, "a") as f:
+                                f.write(json.dumps(row) + "\n")
+    finally:
+        server.stop()
+
+    print_table(rows)
+    for row in rows:
+        if row["status"] != "done":
+            print(f"⚠️ {row['fixture']} {row['model']}/{row['compute_type']}: {row['error']}")
+    if args.baseline and compare_baseline(rows, args.baseline, args.max_regression):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,5 @@
-# Quản lý các biến môi trường và cài đặt cấu hình chung cho ứng dụng API
\ No newline at end of file
+# Quản lý các biến môi trường và cài đặt cấu hình chung cho ứng dụng API
+import os
+
+# Số job/file tối đa cho một request batch (presign, transcription, youtube)
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "500"))
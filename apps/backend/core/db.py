@@ -1,6 +1,7 @@
 # Khởi tạo và quản lý kết nối database sử dụng SQLAlchemy
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 
 import os
 
@@ -10,11 +11,31 @@ DB_HOST = os.getenv("POSTGRES_HOST", "localhost")
 DB_PORT = os.getenv("POSTGRES_PORT", "5432")
 DB_NAME = os.getenv("POSTGRES_DB", "any2text")
 
-DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# DATABASE_URL / ASYNC_DATABASE_URL override toàn bộ URL (benchmark, load test chạy trên SQLite)
+DATABASE_URL = os.getenv("DATABASE_URL") or f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# API dùng driver async (asyncpg), worker vẫn dùng engine sync
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+# Pool sizing: mỗi process API giữ tối đa DB_POOL_SIZE + DB_MAX_OVERFLOW connection
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
 
 engine = create_engine(DATABASE_URL, future=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+# Pool sizing chỉ áp dụng cho Postgres; SQLite (benchmark/load test) dùng pool mặc định của dialect
+pool_options = {} if ASYNC_DATABASE_URL.startswith("sqlite") else dict(
+	pool_size=DB_POOL_SIZE,
+	max_overflow=DB_MAX_OVERFLOW,
+	pool_timeout=DB_POOL_TIMEOUT,
+	pool_recycle=DB_POOL_RECYCLE
+)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_pre_ping=True, **pool_options)
+# expire_on_commit=False: đọc attribute sau commit không phát sinh lazy load (không được phép khi async)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession)
+
 class Base(DeclarativeBase): ...
 
 def get_db():
@@ -22,4 +43,8 @@ def get_db():
 	try:
 		yield db
 	finally:
-		db.close()
\ No newline at end of file
+		db.close()
+
+async def get_async_db():
+	async with AsyncSessionLocal() as db:
+		yield db
@@ -0,0 +1,148 @@
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from apps.backend.standins import REPO_ROOT, free_port, migrate, start_s3
+
+LOADTEST_BUCKET = "loadtest"
+# Từ vựng cố định cho text của segment và query /search (en + vi)
+VOCABULARY = (
+    "audio video channel transcript model language search storage queue worker upload download "
+    "segment minute speaker meeting podcast lecture interview music news review "
+    "xin chào cảm ơn hôm nay chúng ta video kênh bài học tiếng việt người nói âm thanh"
+).split()
+
+def start_redis():
+    """fakeredis chạy như Redis server thật trên TCP: API và RQ không cần sửa gì"""
+    from fakeredis import TcpFakeServer
+    port = free_port()
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, port
+
+def stand_in_env(workdir: str, database_url: str, redis_port: int, s3_endpoint: str) -> dict:
+    """Env cho API process và cho seeding (đọc ở core/db, redis_queue, storage lúc import)"""
+    if not database_url:
+        database_url = f"sqlite:///{os.path.join(workdir, 'loadtest.db')}"
+    if database_url.startswith("sqlite"):
+        async_url = database_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    else:
+        async_url = database_url.replace("+psycopg2", "").replace("postgresql://", "postgresql+asyncpg://", 1)
+    return {
+        "DATABASE_URL": database_url,
+        "ASYNC_DATABASE_URL": async_url,
+        "REDIS_HOST": "127.0.0.1",
+        "REDIS_PORT": str(redis_port),
+        "S3_ENDPOINT": s3_endpoint,
+        "S3_PUBLIC_ENDPOINT": s3_endpoint,
+        "S3_REGION": "us-east-1",
+        "S3_ACCESS_KEY": "loadtest",
+        "S3_SECRET_KEY": "loadtest",
+        "S3_BUCKET": LOADTEST_BUCKET,
+    }
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+def seed(jobs: int, segments_per_job: int, running_jobs: int, seed_value: int = 42) -> dict:
+    """
+    Dữ liệu cho mix: job đã xong (detail + segment + image), job đang chạy, một channel crawler,
+    object audio trên S3. Trả về các giá trị dùng cho placeholder của mix.
+    Gọi sau khi env đã được set (core/db đọc DATABASE_URL lúc import).
+    """
+    from sqlalchemy import insert, text
+    from apps.backend.core.db import engine
+    from apps.backend.models import TranscriptionJob, TranscriptionDetail, TranscriptionImage, TranscriptionSegment, ChannelCrawler
+    from apps.backend.models.enums import JobStatus, ImageType
+    from apps.backend.services.segment_store import pack_result_meta
+    from apps.backend.services.storage import s3_client, ensure_bucket_exists
+
+    rng = random.Random(seed_value)
+    now = datetime.now(timezone.utc)
+    crawler_id = str(uuid.uuid4())
+    done_ids = [str(uuid.uuid4()) for _ in range(jobs)]
+    running_ids = [str(uuid.uuid4()) for _ in range(running_jobs)]
+
+    ensure_bucket_exists()
+    file_keys = []
+    for i in range(20):
+        key = f"loadtest/audio-{i}.mp3"
+        s3_client().put_object(Bucket=LOADTEST_BUCKET, Key=key, Body=rng.randbytes(4096))
+        file_keys.append(key)
+
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            # Đọc không bị chặn bởi ghi khi nhiều request đồng thời
+            conn.execute(text("PRAGMA journal_mode=WAL"))
+        conn.execute(insert(ChannelCrawler), [{
+            "id": crawler_id, "status": JobStatus.done, "channel_url": "https://www.youtube.com/@loadtest",
+            "language": "vi", "engine": "local", "max_videos": 50, "video_type": "videos",
+            "total_videos_found": min(jobs, 50), "total_jobs_created": min(jobs, 50),
+        }])
+        conn.execute(insert(TranscriptionJob), [{
+            "id": job_id,
+            "status": JobStatus.done if i < jobs else JobStatus.processing,
+            "file_key": rng.choice(file_keys),
+            "engine": "local",
+            "language": rng.choice(["en", "vi"]),
+            "file_url": "",
+            "title": _text(rng, 5),
+            "duration": segments_per_job * 4,
+            "progress": 1.0 if i < jobs else 0.5,
+            "youtube_url": f"https://www.youtube.com/watch?v=lt{i:09d}",
+            "video_id": f"lt{i:09d}",
+            "channel_crawler_id": crawler_id if i < 50 else None,
+            "created_at": now - timedelta(seconds=i),
+            "updated_at": now,
+        } for i, job_id in enumerate(done_ids + running_ids)])
+
+        for i, job_id in enumerate(done_ids + running_ids):
+            count = segments_per_job if i < jobs else segments_per_job // 2
+            segments = [{
+                "job_id": job_id, "seg_index": n + 1, "start": n * 4.0, "end": n * 4.0 + 4.0, "text": _text(rng, 12),
+            } for n in range(count)]
+            conn.execute(insert(TranscriptionSegment), segments)
+            if i < jobs:
+                full_text = " ".join(s["text"] for s in segments)
+                conn.execute(insert(TranscriptionDetail), [{
+                    "id": str(uuid.uuid4()), "job_id": job_id, "result_json": pack_result_meta("vi", count),
+                    "formatted_text": full_text, "word_count": len(full_text.split()),
+                }])
+                conn.execute(insert(TranscriptionImage), [{
+                    "id": str(uuid.uuid4()), "job_id": job_id, "image_type": ImageType.thumbnail,
+                    "file_key": f"thumbnails/{job_id}.jpg", "file_url": "", "created_at": now,
+                }])
+
+    return {
+        "job_id": done_ids,
+        "running_job_id": running_ids or done_ids,
+        "crawler_id": [crawler_id],
+        "file_key": file_keys,
+        "word": VOCABULARY,
+    }
+
+def start_api(env: dict, port: int, workers: int, timeout: float = 60):
+    """uvicorn trong process riêng như khi deploy, chờ /health trả về"""
+    import httpx
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "apps.backend.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=REPO_ROOT, env={**os.environ, **env, "PYTHONPATH": REPO_ROOT},
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"API exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("API did not become healthy in time")
@@ -1,15 +1,17 @@
 import os, json, uuid
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from fastapi import Depends
 from typing import List
-from apps.backend.core.db import SessionLocal, engine, Base
+from apps.backend.core.db import SessionLocal, engine, async_engine
 from apps.backend.models.channel_crawler import ChannelCrawler
 from apps.backend.schemas import PresignIn, PresignOut, YouTubeTranscriptionIn, YouTubeTranscriptionOut
 from apps.backend.schemas.channel import ChannelCrawlerIn, ChannelCrawlerOut
-from apps.backend.services.storage import presign_put
+from apps.backend.services.storage import presign_put, s3_client, presign_client, ensure_bucket_exists
 from apps.backend.services.redis_queue import q
+from apps.backend.services.metrics import RequestMetricsMiddleware, render_metrics
+from apps.backend.services.tracing import TracingMiddleware, init_tracing
 from apps.backend.api.api import router as api_router
 
 API_CORS = os.getenv("API_CORS_ORIGINS","http://localhost:3000").split(",")
@@ -23,13 +25,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cursor trang tiếp theo của GET /transcriptions
+    expose_headers=["X-Next-Cursor"],
 )
+# Latency theo route cho Prometheus (GET /metrics)
+app.add_middleware(RequestMetricsMiddleware)
+# Span cho request + query DB (no-op khi TRACING_EXPORTER trống), context đi tiếp vào job RQ qua job.meta
+init_tracing("any2text-api", engines=[engine, async_engine.sync_engine])
+app.add_middleware(TracingMiddleware)
 
 # Mount API routers
 app.include_router(api_router, prefix="/api")
 
-# Auto-create tables on API start
-Base.metadata.create_all(bind=engine)
+@app.on_event("startup")
+def init_storage():
+    # Client S3 dùng chung được tạo một lần, request presign đầu tiên không phải chờ
+    s3_client()
+    presign_client()
+    # Provision bucket một lần lúc startup thay vì mỗi request presign
+    ensure_bucket_exists()
+
+@app.on_event("shutdown")
+async def close_db():
+    await async_engine.dispose()
 
 @app.get("/health")
-def health(): return {"ok": True}
\ No newline at end of file
+def health(): return {"ok": True}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # def thường: đọc queue depth từ Redis bằng client sync trong threadpool
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
\ No newline at end of file
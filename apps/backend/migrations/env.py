@@ -0,0 +1,33 @@
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine, pool
+from apps.backend.core.db import Base, DATABASE_URL
+import apps.backend.models  # noqa: F401 - đăng ký tất cả table vào Base.metadata
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def get_url() -> str:
+    # Cho phép override (vd: chạy migration trên DB khác) qua -x url=...
+    return context.get_x_argument(as_dictionary=True).get("url") or DATABASE_URL
+
+def run_migrations_offline():
+    """Sinh SQL (alembic upgrade head --sql) không cần kết nối DB"""
+    context.configure(url=get_url(), target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    connectable = create_engine(get_url(), poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
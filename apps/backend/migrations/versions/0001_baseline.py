@@ -0,0 +1,148 @@
+"""Baseline schema (thay cho Base.metadata.create_all lúc start API/worker + script migrate_youtube.py)
+
+DB đã được tạo bằng create_all trước đây vẫn upgrade được: table đã có thì bỏ qua,
+chỉ thêm các cột còn thiếu (vd youtube_url, title mà migrate_youtube.py thêm bằng ALTER TABLE).
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+JOB_STATUSES = ("queued", "processing", "done", "error")
+IMAGE_TYPES = ("uploaded", "generated", "thumbnail", "screenshot")
+
+# Type được tạo một lần (checkfirst), các table chỉ tham chiếu
+jobstatus = postgresql.ENUM(*JOB_STATUSES, name="jobstatus", create_type=False)
+imagetype = postgresql.ENUM(*IMAGE_TYPES, name="imagetype", create_type=False)
+
+def _has_table(name: str) -> bool:
+    # --sql (offline) không inspect được DB: sinh SQL cho DB trống
+    if context.is_offline_mode():
+        return False
+    return sa.inspect(op.get_bind()).has_table(name)
+
+def _add_missing_columns(table: str, columns):
+    existing = set()
+    if not context.is_offline_mode():
+        existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+    for column in columns:
+        if column.name not in existing:
+            op.add_column(table, column)
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        checkfirst = not context.is_offline_mode()
+        postgresql.ENUM(*JOB_STATUSES, name="jobstatus").create(bind, checkfirst=checkfirst)
+        postgresql.ENUM(*IMAGE_TYPES, name="imagetype").create(bind, checkfirst=checkfirst)
+
+    if not _has_table("channel_crawlers"):
+        op.create_table(
+            "channel_crawlers",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("status", jobstatus),
+            sa.Column("channel_url", sa.String(), nullable=False),
+            sa.Column("language", sa.String()),
+            sa.Column("engine", sa.String()),
+            sa.Column("max_videos", sa.Integer()),
+            sa.Column("video_type", sa.String()),
+            sa.Column("total_videos_found", sa.Integer()),
+            sa.Column("total_jobs_created", sa.Integer()),
+            sa.Column("error", sa.Text()),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+    _add_missing_columns("channel_crawlers", [
+        sa.Column("incremental", sa.Boolean(), server_default=sa.true()),
+        sa.Column("total_videos_skipped", sa.Integer(), server_default="0"),
+    ])
+
+    if not _has_table("transcription_jobs"):
+        op.create_table(
+            "transcription_jobs",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("status", jobstatus, nullable=False),
+            sa.Column("file_key", sa.String(), nullable=False),
+            sa.Column("engine", sa.String(), nullable=False),
+            sa.Column("language", sa.String()),
+            sa.Column("file_url", sa.String()),
+            sa.Column("error", sa.Text()),
+            sa.Column("duration", sa.Integer()),
+            sa.Column("channel_crawler_id", sa.String(), sa.ForeignKey("channel_crawlers.id")),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True)),
+        )
+    _add_missing_columns("transcription_jobs", [
+        sa.Column("youtube_url", sa.String()),
+        sa.Column("title", sa.String()),
+        sa.Column("progress", sa.Float()),
+        sa.Column("audio_codec", sa.String()),
+        sa.Column("video_id", sa.String()),
+        sa.Column("content_hash", sa.String()),
+        sa.Column("params_fingerprint", sa.String()),
+    ])
+
+    if not _has_table("transcription_details"):
+        op.create_table(
+            "transcription_details",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("job_id", sa.String(), sa.ForeignKey("transcription_jobs.id"), nullable=False, unique=True),
+            sa.Column("result_json", sa.Text()),
+            sa.Column("formatted_text", sa.Text()),
+            sa.Column("summary", sa.Text()),
+            sa.Column("keywords", sa.Text()),
+            sa.Column("processing_time", sa.Integer()),
+            sa.Column("word_count", sa.Integer()),
+            sa.Column("confidence_score", sa.String()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True)),
+        )
+
+    if not _has_table("transcription_images"):
+        op.create_table(
+            "transcription_images",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("job_id", sa.String(), sa.ForeignKey("transcription_jobs.id"), nullable=False),
+            sa.Column("image_type", imagetype, nullable=False),
+            sa.Column("file_key", sa.String(), nullable=False),
+            sa.Column("file_url", sa.String()),
+            sa.Column("filename", sa.String()),
+            sa.Column("mime_type", sa.String()),
+            sa.Column("file_size", sa.Integer()),
+            sa.Column("width", sa.Integer()),
+            sa.Column("height", sa.Integer()),
+            sa.Column("description", sa.Text()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True)),
+        )
+
+    if not _has_table("transcription_segments"):
+        op.create_table(
+            "transcription_segments",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("job_id", sa.String(), sa.ForeignKey("transcription_jobs.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("seg_index", sa.Integer(), nullable=False),
+            sa.Column("start", sa.Float(), nullable=False),
+            sa.Column("end", sa.Float(), nullable=False),
+            sa.Column("text", sa.Text(), nullable=False),
+        )
+        op.create_index("ix_transcription_segments_job_id", "transcription_segments", ["job_id"])
+
+def downgrade():
+    op.drop_table("transcription_segments")
+    op.drop_table("transcription_images")
+    op.drop_table("transcription_details")
+    op.drop_table("transcription_jobs")
+    op.drop_table("channel_crawlers")
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        postgresql.ENUM(name="imagetype").drop(bind, checkfirst=True)
+        postgresql.ENUM(name="jobstatus").drop(bind, checkfirst=True)
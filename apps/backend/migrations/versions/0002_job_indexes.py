@@ -0,0 +1,40 @@
+"""Indexes cho các query nóng trên transcription_jobs
+
+- list_transcriptions: ORDER BY created_at DESC, id DESC (keyset), có/không lọc status
+- get_channel_crawler: lọc theo channel_crawler_id
+- tra cứu theo youtube_url
+- result cache: (params_fingerprint, video_id) và (params_fingerprint, content_hash)
+- images của job (selectinload theo job_id)
+
+Tạo CONCURRENTLY trên Postgres để không khoá ghi của worker trong lúc build index.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_transcription_jobs_created_at_id", "transcription_jobs", ["created_at", "id"]),
+    ("ix_transcription_jobs_status_created_at_id", "transcription_jobs", ["status", "created_at", "id"]),
+    ("ix_transcription_jobs_channel_crawler_id", "transcription_jobs", ["channel_crawler_id"]),
+    ("ix_transcription_jobs_youtube_url", "transcription_jobs", ["youtube_url"]),
+    ("ix_transcription_jobs_fingerprint_video_id", "transcription_jobs", ["params_fingerprint", "video_id"]),
+    ("ix_transcription_jobs_fingerprint_content_hash", "transcription_jobs", ["params_fingerprint", "content_hash"]),
+    ("ix_transcription_images_job_id", "transcription_images", ["job_id"]),
+]
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
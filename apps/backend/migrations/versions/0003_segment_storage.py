@@ -0,0 +1,136 @@
+"""Segment chỉ lưu trong transcription_segments, result_json chỉ còn metadata
+
+- Index (job_id, seg_index) cho đọc theo thứ tự, (job_id, start) cho range query theo thời gian;
+  bỏ index job_id đơn (là prefix của cả hai)
+- Chuyển blob pack_result cũ ({"text", "language", "segments"}) sang row segment, theo batch.
+  Job đã có row segment (ghi bởi SegmentWriter) chỉ cần thay result_json.
+- Downgrade ghép lại blob từ transcription_segments + formatted_text (row segment được giữ nguyên).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+import json
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 200
+SEGMENT_STORAGE = "segments"
+
+details = sa.table(
+    "transcription_details",
+    sa.column("id", sa.String),
+    sa.column("job_id", sa.String),
+    sa.column("result_json", sa.Text),
+    sa.column("formatted_text", sa.Text),
+)
+segments = sa.table(
+    "transcription_segments",
+    sa.column("job_id", sa.String),
+    sa.column("seg_index", sa.Integer),
+    sa.column("start", sa.Float),
+    sa.column("end", sa.Float),
+    sa.column("text", sa.Text),
+)
+
+def _move_result_blobs():
+    bind = op.get_bind()
+    last_id = ""
+    while True:
+        rows = bind.execute(
+            sa.select(details.c.id, details.c.job_id, details.c.result_json)
+            .where(details.c.id > last_id, details.c.result_json.is_not(None))
+            .order_by(details.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        job_ids = [r.job_id for r in rows]
+        has_segments = set(bind.execute(
+            sa.select(segments.c.job_id).distinct().where(segments.c.job_id.in_(job_ids))
+        ).scalars())
+        for row in rows:
+            try:
+                data = json.loads(row.result_json)
+            except ValueError:
+                continue
+            if not isinstance(data, dict) or data.get("storage") == SEGMENT_STORAGE:
+                continue
+            seg_list = data.get("segments") or []
+            if row.job_id not in has_segments and seg_list:
+                bind.execute(segments.insert(), [{
+                    "job_id": row.job_id,
+                    "seg_index": s.get("id", i + 1),
+                    "start": s.get("start", 0.0),
+                    "end": s.get("end", 0.0),
+                    "text": s.get("text", ""),
+                } for i, s in enumerate(seg_list)])
+            meta = {"language": data.get("language") or "auto", "segment_count": len(seg_list), "storage": SEGMENT_STORAGE}
+            bind.execute(details.update().where(details.c.id == row.id).values(result_json=json.dumps(meta)))
+
+def _restore_result_blobs():
+    bind = op.get_bind()
+    last_id = ""
+    while True:
+        rows = bind.execute(
+            sa.select(details.c.id, details.c.job_id, details.c.result_json, details.c.formatted_text)
+            .where(details.c.id > last_id, details.c.result_json.is_not(None))
+            .order_by(details.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        metas = {}
+        for row in rows:
+            try:
+                data = json.loads(row.result_json)
+            except ValueError:
+                continue
+            if isinstance(data, dict) and data.get("storage") == SEGMENT_STORAGE:
+                metas[row.job_id] = data
+        if not metas:
+            continue
+        seg_lists = {job_id: [] for job_id in metas}
+        for seg in bind.execute(
+            sa.select(segments.c.job_id, segments.c.seg_index, segments.c.start, segments.c.end, segments.c.text)
+            .where(segments.c.job_id.in_(list(metas)))
+            .order_by(segments.c.job_id, segments.c.seg_index)
+        ):
+            seg_lists[seg.job_id].append({"id": seg.seg_index, "start": seg.start, "end": seg.end, "text": seg.text})
+        for row in rows:
+            if row.job_id not in metas:
+                continue
+            # Định dạng của pack_result cũ
+            blob = {"text": row.formatted_text or "", "language": metas[row.job_id].get("language") or "auto",
+                    "segments": seg_lists[row.job_id]}
+            bind.execute(details.update().where(details.c.id == row.id).values(result_json=json.dumps(blob)))
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index("ix_transcription_segments_job_id_seg_index", "transcription_segments", ["job_id", "seg_index"],
+                        if_not_exists=True, postgresql_concurrently=True)
+        op.create_index("ix_transcription_segments_job_id_start", "transcription_segments", ["job_id", "start"],
+                        if_not_exists=True, postgresql_concurrently=True)
+        op.drop_index("ix_transcription_segments_job_id", table_name="transcription_segments",
+                      if_exists=True, postgresql_concurrently=True)
+    # --sql (offline) không đọc được dữ liệu: chỉ sinh DDL
+    if not context.is_offline_mode():
+        _move_result_blobs()
+
+def downgrade():
+    # Code trước 0003 đọc text + segments từ result_json
+    if not context.is_offline_mode():
+        _restore_result_blobs()
+    with op.get_context().autocommit_block():
+        op.create_index("ix_transcription_segments_job_id", "transcription_segments", ["job_id"],
+                        if_not_exists=True, postgresql_concurrently=True)
+        op.drop_index("ix_transcription_segments_job_id_start", table_name="transcription_segments",
+                      if_exists=True, postgresql_concurrently=True)
+        op.drop_index("ix_transcription_segments_job_id_seg_index", table_name="transcription_segments",
+                      if_exists=True, postgresql_concurrently=True)
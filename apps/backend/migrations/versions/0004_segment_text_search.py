@@ -0,0 +1,31 @@
+"""GIN full-text index trên transcription_segments.text (Postgres)
+
+Index biểu thức to_tsvector('simple', text): không cần cột tsvector riêng, Postgres tự cập nhật
+index khi SegmentWriter INSERT segment. Tạo CONCURRENTLY để không khoá ghi của worker.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "ix_transcription_segments_text_search"
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        op.create_index(INDEX_NAME, "transcription_segments", [sa.text("to_tsvector('simple', text)")],
+                        postgresql_using="gin", if_not_exists=True, postgresql_concurrently=True)
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(INDEX_NAME, table_name="transcription_segments", if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,21 @@
+"""Cột metrics_json trên transcription_jobs cho instrumentation của worker
+
+Nullable, không default: ADD COLUMN chỉ đổi catalog, không rewrite bảng.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("transcription_jobs", sa.Column("metrics_json", sa.Text(), nullable=True))
+
+def downgrade():
+    op.drop_column("transcription_jobs", "metrics_json")
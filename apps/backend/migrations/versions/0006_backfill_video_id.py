@@ -0,0 +1,66 @@
+"""Điền video_id từ youtube_url cho job cũ, index video_id cho crawler incremental
+
+Crawler incremental bỏ qua video đã có job theo video_id (không theo params_fingerprint):
+job tạo trước khi có cột video_id sẽ bị crawl lại nếu cột này còn NULL.
+Regex giống youtube_video_id (services/result_cache.py), copy lại để migration không phụ thuộc code app.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+import re
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+YOUTUBE_ID_RE = re.compile(r"(?:v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})")
+
+jobs = sa.table(
+    "transcription_jobs",
+    sa.column("id", sa.String),
+    sa.column("youtube_url", sa.String),
+    sa.column("video_id", sa.String),
+)
+
+def _backfill_video_ids():
+    bind = op.get_bind()
+    last_id = ""
+    while True:
+        rows = bind.execute(
+            sa.select(jobs.c.id, jobs.c.youtube_url)
+            .where(jobs.c.id > last_id, jobs.c.video_id.is_(None), jobs.c.youtube_url.is_not(None))
+            .order_by(jobs.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        updates = []
+        for row in rows:
+            match = YOUTUBE_ID_RE.search(row.youtube_url)
+            if match:
+                updates.append({"job_id": row.id, "new_video_id": match.group(1)})
+        if updates:
+            bind.execute(
+                jobs.update().where(jobs.c.id == sa.bindparam("job_id")).values(video_id=sa.bindparam("new_video_id")),
+                updates,
+            )
+
+def upgrade():
+    # --sql (offline) không đọc được dữ liệu: chỉ sinh DDL
+    if not context.is_offline_mode():
+        _backfill_video_ids()
+    with op.get_context().autocommit_block():
+        op.create_index("ix_transcription_jobs_video_id", "transcription_jobs", ["video_id"],
+                        if_not_exists=True, postgresql_concurrently=True)
+
+def downgrade():
+    # video_id đã điền vẫn đúng với youtube_url: giữ lại, chỉ bỏ index
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_transcription_jobs_video_id", table_name="transcription_jobs",
+                      if_exists=True, postgresql_concurrently=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, String, Integer, Text, DateTime, ForeignKey, Enum, Boolean
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -15,9 +15,11 @@ class ChannelCrawler(Base):
     engine = Column(String, default="local")
     max_videos = Column(Integer, default=50)
     video_type = Column(String, default="shorts")
+    incremental = Column(Boolean, default=True)  # Bỏ qua video đã có job
     
     total_videos_found = Column(Integer, default=0)
     total_jobs_created = Column(Integer, default=0)
+    total_videos_skipped = Column(Integer, default=0)
     
     error = Column(Text, nullable=True)
     created_at = Column(DateTime, default=func.now())
@@ -3,6 +3,7 @@
 from .transcription_job import TranscriptionJob, JobStatus
 from .transcription_detail import TranscriptionDetail
 from .transcription_image import TranscriptionImage, ImageType
+from .transcription_segment import TranscriptionSegment
 
 # Backward compatibility alias
 Transcription = TranscriptionJob
@@ -12,6 +13,7 @@ __all__ = [
     'TranscriptionJob',
     'TranscriptionDetail', 
     'TranscriptionImage',
+    'TranscriptionSegment',
     'JobStatus',
     'ImageType',
     'Transcription'  # Backward compatibility
@@ -1,7 +1,7 @@
 # TranscriptionImage model
 
 import enum
-from sqlalchemy import String, Text, DateTime, Enum, ForeignKey, Integer
+from sqlalchemy import String, Text, DateTime, Enum, ForeignKey, Integer, Index
 from sqlalchemy.orm import mapped_column, relationship
 from sqlalchemy.sql import func
 from apps.backend.core.db import Base
@@ -19,6 +19,9 @@ class TranscriptionImage(Base):
     Lưu trữ hình ảnh liên quan đến transcription
     """
     __tablename__ = "transcription_images"
+    __table_args__ = (
+        Index("ix_transcription_images_job_id", "job_id"),
+    )
     
     id = mapped_column(String, primary_key=True)
     job_id = mapped_column(String, ForeignKey("transcription_jobs.id"), nullable=False)
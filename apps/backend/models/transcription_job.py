@@ -1,6 +1,6 @@
 # TranscriptionJob model
 from apps.backend.models.enums import JobStatus
-from sqlalchemy import String, Text, DateTime, Enum, ForeignKey, Integer
+from sqlalchemy import String, Text, DateTime, Enum, ForeignKey, Integer, Float, Index
 from sqlalchemy.orm import mapped_column, relationship
 from sqlalchemy.sql import func
 from apps.backend.core.db import Base
@@ -10,6 +10,16 @@ class TranscriptionJob(Base):
     Quản lý status và metadata của transcription job
     """
     __tablename__ = "transcription_jobs"
+    # Index cho các query nóng (tạo bằng migration 0002_job_indexes, 0006_backfill_video_id)
+    __table_args__ = (
+        Index("ix_transcription_jobs_created_at_id", "created_at", "id"),
+        Index("ix_transcription_jobs_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_transcription_jobs_channel_crawler_id", "channel_crawler_id"),
+        Index("ix_transcription_jobs_youtube_url", "youtube_url"),
+        Index("ix_transcription_jobs_video_id", "video_id"),
+        Index("ix_transcription_jobs_fingerprint_video_id", "params_fingerprint", "video_id"),
+        Index("ix_transcription_jobs_fingerprint_content_hash", "params_fingerprint", "content_hash"),
+    )
     
     id = mapped_column(String, primary_key=True)
     status = mapped_column(Enum(JobStatus), nullable=False, default=JobStatus.queued)
@@ -18,11 +28,21 @@ class TranscriptionJob(Base):
     language = mapped_column(String, nullable=True)
     file_url = mapped_column(String)   # có thể là path local hoặc tên file trong S3
     error = mapped_column(Text, nullable=True)
+    progress = mapped_column(Float, nullable=True)      # 0.0 - 1.0, cập nhật trong lúc transcribe
     
     # YouTube fields
     youtube_url = mapped_column(String, nullable=True)  # URL gốc của YouTube video
     title = mapped_column(String, nullable=True)        # Tiêu đề video
     duration = mapped_column(Integer, nullable=True)    # Duration in seconds
+    audio_codec = mapped_column(String, nullable=True)  # Codec của audio đã lưu (aac, opus, mp3, pcm_s16le...)
+    
+    # Result cache keys (xem services/result_cache)
+    video_id = mapped_column(String, nullable=True)            # YouTube video id
+    content_hash = mapped_column(String, nullable=True)        # MD5 của audio
+    params_fingerprint = mapped_column(String, nullable=True)  # Hash của model + decoding params
+    
+    # Metrics của các lần chạy job function (stage timing, CPU, peak RSS...), JSON theo tên function
+    metrics_json = mapped_column(Text, nullable=True)
     
     # Channel crawler relationship
     channel_crawler_id = mapped_column(String, ForeignKey("channel_crawlers.id"), nullable=True)
@@ -31,6 +51,7 @@ class TranscriptionJob(Base):
     # Relationships
     transcription_detail = relationship("TranscriptionDetail", back_populates="job", uselist=False, cascade="all, delete-orphan")
     images = relationship("TranscriptionImage", back_populates="job", cascade="all, delete-orphan")
+    segments = relationship("TranscriptionSegment", back_populates="job", cascade="all, delete-orphan", passive_deletes=True, order_by="TranscriptionSegment.seg_index")
     
     created_at = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at = mapped_column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
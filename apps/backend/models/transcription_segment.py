@@ -0,0 +1,40 @@
+# TranscriptionSegment model
+
+from sqlalchemy import String, Text, Float, ForeignKey, Integer, Index, text as sql_text
+from sqlalchemy.orm import mapped_column, relationship
+from apps.backend.core.db import Base
+
+# Text search config: 'simple' (không stemming, không stopword) dùng được cho cả tiếng Việt lẫn tiếng Anh.
+# Index và query phải dùng cùng một biểu thức to_tsvector thì planner mới chọn index.
+SEARCH_CONFIG = "simple"
+
+
+class TranscriptionSegment(Base):
+    """
+    Lưu từng segment của transcription, được ghi dần trong lúc decode
+    """
+    __tablename__ = "transcription_segments"
+    __table_args__ = (
+        # Đọc theo thứ tự segment và range query theo thời gian trong một job
+        Index("ix_transcription_segments_job_id_seg_index", "job_id", "seg_index"),
+        Index("ix_transcription_segments_job_id_start", "job_id", "start"),
+        # GIN full-text index trên text của segment (chỉ Postgres), được cập nhật cùng mỗi lần INSERT segment
+        Index(
+            "ix_transcription_segments_text_search",
+            sql_text(f"to_tsvector('{SEARCH_CONFIG}', text)"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    id = mapped_column(Integer, primary_key=True, autoincrement=True)
+    job_id = mapped_column(String, ForeignKey("transcription_jobs.id", ondelete="CASCADE"), nullable=False)
+
+    # Segment content
+    seg_index = mapped_column(Integer, nullable=False)  # Thứ tự segment (bắt đầu từ 1)
+    start = mapped_column(Float, nullable=False)        # Start time in seconds
+    end = mapped_column(Float, nullable=False)          # End time in seconds
+    text = mapped_column(Text, nullable=False)
+
+    # Relationship
+    job = relationship("TranscriptionJob", back_populates="segments")
+
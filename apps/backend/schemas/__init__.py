@@ -2,7 +2,10 @@ from .transcription import (
   TranscriptionIn,
   TranscriptionOut,
   TranscriptionJobIn,
+  TranscriptionBatchIn,
   TranscriptionJobOut,
+  TranscriptionSummaryOut,
+  TranscriptionSegmentOut,
   TranscriptionDetailIn,
   TranscriptionDetailOut,
   TranscriptionImageIn,
@@ -12,10 +15,23 @@ from .transcription import (
 
 from .presign import (
   PresignIn, 
-  PresignOut
+  PresignOut,
+  PresignBatchIn,
+  MultipartCreateOut,
+  MultipartPartsIn,
+  MultipartPartUrl,
+  MultipartPart,
+  MultipartCompleteIn,
+  MultipartCompleteOut,
+  MultipartAbortIn
 )
 
 from .youtube import (
   YouTubeTranscriptionIn,
+  YouTubeTranscriptionBatchIn,
   YouTubeTranscriptionOut
-)
\ No newline at end of file
+)
+from .search import (
+  SearchHitOut,
+  SearchResultOut
+)
@@ -7,6 +7,7 @@ class ChannelCrawlerIn(BaseModel):
     engine: str = "local"
     max_videos: int = 50  # Giới hạn số video để tránh quá tải
     video_type: str = "shorts"  # "shorts", "videos", "all"
+    incremental: bool = True  # Chỉ tạo job cho video chưa từng transcribe
 
 class ChannelJobOut(BaseModel):
     job_id: str
@@ -20,5 +21,6 @@ class ChannelCrawlerOut(BaseModel):
     channel_url: str
     total_videos_found: int
     total_jobs_created: int
+    total_videos_skipped: int = 0
     jobs: List[ChannelJobOut]
     error: Optional[str] = None
\ No newline at end of file
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import List
 
 class PresignIn(BaseModel):
     file_name: str
@@ -7,3 +8,36 @@ class PresignIn(BaseModel):
 class PresignOut(BaseModel):
     upload_url: str
     file_key: str
+
+class PresignBatchIn(BaseModel):
+    files: List[PresignIn]
+
+class MultipartCreateOut(BaseModel):
+    upload_id: str
+    file_key: str
+
+class MultipartPartsIn(BaseModel):
+    upload_id: str
+    file_key: str
+    part_numbers: List[int]
+
+class MultipartPartUrl(BaseModel):
+    part_number: int
+    upload_url: str
+
+class MultipartPart(BaseModel):
+    part_number: int
+    etag: str
+
+class MultipartCompleteIn(BaseModel):
+    upload_id: str
+    file_key: str
+    parts: List[MultipartPart]
+
+class MultipartAbortIn(BaseModel):
+    upload_id: str
+    file_key: str
+
+class MultipartCompleteOut(BaseModel):
+    file_key: str
+    file_url: str
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+class SearchHitOut(BaseModel):
+    id: int
+    start: float
+    end: float
+    text: str
+    rank: float
+
+class SearchResultOut(BaseModel):
+    job_id: str
+    title: Optional[str] = None
+    youtube_url: Optional[str] = None
+    language: Optional[str] = None
+    duration: Optional[int] = None
+    created_at: Optional[datetime] = None
+    score: float
+    hit_count: int
+    hits: List[SearchHitOut]
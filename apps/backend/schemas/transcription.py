@@ -17,6 +17,13 @@ class TranscriptionJobIn(BaseModel):
     title: Optional[str] = None
 
 
+class TranscriptionBatchIn(BaseModel):
+    """Schema for creating many transcription jobs at once"""
+    fileKeys: List[str]
+    engine: str = "local"
+    language: Optional[str] = None
+
+
 class TranscriptionJobOut(BaseModel):
     """Schema for returning transcription job details"""
     id: str
@@ -26,15 +33,48 @@ class TranscriptionJobOut(BaseModel):
     language: Optional[str] = None
     file_url: Optional[str] = None
     error: Optional[str] = None
+    progress: Optional[float] = None
     youtube_url: Optional[str] = None
     title: Optional[str] = None
     duration: Optional[int] = None
+    audio_codec: Optional[str] = None
     channel_crawler_id: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     
     # Backward compatibility fields (for old frontend code)
     result: Optional[dict] = None  # Will be populated from TranscriptionDetail if available
+    
+    # Worker instrumentation per job function (stage timings, CPU, peak RSS)
+    metrics: Optional[dict] = None
+
+
+class TranscriptionSummaryOut(BaseModel):
+    """Schema for one row of the transcription list (no segments unless requested)"""
+    id: str
+    status: str
+    title: Optional[str] = None
+    duration: Optional[int] = None
+    word_count: Optional[int] = None
+    progress: Optional[float] = None
+    error: Optional[str] = None
+    file_key: Optional[str] = None
+    file_url: Optional[str] = None
+    youtube_url: Optional[str] = None
+    language: Optional[str] = None
+    engine: Optional[str] = None
+    created_at: Optional[datetime] = None
+    
+    # Full result, only when the list is requested with include_result=true
+    result: Optional[dict] = None
+
+
+class TranscriptionSegmentOut(BaseModel):
+    """Schema for one transcription segment (times in seconds)"""
+    id: int
+    start: float
+    end: float
+    text: str
 
 
 # =============================================================================
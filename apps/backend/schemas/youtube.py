@@ -1,11 +1,16 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 
 class YouTubeTranscriptionIn(BaseModel):
     youtube_url: str
     engine: str = "local"
     language: Optional[str] = None
 
+class YouTubeTranscriptionBatchIn(BaseModel):
+    youtube_urls: List[str]
+    engine: str = "local"
+    language: Optional[str] = None
+
 class YouTubeTranscriptionOut(BaseModel):
     id: str
     status: str
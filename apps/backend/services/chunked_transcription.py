@@ -0,0 +1,195 @@
+import atexit
+import math
+import multiprocessing
+import os
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from apps.backend.services.model_registry import ModelSpec
+
+# Chunked mode cho audio dài: cắt theo khoảng lặng (VAD), decode song song trên nhiều process
+CHUNKED_TRANSCRIPTION = os.getenv("CHUNKED_TRANSCRIPTION", "true").lower() == "true"
+CHUNKED_MIN_DURATION = float(os.getenv("CHUNKED_MIN_DURATION", "1200"))  # 20 minutes
+CHUNK_SECONDS = float(os.getenv("CHUNK_SECONDS", "300"))
+CHUNK_OVERLAP = float(os.getenv("CHUNK_OVERLAP", "2.0"))
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", "0"))  # 0 = tự tính theo số core
+CHUNK_THREADS_PER_WORKER = int(os.getenv("CHUNK_THREADS_PER_WORKER", "4"))
+VAD_BLOCK_SECONDS = 600
+SAMPLE_RATE = 16000
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+
+class Window(NamedTuple):
+    index: int
+    start: float      # Đoạn được decode (bao gồm overlap)
+    end: float
+    own_start: float  # Đoạn mà window này "sở hữu" khi merge
+    own_end: float
+
+def load_audio_window(source: str, start: float, duration: float) -> np.ndarray:
+    """Decode một đoạn audio thành 16 kHz mono float32 bằng ffmpeg (seek theo -ss)"""
+    cmd = [
+        FFMPEG_BIN, "-nostdin", "-v", "error",
+        "-ss", f"{start:.3f}", "-t", f"{duration:.3f}",
+        "-i", source,
+        "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-",
+    ]
+    out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+def find_silences(source: str, duration: float, min_silence_ms: int = 500) -> List[Tuple[float, float]]:
+    """Chạy VAD theo từng block để lấy các khoảng lặng (start, end) tính bằng giây"""
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    vad_options = VadOptions(min_silence_duration_ms=min_silence_ms)
+    silences = []
+    for block_start in range(0, math.ceil(duration), VAD_BLOCK_SECONDS):
+        audio = load_audio_window(source, block_start, VAD_BLOCK_SECONDS)
+        prev_end = 0
+        for ts in get_speech_timestamps(audio, vad_options):
+            if ts["start"] > prev_end:
+                silences.append((block_start + prev_end / SAMPLE_RATE, block_start + ts["start"] / SAMPLE_RATE))
+            prev_end = ts["end"]
+        if prev_end < len(audio):
+            silences.append((block_start + prev_end / SAMPLE_RATE, block_start + len(audio) / SAMPLE_RATE))
+    return silences
+
+def plan_windows(silences: List[Tuple[float, float]], duration: float,
+                 target: float = CHUNK_SECONDS, overlap: float = CHUNK_OVERLAP) -> List[Window]:
+    """
+    Chọn điểm cắt ở khoảng lặng dài nhất trong [0.5, 1.5] * target tính từ điểm cắt trước,
+    không có khoảng lặng thì cắt cứng tại target
+    """
+    cuts = [0.0]
+    while duration - cuts[-1] > target * 1.5:
+        lo, hi = cuts[-1] + target * 0.5, cuts[-1] + target * 1.5
+        candidates = [(b - a, (a + b) / 2) for a, b in silences if lo < (a + b) / 2 < hi]
+        cuts.append(max(candidates)[1] if candidates else cuts[-1] + target)
+    cuts.append(duration)
+
+    windows = []
+    for i, (a, b) in enumerate(zip(cuts, cuts[1:])):
+        last = i == len(cuts) - 2
+        windows.append(Window(
+            index=i,
+            start=max(0.0, a - overlap),
+            end=min(duration, b + overlap),
+            own_start=a,
+            own_end=math.inf if last else b,
+        ))
+    return windows
+
+# --- Pool worker process ---------------------------------------------------------
+
+_worker_model = None
+
+def _init_worker(model_name: str, device: str, compute_type: str, cpu_threads: int):
+    global _worker_model
+    from faster_whisper import WhisperModel
+    _worker_model = WhisperModel(model_name, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+def owned_segments(window: Window, segments) -> List[Tuple[float, float, str, float]]:
+    """
+    Segment của model (thời gian tính từ window.start) -> (start, end, text, avg_logprob) tuyệt đối.
+    Segment nằm trong vùng overlap chỉ giữ ở window sở hữu điểm giữa của nó.
+    """
+    kept = []
+    for seg in segments:
+        start, end = window.start + seg.start, window.start + seg.end
+        if window.own_start <= (start + end) / 2 < window.own_end:
+            kept.append((start, end, seg.text, seg.avg_logprob))
+    return kept
+
+def _transcribe_window(source: str, window: Window, params: dict):
+    audio = load_audio_window(source, window.start, window.end - window.start)
+    segments, info = _worker_model.transcribe(audio, **params)
+    return owned_segments(window, segments), info.language
+
+# --- Public API ------------------------------------------------------------------
+
+def pool_size() -> Tuple[int, int]:
+    """
+    (số process, cpu_threads mỗi process) cho pool của một worker process.
+    Core chia đều cho các worker transcribe chạy song song trên cùng máy (QUEUE_CONCURRENCY).
+    """
+    from apps.backend.services.redis_queue import QUEUE_CONCURRENCY
+    cores = max(1, (os.cpu_count() or 1) // max(1, QUEUE_CONCURRENCY["transcribe"]))
+    workers = CHUNK_WORKERS or max(1, cores // CHUNK_THREADS_PER_WORKER)
+    return workers, max(1, cores // workers)
+
+# Pool của process hiện tại, tạo lazily và giữ qua các job (process con đã load model).
+# Chỉ giữ một pool: job dùng model khác thì pool cũ được shutdown trước khi tạo pool mới.
+_pool: Optional[Tuple[ModelSpec, ProcessPoolExecutor]] = None
+_pool_lock = threading.Lock()
+
+def get_pool(spec: ModelSpec) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool[0] == spec:
+            return _pool[1]
+        if _pool is not None:
+            print(f"♻️ Shutting down chunk pool of model {_pool[0].name}")
+            _pool[1].shutdown(wait=True)
+        workers, cpu_threads = pool_size()
+        print(f"🧩 Starting chunk pool: {workers} processes x {cpu_threads} threads ({spec.name})")
+        ctx = multiprocessing.get_context("spawn")
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                   initargs=(spec.name, spec.device, spec.compute_type, cpu_threads))
+        _pool = (spec, pool)
+        return pool
+
+@atexit.register
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool[1].shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    # Process con chết (OOM...) làm pool hỏng vĩnh viễn: job sau tạo pool mới
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool[1] is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def transcribe_chunked(source: str, duration: float, params: dict, spec: ModelSpec,
+                       on_segment: Callable[[float, float, str, float], None]) -> Optional[str]:
+    """
+    Transcribe audio dài theo từng window song song trên pool process của spec.
+    Segment (start, end, text, avg_logprob) được trả về qua on_segment theo đúng thứ tự thời gian; trả về language.
+    """
+    silences = find_silences(source, duration)
+    windows = plan_windows(silences, duration)
+    pool = get_pool(spec)
+    print(f"🧩 Chunked mode: {len(windows)} windows")
+
+    params = dict(params)
+    try:
+        language = params.get("language")
+        rest = windows
+        if not language:
+            # Window đầu chạy trước để cố định language cho các window còn lại
+            first, language = pool.submit(_transcribe_window, source, windows[0], params).result()
+            for segment in first:
+                on_segment(*segment)
+            params["language"] = language
+            rest = windows[1:]
+
+        futures = [pool.submit(_transcribe_window, source, w, params) for w in rest]
+        try:
+            for future in futures:
+                segments, _ = future.result()
+                for segment in segments:
+                    on_segment(*segment)
+        finally:
+            # Lỗi giữa chừng: không để window còn lại của job này chiếm pool của job sau
+            for future in futures:
+                future.cancel()
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    return language
@@ -0,0 +1,48 @@
+import uuid
+from collections import defaultdict
+from typing import List
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from apps.backend.models.enums import JobStatus
+from apps.backend.models.transcription_job import TranscriptionJob
+from apps.backend.services.result_cache import find_cached_jobs, cached_job_values, copy_cached_result
+
+def create_jobs_bulk(db: Session, rows: List[dict]) -> List[str]:
+    """
+    Tạo nhiều TranscriptionJob bằng một multi-row INSERT và một commit.
+    Row có video_id/content_hash trùng kết quả đã có (cùng params_fingerprint) được tạo
+    luôn ở trạng thái done và copy kết quả. Trả về id các job còn cần enqueue.
+    """
+    if not rows:
+        return []
+
+    by_fingerprint = defaultdict(list)
+    for row in rows:
+        row.setdefault("status", JobStatus.queued)
+        by_fingerprint[row.get("params_fingerprint")].append(row)
+
+    cached_links = []
+    for fingerprint, group in by_fingerprint.items():
+        cached = find_cached_jobs(
+            db, fingerprint,
+            video_ids=[r.get("video_id") for r in group],
+            content_hashes=[r.get("content_hash") for r in group],
+        )
+        for row in group:
+            source = cached.get(row.get("video_id")) or cached.get(row.get("content_hash"))
+            if source:
+                row.update(cached_job_values(source, bool(row.get("youtube_url"))))
+                row["title"] = row.get("title") or source.title
+                cached_links.append((source.id, row["id"]))
+
+    # Cùng tập cột cho mọi row để SQLAlchemy gộp thành một INSERT nhiều VALUES
+    columns = set().union(*rows)
+    db.execute(insert(TranscriptionJob.__table__), [{c: row.get(c) for c in columns} for row in rows])
+    for source_id, job_id in cached_links:
+        copy_cached_result(db, source_id, job_id, str(uuid.uuid4()))
+    db.commit()
+
+    if cached_links:
+        print(f"♻️ Reused {len(cached_links)} cached transcriptions")
+    linked = {job_id for _, job_id in cached_links}
+    return [row["id"] for row in rows if row["id"] not in linked]
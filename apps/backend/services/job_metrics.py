@@ -0,0 +1,164 @@
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from apps.backend.services.metrics import observe_job
+from apps.backend.services.tracing import span, set_attributes, set_error
+
+# Chu kỳ lấy mẫu RSS của process worker trong lúc job chạy (giây)
+RSS_SAMPLE_INTERVAL = float(os.getenv("RSS_SAMPLE_INTERVAL", "0.5"))
+
+class StageTimer:
+    """
+    Wall time theo stage của một job (download, probe, model_load, inference, persist...).
+    Stage lồng nhau được tính exclusive: vd persist (flush segment) chạy bên trong vòng inference
+    thì bị trừ khỏi inference. Chỉ dùng trong một thread.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.started = time.perf_counter()
+        self._stack: List[list] = []  # [name, start, thời gian của stage con]
+
+    @contextmanager
+    def stage(self, name: str):
+        frame = [name, time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            with span(name):
+                yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[1]
+            self.add(name, elapsed - frame[2])
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def summary(self) -> Dict[str, float]:
+        result = {name: round(seconds, 3) for name, seconds in self.stages.items()}
+        result["total"] = round(self.elapsed(), 3)
+        return result
+
+@contextmanager
+def optional_stage(timer: Optional[StageTimer], name: str):
+    """timer.stage(name) khi có timer, không làm gì khi không có"""
+    if timer is None:
+        yield
+    else:
+        with timer.stage(name):
+            yield
+
+def _current_rss() -> Optional[int]:
+    """RSS hiện tại của process (bytes), None khi không có /proc (macOS)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _max_rss() -> int:
+    """Peak RSS từ lúc process khởi động (bytes): ru_maxrss là KB trên Linux, bytes trên macOS"""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+def _cpu_seconds() -> float:
+    """CPU user + system của process và các process con đã kết thúc (ffmpeg, pool của chunked mode)"""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime + children.ru_utime + children.ru_stime
+
+def queue_wait_seconds() -> Optional[float]:
+    """Thời gian job RQ hiện tại nằm trong queue trước khi worker nhận, None khi không chạy qua RQ"""
+    from rq import get_current_job
+    rq_job = get_current_job()
+    if not rq_job or not rq_job.enqueued_at:
+        return None
+    # RQ lưu enqueued_at/started_at là UTC naive
+    started = rq_job.started_at or datetime.utcnow()
+    return max(0.0, (started - rq_job.enqueued_at).total_seconds())
+
+class JobMetrics:
+    """
+    Instrumentation của một lần chạy job function: wall time theo stage, queue wait, CPU seconds,
+    peak RSS và các giá trị riêng của job (audio_seconds, model, segments...).
+    Peak RSS được lấy mẫu trong background thread vì worker pool/simple chạy nhiều job
+    trong cùng process (ru_maxrss là peak của cả đời process).
+    """
+
+    def __init__(self):
+        self.timer = StageTimer()
+        self.values: Dict[str, object] = {}
+        self.queue_wait = queue_wait_seconds()
+        self._cpu_started = _cpu_seconds()
+        self._peak_rss = _current_rss()
+        self._stop = threading.Event()
+        self._sampler = None
+        if self._peak_rss is not None:
+            self._sampler = threading.Thread(target=self._sample_rss, name="rss-sampler", daemon=True)
+            self._sampler.start()
+
+    def stage(self, name: str):
+        return self.timer.stage(name)
+
+    def set(self, **values):
+        self.values.update(values)
+        # Cũng gắn vào span hiện tại (span của job khi gọi ngoài stage)
+        set_attributes(**values)
+        if values.get("error"):
+            set_error(values["error"])
+
+    def _sample_rss(self):
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL):
+            self._peak_rss = max(self._peak_rss, _current_rss() or 0)
+
+    def finish(self) -> dict:
+        """Dừng lấy mẫu và trả về metrics dạng dict (JSON được)"""
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+            peak_rss = max(self._peak_rss, _current_rss() or 0)
+        else:
+            peak_rss = _max_rss()
+        stages = self.timer.summary()
+        wall = stages.pop("total")
+        result = {
+            "queue_wait": round(self.queue_wait, 3) if self.queue_wait is not None else None,
+            "wall": wall,
+            "stages": stages,
+            "cpu_seconds": round(_cpu_seconds() - self._cpu_started, 2),
+            "peak_rss_mb": round(peak_rss / (1024 * 1024), 1),
+            **self.values,
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+        }
+        audio_seconds = self.values.get("audio_seconds")
+        if audio_seconds and "inference" in stages:
+            result["rtf"] = round(stages["inference"] / audio_seconds, 4)
+        return result
+
+def save_job_metrics(db, job, function: str, metrics: dict):
+    """
+    Ghi metrics vào job.metrics_json dưới key là tên job function (lần chạy sau ghi đè lần trước) và commit.
+    In thêm một dòng JSON để log collector đọc được và đưa vào Prometheus histogram (services/metrics).
+    Lỗi ghi metrics không làm hỏng job.
+    """
+    print(json.dumps({"event": "job_metrics", "job_id": job.id, "function": function, **metrics}))
+    observe_job(function, metrics)
+    try:
+        data = json.loads(job.metrics_json) if job.metrics_json else {}
+        data[function] = metrics
+        job.metrics_json = json.dumps(data)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Could not save job metrics: {e}")
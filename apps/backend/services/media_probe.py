@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+from typing import NamedTuple, Optional
+
+FFPROBE_BIN = os.getenv("FFPROBE_BIN", "ffprobe")
+FFPROBE_TIMEOUT = int(os.getenv("FFPROBE_TIMEOUT", "30"))
+
+class MediaInfo(NamedTuple):
+    duration: Optional[float]     # seconds
+    sample_rate: Optional[int]
+    codec: Optional[str]          # mp3, aac, opus, ...
+    channels: Optional[int]
+
+def probe_audio(path: str) -> MediaInfo:
+    """
+    Đọc duration, sample rate và codec từ metadata của container bằng ffprobe,
+    không decode audio
+    """
+    cmd = [
+        FFPROBE_BIN, "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "format=duration:stream=codec_name,sample_rate,channels,duration",
+        "-of", "json",
+        path,
+    ]
+    out = subprocess.run(cmd, capture_output=True, text=True, timeout=FFPROBE_TIMEOUT, check=True).stdout
+    data = json.loads(out or "{}")
+    stream = (data.get("streams") or [{}])[0]
+    fmt = data.get("format") or {}
+
+    # Container duration trước, fallback về duration của stream
+    duration = _to_float(fmt.get("duration")) or _to_float(stream.get("duration"))
+    sample_rate = _to_float(stream.get("sample_rate"))
+    channels = stream.get("channels")
+    return MediaInfo(
+        duration=duration,
+        sample_rate=int(sample_rate) if sample_rate else None,
+        codec=stream.get("codec_name"),
+        channels=int(channels) if channels else None,
+    )
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "N/A") else None
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,190 @@
+import glob
+import os
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Optional, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess, start_http_server
+)
+from prometheus_client.core import GaugeMetricFamily
+from apps.backend.services.tracing import span
+
+# Process nhiều worker (uvicorn --workers, RQ fork/pool) cần multiprocess mode của prometheus_client:
+# set PROMETHEUS_MULTIPROC_DIR (thư mục trống, mỗi service một thư mục) trước khi process khởi động
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+# Port HTTP của exporter trong worker.py (0 = tắt)
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9100"))
+
+# Job audio dài chạy hàng chục phút: bucket đến 2 giờ (JOB_TIMEOUT)
+JOB_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200)
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0)
+THROUGHPUT_BUCKETS = tuple(2 ** n * 1024 for n in range(6, 18, 2))  # 64 KB/s - 128 MB/s
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "API request latency", ["method", "route", "status"]
+)
+JOB_DURATION = Histogram(
+    "worker_job_duration_seconds", "Wall time of a worker job function", ["function", "status"], buckets=JOB_BUCKETS
+)
+JOB_STAGE_DURATION = Histogram(
+    "worker_job_stage_duration_seconds", "Wall time of one stage of a worker job", ["function", "stage"], buckets=JOB_BUCKETS
+)
+TRANSCRIPTION_DURATION = Histogram(
+    "transcription_duration_seconds", "Wall time of a transcription", ["model", "language"], buckets=JOB_BUCKETS
+)
+TRANSCRIPTION_RTF = Histogram(
+    "transcription_rtf", "Inference seconds per audio second", ["model", "language"], buckets=RTF_BUCKETS
+)
+DOWNLOAD_BYTES = Counter("download_bytes_total", "Bytes of source audio downloaded", ["source"])
+DOWNLOAD_THROUGHPUT = Histogram(
+    "download_throughput_bytes_per_second", "Throughput of one source audio download", ["source"], buckets=THROUGHPUT_BUCKETS
+)
+S3_TRANSFER_DURATION = Histogram("s3_transfer_duration_seconds", "S3/MinIO transfer time", ["operation"])
+S3_TRANSFER_BYTES = Counter("s3_transfer_bytes_total", "Bytes transferred to/from S3/MinIO", ["operation"])
+S3_TRANSFER_ERRORS = Counter("s3_transfer_errors_total", "Failed S3/MinIO transfers", ["operation"])
+OPENAI_REQUEST_DURATION = Histogram(
+    "openai_request_duration_seconds", "OpenAI API call latency", ["operation"], buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+)
+OPENAI_ERRORS = Counter("openai_errors_total", "Failed OpenAI API calls", ["operation", "kind"])
+
+# Tên class exception của openai -> kind (không import openai ở đây)
+OPENAI_ERROR_KINDS = {
+    "RateLimitError": "rate_limit",
+    "Timeout": "timeout",
+    "APITimeoutError": "timeout",
+    "APIConnectionError": "connection",
+    "ServiceUnavailableError": "unavailable",
+}
+
+def observe_job(function: str, metrics: dict):
+    """Đưa metrics của một lần chạy job function (services/job_metrics) vào các histogram"""
+    JOB_DURATION.labels(function, "error" if metrics.get("error") else "ok").observe(metrics["wall"])
+    for stage, seconds in metrics.get("stages", {}).items():
+        JOB_STAGE_DURATION.labels(function, stage).observe(seconds)
+    if metrics.get("model") and metrics.get("audio_seconds") and not metrics.get("error"):
+        labels = (metrics["model"], metrics.get("language") or "unknown")
+        TRANSCRIPTION_DURATION.labels(*labels).observe(metrics["wall"])
+        if metrics.get("rtf") is not None:
+            TRANSCRIPTION_RTF.labels(*labels).observe(metrics["rtf"])
+
+def observe_download(source: str, nbytes: int, seconds: float):
+    DOWNLOAD_BYTES.labels(source).inc(nbytes)
+    if seconds > 0:
+        DOWNLOAD_THROUGHPUT.labels(source).observe(nbytes / seconds)
+
+@contextmanager
+def track_s3_transfer(operation: str, nbytes: Optional[int] = None):
+    """Đo một transfer; số byte chưa biết trước (download) thì gán transfer.nbytes bên trong block"""
+    transfer = SimpleNamespace(nbytes=nbytes)
+    started = time.perf_counter()
+    try:
+        with span(f"s3 {operation}", kind="client", **{"s3.bytes": nbytes}):
+            yield transfer
+    except Exception:
+        S3_TRANSFER_ERRORS.labels(operation).inc()
+        raise
+    S3_TRANSFER_DURATION.labels(operation).observe(time.perf_counter() - started)
+    if transfer.nbytes:
+        S3_TRANSFER_BYTES.labels(operation).inc(transfer.nbytes)
+
+@contextmanager
+def track_openai(operation: str):
+    started = time.perf_counter()
+    try:
+        with span(f"openai {operation}", kind="client"):
+            yield
+    except Exception as e:
+        OPENAI_ERRORS.labels(operation, OPENAI_ERROR_KINDS.get(type(e).__name__, "api_error")).inc()
+        raise
+    finally:
+        OPENAI_REQUEST_DURATION.labels(operation).observe(time.perf_counter() - started)
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware đo latency theo route template (vd /api/v1/transcriptions/{job_id}),
+    không theo path thật để số series không tăng theo số job
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status[0])
+            ).observe(time.perf_counter() - started)
+
+class QueueDepthCollector:
+    """Số job đang chờ / đang chạy / failed của từng RQ queue, đọc từ Redis lúc scrape"""
+
+    def collect(self):
+        from apps.backend.services.redis_queue import redis_conn, queues
+        waiting = GaugeMetricFamily("rq_queue_depth", "Jobs waiting in the RQ queue", labels=["queue"])
+        started = GaugeMetricFamily("rq_queue_started_jobs", "Jobs being executed from the RQ queue", labels=["queue"])
+        failed = GaugeMetricFamily("rq_queue_failed_jobs", "Jobs in the failed registry of the RQ queue", labels=["queue"])
+        try:
+            # Một round trip cho mọi queue
+            with redis_conn.pipeline(transaction=False) as pipe:
+                for queue in queues.values():
+                    pipe.llen(queue.key)
+                    pipe.zcard(queue.started_job_registry.key)
+                    pipe.zcard(queue.failed_job_registry.key)
+                counts = pipe.execute()
+        except Exception as e:
+            print(f"⚠️ Could not read queue depth: {e}")
+            return
+        for i, name in enumerate(queues):
+            waiting.add_metric([name], counts[3 * i])
+            started.add_metric([name], counts[3 * i + 1])
+            failed.add_metric([name], counts[3 * i + 2])
+        yield waiting
+        yield started
+        yield failed
+
+# Queue depth là giá trị global (Redis), không đi qua file của multiprocess mode
+QUEUE_REGISTRY = CollectorRegistry(auto_describe=False)
+QUEUE_REGISTRY.register(QueueDepthCollector())
+
+def metrics_registry() -> CollectorRegistry:
+    """Registry của process hiện tại, hoặc gộp file của mọi process khi có PROMETHEUS_MULTIPROC_DIR"""
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Body + content type cho GET /metrics của API"""
+    return generate_latest(metrics_registry()) + generate_latest(QUEUE_REGISTRY), CONTENT_TYPE_LATEST
+
+def start_worker_exporter(port: int = WORKER_METRICS_PORT, multiprocess_mode: bool = True):
+    """
+    HTTP exporter của worker.py, gọi ở process cha trước khi start worker.
+    multiprocess_mode: job chạy ở process con (fork, pool) nên cần PROMETHEUS_MULTIPROC_DIR.
+    """
+    if not port:
+        return
+    if PROMETHEUS_MULTIPROC_DIR:
+        os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+        # File của lần chạy trước (pid cũ) làm sai counter
+        for path in glob.glob(os.path.join(PROMETHEUS_MULTIPROC_DIR, "*.db")):
+            os.remove(path)
+    elif multiprocess_mode:
+        print("⚠️ PROMETHEUS_MULTIPROC_DIR is not set: metrics recorded in job processes are not exported")
+    start_http_server(port, registry=metrics_registry())
+    print(f"📈 Metrics exporter on :{port}/metrics")
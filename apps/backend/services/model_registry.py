@@ -0,0 +1,139 @@
+import gc
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+
+# Model mặc định, có thể override theo language: WHISPER_LANGUAGE_MODELS="vi=medium,en=small"
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "small")
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))  # 0 = CTranslate2 tự chọn
+WHISPER_LANGUAGE_MODELS = os.getenv("WHISPER_LANGUAGE_MODELS", "")
+MODEL_MEMORY_BUDGET_MB = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "4096"))
+# Override decoding params (JSON), áp dụng sau cùng: vd '{"beam_size": 1, "vad_filter": true}'
+WHISPER_PARAM_OVERRIDES = json.loads(os.getenv("WHISPER_PARAM_OVERRIDES") or "{}")
+# Audio dài hơn ngưỡng này (giây) được decode với VAD filter
+LONG_AUDIO_VAD_DURATION = int(os.getenv("LONG_AUDIO_VAD_DURATION", "1200"))
+# Prompt từ vựng/văn phong, áp dụng cho mọi độ dài audio (chunked mode: cho từng window)
+WHISPER_INITIAL_PROMPT = os.getenv("WHISPER_INITIAL_PROMPT", "")
+
+# Ước lượng RAM (MB) của model int8 trên CPU, dùng cho LRU budget
+MODEL_MEMORY_MB = {
+    "tiny": 150,
+    "base": 250,
+    "small": 600,
+    "medium": 1600,
+    "large-v1": 3200,
+    "large-v2": 3200,
+    "large-v3": 3200,
+    "turbo": 1800,
+    "distil-large-v3": 1600,
+}
+COMPUTE_TYPE_FACTOR = {
+    "int8": 1.0,
+    "int8_float16": 1.0,
+    "int8_float32": 1.0,
+    "int16": 1.5,
+    "float16": 2.0,
+    "float32": 3.5,
+}
+# Các size có bản English-only (*.en) - nhỏ và chính xác hơn cho tiếng Anh
+ENGLISH_ONLY_SIZES = {"tiny", "base", "small", "medium"}
+
+class ModelSpec(NamedTuple):
+    name: str           # faster-whisper model name, vd "small.en", "medium"
+    device: str
+    compute_type: str
+
+def _parse_language_models(value: str) -> Dict[str, str]:
+    pairs = (item.split("=", 1) for item in value.split(",") if "=" in item)
+    return {lang.strip(): size.strip() for lang, size in pairs}
+
+LANGUAGE_MODELS = _parse_language_models(WHISPER_LANGUAGE_MODELS)
+
+def resolve_model(language: Optional[str], engine: Optional[str] = None) -> ModelSpec:
+    """
+    Chọn model theo job.engine và job.language.
+    engine: "local" (model mặc định) hoặc "local:<size>" / "<size>", vd "local:medium"
+    """
+    size = WHISPER_MODEL_SIZE
+    engine_size = (engine or "").split(":", 1)[-1]
+    if engine_size in MODEL_MEMORY_MB:
+        size = engine_size
+    elif language in LANGUAGE_MODELS:
+        size = LANGUAGE_MODELS[language]
+
+    name = f"{size}.en" if language == "en" and size in ENGLISH_ONLY_SIZES else size
+    return ModelSpec(name=name, device=WHISPER_DEVICE, compute_type=WHISPER_COMPUTE_TYPE)
+
+def transcription_params(language: Optional[str], duration: float = 0) -> dict:
+    """Decoding parameters cho model.transcribe, tối ưu riêng theo language và độ dài audio"""
+    params = {
+        'beam_size': 5,
+        'language': language,  # None means auto-detect
+        'task': 'transcribe',  # Always transcribe, not translate
+        'temperature': 0.0,  # More deterministic output
+        'compression_ratio_threshold': 2.4,
+        'log_prob_threshold': -1.0,
+        'no_speech_threshold': 0.6,
+        'word_timestamps': False,  # Disable for speed
+        'condition_on_previous_text': True,
+    }
+
+    # Language-specific optimizations
+    if language == 'vi':
+        params.update({
+            'temperature': [0.0, 0.2, 0.4],
+            'beam_size': 3,
+            'log_prob_threshold': -1.5,
+            'no_speech_threshold': 0.4,
+        })
+
+    if duration > LONG_AUDIO_VAD_DURATION:
+        params.update({
+            'vad_filter': True,
+            'vad_parameters': dict(min_silence_duration_ms=500),
+        })
+
+    # Chỉ thêm key khi có cấu hình để fingerprint của result cache không đổi
+    if WHISPER_INITIAL_PROMPT:
+        params['initial_prompt'] = WHISPER_INITIAL_PROMPT
+
+    params.update(WHISPER_PARAM_OVERRIDES)
+    return params
+
+def estimate_memory_mb(spec: ModelSpec) -> float:
+    size = spec.name.split(".", 1)[0]
+    return MODEL_MEMORY_MB.get(size, 1000) * COMPUTE_TYPE_FACTOR.get(spec.compute_type, 1.0)
+
+# LRU các model đã load trong process hiện tại
+_models: "OrderedDict[ModelSpec, object]" = OrderedDict()
+_lock = threading.Lock()
+
+def get_model(spec: ModelSpec):
+    """Load model lần đầu khi cần, giữ lại theo LRU trong giới hạn MODEL_MEMORY_BUDGET_MB"""
+    with _lock:
+        model = _models.get(spec)
+        if model is not None:
+            _models.move_to_end(spec)
+            return model
+
+        _evict_for(estimate_memory_mb(spec))
+        from faster_whisper import WhisperModel
+        print(f"📦 Loading Whisper model: {spec.name} ({spec.device}, {spec.compute_type})")
+        model = WhisperModel(spec.name, device=spec.device, compute_type=spec.compute_type, cpu_threads=WHISPER_CPU_THREADS)
+        _models[spec] = model
+        return model
+
+def _evict_for(needed_mb: float):
+    used = sum(estimate_memory_mb(s) for s in _models)
+    while _models and used + needed_mb > MODEL_MEMORY_BUDGET_MB:
+        spec, _ = _models.popitem(last=False)
+        used -= estimate_memory_mb(spec)
+        print(f"♻️ Evicting Whisper model: {spec.name}")
+    gc.collect()
+
+def loaded_models():
+    return list(_models.keys())
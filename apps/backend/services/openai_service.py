@@ -1,17 +1,23 @@
 import os
 import openai
 from typing import Optional
+from apps.backend.services.metrics import track_openai
 
 # Configure OpenAI
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
+def _call(operation: str, create, **kwargs):
+    """Gọi OpenAI API, ghi latency và lỗi (rate limit, timeout...) vào metrics theo operation"""
+    with track_openai(operation):
+        return create(**kwargs)
+
 def format_as_dialogue(text: str) -> str:
     """
     Format transcription text as dialogue between two speakers
     Returns formatted text in format: Speaker1: text; Speaker2: text
     """
     try:
-        response = openai.ChatCompletion.create(
+        response = _call("format_dialogue", openai.ChatCompletion.create,
             model="gpt-4",
             messages=[
                 {
@@ -51,7 +57,7 @@ def generate_image_prompt(dialogue_text: str) -> str:
     Generate a detailed image prompt from dialogue text
     """
     try:
-        response = openai.ChatCompletion.create(
+        response = _call("image_prompt", openai.ChatCompletion.create,
             model="gpt-4",
             messages=[
                 {
@@ -92,7 +98,7 @@ def generate_image_with_dalle(prompt: str) -> str:
     Returns URL of generated image
     """
     try:
-        response = openai.Image.create(
+        response = _call("image", openai.Image.create,
             model="dall-e-3",
             prompt=prompt,
             size="1024x1024",
@@ -1,6 +1,8 @@
 import os
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
 from rq import Queue
+from apps.backend.services.tracing import trace_meta
 
 REDIS_HOST=os.getenv("REDIS_HOST","localhost")
 REDIS_PORT=int(os.getenv("REDIS_PORT","6379"))
@@ -9,4 +11,80 @@ REDIS_PORT=int(os.getenv("REDIS_PORT","6379"))
 JOB_TIMEOUT = int(os.getenv("JOB_TIMEOUT", "7200"))  # 2 hours
 
 redis_conn = Redis(host=REDIS_HOST, port=REDIS_PORT)
-q = Queue("transcribe", connection=redis_conn, default_timeout=JOB_TIMEOUT)
\ No newline at end of file
+# Connection async cho API (response cache trong handler async def, không block event loop)
+async_redis_conn = AsyncRedis(host=REDIS_HOST, port=REDIS_PORT)
+
+# Mỗi stage một queue riêng: download (network-bound: yt-dlp, crawl),
+# transcribe (CPU-bound: Whisper), llm (OpenAI)
+STAGES = ["download", "transcribe", "llm"]
+
+QUEUE_TIMEOUTS = {
+    "download": int(os.getenv("DOWNLOAD_JOB_TIMEOUT", "3600")),
+    "transcribe": JOB_TIMEOUT,
+    "llm": int(os.getenv("LLM_JOB_TIMEOUT", "600")),
+}
+
+# Số process worker mặc định cho mỗi stage (worker.py --workers override)
+QUEUE_CONCURRENCY = {
+    "download": int(os.getenv("DOWNLOAD_WORKERS", "4")),
+    "transcribe": int(os.getenv("TRANSCRIBE_WORKERS", "1")),
+    "llm": int(os.getenv("LLM_WORKERS", "2")),
+}
+
+# YouTube pipeline: queued = download worker upload lên MinIO rồi enqueue transcribe_job
+# (tải lại từ MinIO); fused = cùng một worker download rồi transcribe luôn file local,
+# upload MinIO chạy song song chỉ để lưu trữ - prepare job đi thẳng vào queue transcribe
+YOUTUBE_PIPELINE_MODE = os.getenv("YOUTUBE_PIPELINE_MODE", "queued")
+YOUTUBE_PREPARE_STAGE = "transcribe" if YOUTUBE_PIPELINE_MODE == "fused" else "download"
+
+# Lane ưu tiên cho job người dùng submit trực tiếp qua API, worker luôn lấy lane này trước
+PRIORITY_SUFFIX = "_high"
+
+queues = {}
+for stage in STAGES:
+    queues[stage] = Queue(stage, connection=redis_conn, default_timeout=QUEUE_TIMEOUTS[stage])
+    queues[stage + PRIORITY_SUFFIX] = Queue(stage + PRIORITY_SUFFIX, connection=redis_conn, default_timeout=QUEUE_TIMEOUTS[stage])
+
+# Backward compatibility: queue cũ "transcribe"
+q = queues["transcribe"]
+
+def get_queue(stage: str, priority: bool = False) -> Queue:
+    return queues[stage + PRIORITY_SUFFIX if priority else stage]
+
+def enqueue_stage(stage: str, func: str, *args, priority: bool = False, **kwargs):
+    """Enqueue job vào queue của stage, timeout mặc định theo stage, trace context trong job.meta"""
+    kwargs.setdefault("job_timeout", QUEUE_TIMEOUTS[stage])
+    kwargs["meta"] = trace_meta(kwargs.get("meta"))
+    return get_queue(stage, priority).enqueue(func, *args, **kwargs)
+
+def listen_queue_names(stages) -> list:
+    """Thứ tự queue cho worker: các lane ưu tiên trước, sau đó lane thường"""
+    return [s + PRIORITY_SUFFIX for s in stages] + list(stages)
+
+def default_worker_count(stages) -> int:
+    # Stage CPU-bound quyết định số process khi worker nghe nhiều stage
+    if "transcribe" in stages:
+        return QUEUE_CONCURRENCY["transcribe"]
+    return max(QUEUE_CONCURRENCY[s] for s in stages)
+
+def enqueue_stage_many(stage: str, func: str, args_list, priority: bool = False, **kwargs):
+    """Enqueue nhiều job cùng lúc trong một Redis pipeline (một round trip)"""
+    if not args_list:
+        return []
+    kwargs.setdefault("timeout", QUEUE_TIMEOUTS[stage])
+    kwargs["meta"] = trace_meta(kwargs.get("meta"))
+    queue = get_queue(stage, priority)
+    return queue.enqueue_many([Queue.prepare_data(func, args=list(args), **kwargs) for args in args_list])
+
+async def enqueue_stage_async(stage: str, func: str, *args, priority: bool = False, **kwargs):
+    """Bản async của enqueue_stage: RQ chỉ có client sync nên chạy trong threadpool, không block event loop"""
+    from fastapi.concurrency import run_in_threadpool
+    # Lấy trace context của request ngay trong event loop
+    kwargs["meta"] = trace_meta(kwargs.get("meta"))
+    return await run_in_threadpool(enqueue_stage, stage, func, *args, priority=priority, **kwargs)
+
+async def enqueue_stage_many_async(stage: str, func: str, args_list, priority: bool = False, **kwargs):
+    """Bản async của enqueue_stage_many"""
+    from fastapi.concurrency import run_in_threadpool
+    kwargs["meta"] = trace_meta(kwargs.get("meta"))
+    return await run_in_threadpool(enqueue_stage_many, stage, func, args_list, priority=priority, **kwargs)
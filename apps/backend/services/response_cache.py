@@ -0,0 +1,127 @@
+import os
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import func
+from apps.backend.models.enums import JobStatus
+from apps.backend.services.redis_queue import redis_conn, async_redis_conn
+
+# Cache response GET /transcriptions/{id}, /detail, /full của job đã xong: LRU trong process + Redis dùng chung
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_MEMORY_MB = int(os.getenv("RESPONSE_CACHE_MEMORY_MB", "64"))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+# Browser/proxy được dùng lại response của job đã xong trong bấy nhiêu giây, sau đó revalidate bằng ETag
+RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "30"))
+
+CACHED_ROUTES = ("job", "detail", "full")
+# Job ở trạng thái này chỉ thay đổi khi có ghi tường minh (update detail, thêm image, LLM job)
+FINISHED_STATUSES = (JobStatus.done, JobStatus.error)
+
+# (route, job_id) -> (version, body)
+_entries: "OrderedDict[Tuple[str, str], Tuple[str, bytes]]" = OrderedDict()
+_used_bytes = 0
+
+def job_version(status: JobStatus, updated_at: Optional[datetime],
+                progress: Optional[float] = None, segments: Optional[int] = None) -> str:
+    """
+    Version của response: mọi lần ghi job (ORM onupdate hoặc touch_job) đều đổi updated_at.
+    Job đang chạy: SegmentWriter.flush insert segment mà không nhất thiết UPDATE job
+    (progress giữ nguyên hoặc đã chạm 0.99), nên version gồm cả progress + số segment đã flush.
+    """
+    version = f"{status.value}:{updated_at.isoformat() if updated_at else 0}"
+    if status not in FINISHED_STATUSES:
+        version += f":{progress or 0}:{segments or 0}"
+    return version
+
+def response_etag(route: str, job_id: str, version: str) -> str:
+    return '"' + hashlib.sha1(f"{route}:{job_id}:{version}".encode()).hexdigest()[:20] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    # So sánh weak: bỏ prefix W/ mà proxy có thể thêm vào
+    return "*" in tags or etag in (t[2:] if t.startswith("W/") else t for t in tags)
+
+def cache_control(status: JobStatus) -> str:
+    if status in FINISHED_STATUSES:
+        return f"private, max-age={RESPONSE_CACHE_MAX_AGE}"
+    # Job đang chạy: progress đổi liên tục, luôn revalidate
+    return "no-cache"
+
+def _redis_key(route: str, job_id: str) -> str:
+    return f"resp:{route}:{job_id}"
+
+def _local_put(key: Tuple[str, str], version: str, body: bytes):
+    global _used_bytes
+    _local_drop(key)
+    limit = RESPONSE_CACHE_MEMORY_MB * 1024 * 1024
+    if len(body) > limit:
+        return
+    while _entries and _used_bytes + len(body) > limit:
+        _, (_, evicted) = _entries.popitem(last=False)
+        _used_bytes -= len(evicted)
+    _entries[key] = (version, body)
+    _used_bytes += len(body)
+
+def _local_drop(key: Tuple[str, str]):
+    global _used_bytes
+    entry = _entries.pop(key, None)
+    if entry:
+        _used_bytes -= len(entry[1])
+
+async def get_response(route: str, job_id: str, version: str) -> Optional[bytes]:
+    """Body đã serialize của (route, job) nếu còn đúng version"""
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    key = (route, job_id)
+    entry = _entries.get(key)
+    if entry and entry[0] == version:
+        _entries.move_to_end(key)
+        return entry[1]
+    try:
+        raw = await async_redis_conn.get(_redis_key(route, job_id))
+    except Exception as e:
+        print(f"⚠️ Response cache read failed: {e}")
+        return None
+    if raw:
+        cached_version, _, body = raw.partition(b"\n")
+        if cached_version.decode() == version:
+            _local_put(key, version, body)
+            return body
+    return None
+
+async def put_response(route: str, job_id: str, version: str, body: bytes):
+    if not RESPONSE_CACHE_ENABLED:
+        return
+    _local_put((route, job_id), version, body)
+    try:
+        await async_redis_conn.set(_redis_key(route, job_id), version.encode() + b"\n" + body, ex=RESPONSE_CACHE_TTL)
+    except Exception as e:
+        print(f"⚠️ Response cache write failed: {e}")
+
+def touch_job(job):
+    """
+    Đổi version response của job khi ghi vào detail/images (không đi qua UPDATE transcription_jobs).
+    Caller tự commit.
+    """
+    job.updated_at = func.now()
+    for route in CACHED_ROUTES:
+        _local_drop((route, job.id))
+
+def invalidate_job(job):
+    """touch_job + xoá entry Redis (worker)"""
+    touch_job(job)
+    try:
+        redis_conn.delete(*[_redis_key(route, job.id) for route in CACHED_ROUTES])
+    except Exception as e:
+        print(f"⚠️ Response cache invalidation failed: {e}")
+
+async def invalidate_job_async(job):
+    """touch_job + xoá entry Redis (API)"""
+    touch_job(job)
+    try:
+        await async_redis_conn.delete(*[_redis_key(route, job.id) for route in CACHED_ROUTES])
+    except Exception as e:
+        print(f"⚠️ Response cache invalidation failed: {e}")
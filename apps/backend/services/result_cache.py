@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import re
+from typing import Optional
+from sqlalchemy import delete, insert, literal, or_, select
+from sqlalchemy.orm import Session
+from apps.backend.models.enums import JobStatus
+from apps.backend.models.transcription_job import TranscriptionJob
+from apps.backend.models.transcription_detail import TranscriptionDetail
+from apps.backend.models.transcription_segment import TranscriptionSegment
+from apps.backend.services.model_registry import resolve_model, transcription_params
+from apps.backend.services.segment_store import reset_segments
+
+# Dùng lại kết quả của job đã xong khi cùng audio (hoặc cùng YouTube video) và cùng model/params
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+
+YOUTUBE_ID_RE = re.compile(r"(?:v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})")
+
+def normalize_language(language: Optional[str]) -> Optional[str]:
+    return language if language and language != "auto" else None
+
+def params_fingerprint(language: Optional[str], engine: Optional[str]) -> str:
+    """Hash của model spec + decoding params mà worker sẽ dùng cho job này"""
+    language = normalize_language(language)
+    payload = {
+        "model": resolve_model(language, engine)._asdict(),
+        "params": transcription_params(language),
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+def youtube_video_id(url: Optional[str]) -> Optional[str]:
+    match = YOUTUBE_ID_RE.search(url or "")
+    return match.group(1) if match else None
+
+def file_md5(path: str, chunk_size: int = 1024 * 1024) -> str:
+    # MD5 để khớp với ETag của object upload một lần (non-multipart) trên S3/MinIO
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def etag_content_hash(etag: Optional[str]) -> Optional[str]:
+    """ETag của object non-multipart chính là MD5 nội dung; ETag multipart ("...-N") thì không"""
+    etag = (etag or "").strip('"')
+    return etag if etag and "-" not in etag else None
+
+def find_cached_job(db: Session, fingerprint: str, video_id: Optional[str] = None,
+                    content_hash: Optional[str] = None, exclude_id: Optional[str] = None) -> Optional[TranscriptionJob]:
+    if not RESULT_CACHE_ENABLED or not (video_id or content_hash):
+        return None
+    query = (
+        select(TranscriptionJob)
+        .join(TranscriptionDetail, TranscriptionDetail.job_id == TranscriptionJob.id)
+        .where(TranscriptionJob.status == JobStatus.done, TranscriptionJob.params_fingerprint == fingerprint)
+    )
+    if video_id:
+        query = query.where(TranscriptionJob.video_id == video_id)
+    else:
+        query = query.where(TranscriptionJob.content_hash == content_hash)
+    if exclude_id:
+        query = query.where(TranscriptionJob.id != exclude_id)
+    return db.execute(query.order_by(TranscriptionJob.created_at).limit(1)).scalar_one_or_none()
+
+def find_cached_jobs(db: Session, fingerprint: str, video_ids=(), content_hashes=()) -> dict:
+    """Bản bulk của find_cached_job: một query, trả về {video_id hoặc content_hash: job}"""
+    video_ids, content_hashes = [v for v in video_ids if v], [h for h in content_hashes if h]
+    if not RESULT_CACHE_ENABLED or not (video_ids or content_hashes):
+        return {}
+    query = (
+        select(TranscriptionJob)
+        .join(TranscriptionDetail, TranscriptionDetail.job_id == TranscriptionJob.id)
+        .where(TranscriptionJob.status == JobStatus.done, TranscriptionJob.params_fingerprint == fingerprint)
+        .where(or_(TranscriptionJob.video_id.in_(video_ids), TranscriptionJob.content_hash.in_(content_hashes)))
+        .order_by(TranscriptionJob.created_at.desc())
+    )
+    found = {}
+    for job in db.execute(query).scalars():
+        # Sắp xếp mới nhất trước, ghi đè để giữ job cũ nhất giống find_cached_job
+        if job.video_id in video_ids:
+            found[job.video_id] = job
+        if job.content_hash in content_hashes:
+            found[job.content_hash] = job
+    return found
+
+def known_video_ids(db: Session, video_ids) -> set:
+    """
+    Video đã có job (đang chạy hoặc đã xong, không tính lỗi), với bất kỳ model/params nào.
+    Fingerprint chỉ dùng cho result cache, không dùng để quyết định crawl lại video.
+    """
+    video_ids = [v for v in video_ids if v]
+    if not video_ids:
+        return set()
+    rows = db.execute(
+        select(TranscriptionJob.video_id).distinct()
+        .where(TranscriptionJob.video_id.in_(video_ids), TranscriptionJob.status != JobStatus.error)
+    ).scalars()
+    return set(rows)
+
+def cached_job_values(source: TranscriptionJob, youtube: bool) -> dict:
+    """Giá trị cột cho job mới được gắn kết quả của source"""
+    values = {
+        "status": JobStatus.done,
+        "progress": 1.0,
+        "error": None,
+        "duration": source.duration,
+        "content_hash": source.content_hash,
+    }
+    if youtube:
+        # Audio của video đã có sẵn trên MinIO từ lần trước. file_url chỉ được set sau khi upload xong:
+        # source chưa có bản lưu (upload fused lỗi) thì job mới cũng không có, không giữ key placeholder
+        archived = bool(source.file_url)
+        values.update(file_key=source.file_key if archived else "", file_url=source.file_url if archived else "",
+                      audio_codec=source.audio_codec)
+    return values
+
+def copy_cached_result(db: Session, source_id: str, job_id: str, detail_id: str):
+    """Copy detail + segments của source sang job bằng INSERT ... SELECT phía DB"""
+    db.execute(
+        insert(TranscriptionDetail).from_select(
+            ["id", "job_id", "result_json", "formatted_text", "word_count"],
+            select(literal(detail_id), literal(job_id), TranscriptionDetail.result_json,
+                   TranscriptionDetail.formatted_text, TranscriptionDetail.word_count)
+            .where(TranscriptionDetail.job_id == source_id)
+        )
+    )
+    db.execute(
+        insert(TranscriptionSegment).from_select(
+            ["job_id", "seg_index", "start", "end", "text"],
+            select(literal(job_id), TranscriptionSegment.seg_index, TranscriptionSegment.start,
+                   TranscriptionSegment.end, TranscriptionSegment.text)
+            .where(TranscriptionSegment.job_id == source_id)
+        )
+    )
+
+def link_cached_result(db: Session, job: TranscriptionJob, source: TranscriptionJob, detail_id: str):
+    """
+    Gắn kết quả của source vào job: không download, không inference. Caller tự commit.
+    Job được requeue có thể còn detail/segment của lần chạy trước: xoá trước khi copy.
+    Job đã có bản lưu audio của chính nó (queued mode: prepare_youtube_job upload xong mới set file_url)
+    giữ nguyên file_key/file_url, không để object vừa upload thành rác trong bucket.
+    """
+    reset_segments(db, job.id, commit=False)
+    db.execute(delete(TranscriptionDetail).where(TranscriptionDetail.job_id == job.id))
+    copy_cached_result(db, source.id, job.id, detail_id)
+    archived = bool(job.file_url)
+    for key, value in cached_job_values(source, bool(job.youtube_url)).items():
+        if key in ("file_key", "file_url") and archived:
+            continue
+        if key in ("duration", "content_hash", "audio_codec"):
+            value = getattr(job, key) or value
+        setattr(job, key, value)
+    job.title = job.title or source.title
+    print(f"♻️ Reused transcription of job {source.id} for job {job.id}")
@@ -0,0 +1,102 @@
+import io
+import os
+from apps.backend.services.metrics import S3_TRANSFER_BYTES, track_s3_transfer
+
+# Đọc audio trực tiếp từ S3/MinIO (stream/ranged GET) thay vì tải về /tmp trước khi decode
+S3_STREAM_READS = os.getenv("S3_STREAM_READS", "true").lower() == "true"
+# Buffer phía client, gom các read nhỏ của decoder thành read lớn trên body
+S3_STREAM_BUFFER_SIZE = int(os.getenv("S3_STREAM_BUFFER_SIZE", str(1024 * 1024)))
+# Seek về phía trước không quá ngưỡng này: đọc bỏ qua trên body đang mở thay vì mở GET mới
+S3_STREAM_SKIP_BYTES = int(os.getenv("S3_STREAM_SKIP_BYTES", str(256 * 1024)))
+# Presigned GET cho ffmpeg/ffprobe phải còn hạn trong suốt job (mặc định 4 giờ)
+S3_STREAM_URL_EXPIRES = int(os.getenv("S3_STREAM_URL_EXPIRES", "14400"))
+
+_ranged_get_bytes = S3_TRANSFER_BYTES.labels("ranged_get")
+
+class S3RangeReader(io.RawIOBase):
+    """
+    File-like object read-only, seekable trên một S3 object.
+    Đọc tuần tự dùng một GET "bytes=pos-" mở sẵn; seek thì đóng body và mở ranged GET mới
+    tại vị trí đó, nên decoder (PyAV) seek được mà không cần bản copy local.
+    """
+
+    def __init__(self, client, bucket: str, key: str, size: int = None):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.size = size if size is not None else client.head_object(Bucket=bucket, Key=key)["ContentLength"]
+        self.pos = 0
+        self.requests = 0
+        self._body = None
+        self._body_pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self.pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError(f"Negative seek position: {pos}")
+        self.pos = pos
+        return pos
+
+    def _open_body(self, start: int):
+        self._close_body()
+        # Thời gian đến khi có response header; byte được đếm khi decoder đọc body
+        with track_s3_transfer("ranged_get"):
+            resp = self.client.get_object(Bucket=self.bucket, Key=self.key, Range=f"bytes={start}-")
+        self._body = resp["Body"]
+        self._body_pos = start
+        self.requests += 1
+
+    def _close_body(self):
+        if self._body is not None:
+            self._body.close()
+            self._body = None
+
+    def readinto(self, b) -> int:
+        if self.pos >= self.size:
+            return 0
+        skip = self.pos - self._body_pos
+        if self._body is None or skip < 0 or skip > S3_STREAM_SKIP_BYTES:
+            self._open_body(self.pos)
+        elif skip:
+            self._body.read(skip)
+            self._body_pos = self.pos
+
+        data = self._body.read(min(len(b), self.size - self.pos))
+        n = len(data)
+        _ranged_get_bytes.inc(n)
+        b[:n] = data
+        self.pos += n
+        self._body_pos += n
+        return n
+
+    def close(self):
+        self._close_body()
+        super().close()
+
+def open_object(client, bucket: str, key: str, size: int = None) -> io.BufferedReader:
+    """Mở S3 object như một file nhị phân (buffered, seekable) để truyền thẳng vào decoder"""
+    return io.BufferedReader(S3RangeReader(client, bucket, key, size), buffer_size=S3_STREAM_BUFFER_SIZE)
+
+def presigned_get_url(client, bucket: str, key: str) -> str:
+    """URL cho ffmpeg/ffprobe: tự đọc bằng HTTP range request, seek theo -ss không cần tải cả file"""
+    return client.generate_presigned_url(
+        ClientMethod="get_object",
+        Params={"Bucket": bucket, "Key": key},
+        ExpiresIn=S3_STREAM_URL_EXPIRES,
+    )
@@ -0,0 +1,80 @@
+from typing import List, Optional
+from sqlalchemy import select, func, literal, literal_column
+from sqlalchemy.orm import Session
+from apps.backend.models.transcription import TranscriptionJob
+from apps.backend.models.transcription_segment import TranscriptionSegment, SEARCH_CONFIG
+
+def segment_tsvector():
+    # Cùng biểu thức với ix_transcription_segments_text_search
+    return func.to_tsvector(literal_column(f"'{SEARCH_CONFIG}'"), TranscriptionSegment.text)
+
+def _match_query(db: Session, query: str):
+    columns = [TranscriptionSegment.job_id, TranscriptionSegment.seg_index, TranscriptionSegment.start,
+               TranscriptionSegment.end, TranscriptionSegment.text]
+    if db.get_bind().dialect.name == "postgresql":
+        # websearch_to_tsquery: cú pháp kiểu Google ("cụm từ", OR, -loại trừ), không lỗi với input bất kỳ
+        ts_query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'"), query)
+        vector = segment_tsvector()
+        return (select(*columns, func.ts_rank(vector, ts_query).label("rank"))
+                .where(vector.op("@@")(ts_query)))
+    # DB khác (SQLite khi dev/test): không có tsvector, khớp chuỗi con và không xếp hạng
+    return (select(*columns, literal(1.0).label("rank"))
+            .where(func.lower(TranscriptionSegment.text).contains(query.lower(), autoescape=True)))
+
+def search_segments(db: Session, query: str, limit: int = 20, hits_per_job: int = 5,
+                    language: Optional[str] = None, channel_crawler_id: Optional[str] = None) -> List[dict]:
+    """
+    Tìm trong segment của mọi job. Job xếp theo tổng rank các segment khớp,
+    mỗi job trả về tối đa hits_per_job segment (kèm timestamp) có rank cao nhất.
+    """
+    matched = _match_query(db, query)
+    if language or channel_crawler_id:
+        matched = matched.join(TranscriptionJob, TranscriptionJob.id == TranscriptionSegment.job_id)
+        if language:
+            matched = matched.where(TranscriptionJob.language == language)
+        if channel_crawler_id:
+            matched = matched.where(TranscriptionJob.channel_crawler_id == channel_crawler_id)
+    hits = matched.cte("hits")
+
+    top_jobs = (
+        select(hits.c.job_id, func.sum(hits.c.rank).label("score"), func.count().label("hit_count"))
+        .group_by(hits.c.job_id)
+        .order_by(func.sum(hits.c.rank).desc(), hits.c.job_id)
+        .limit(limit)
+        .cte("top_jobs")
+    )
+    ranked = (
+        select(hits, func.row_number().over(
+            partition_by=hits.c.job_id, order_by=(hits.c.rank.desc(), hits.c.start)
+        ).label("hit_no"))
+        .where(hits.c.job_id.in_(select(top_jobs.c.job_id)))
+        .subquery()
+    )
+    rows = db.execute(
+        select(ranked.c.job_id, ranked.c.seg_index, ranked.c.start, ranked.c.end, ranked.c.text, ranked.c.rank,
+               top_jobs.c.score, top_jobs.c.hit_count, TranscriptionJob.title, TranscriptionJob.youtube_url,
+               TranscriptionJob.language, TranscriptionJob.duration, TranscriptionJob.created_at)
+        .join(top_jobs, top_jobs.c.job_id == ranked.c.job_id)
+        .join(TranscriptionJob, TranscriptionJob.id == ranked.c.job_id)
+        .where(ranked.c.hit_no <= hits_per_job)
+        .order_by(top_jobs.c.score.desc(), ranked.c.job_id, ranked.c.start)
+    ).all()
+
+    results = {}
+    for r in rows:
+        if r.job_id not in results:
+            results[r.job_id] = {
+                "job_id": r.job_id,
+                "title": r.title,
+                "youtube_url": r.youtube_url,
+                "language": r.language,
+                "duration": r.duration,
+                "created_at": r.created_at,
+                "score": r.score,
+                "hit_count": r.hit_count,
+                "hits": [],
+            }
+        results[r.job_id]["hits"].append(
+            {"id": r.seg_index, "start": r.start, "end": r.end, "text": r.text, "rank": r.rank}
+        )
+    return list(results.values())
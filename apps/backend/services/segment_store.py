@@ -0,0 +1,150 @@
+import json
+import math
+import os
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from apps.backend.models.transcription_job import TranscriptionJob
+from apps.backend.models.transcription_segment import TranscriptionSegment
+from apps.backend.services.job_metrics import StageTimer, optional_stage
+
+# Flush khi đủ số segment hoặc đã quá số giây kể từ lần commit trước
+SEGMENT_BATCH_SIZE = int(os.getenv("SEGMENT_BATCH_SIZE", "50"))
+SEGMENT_FLUSH_INTERVAL = float(os.getenv("SEGMENT_FLUSH_INTERVAL", "5"))
+
+# Đánh dấu result_json chỉ chứa metadata, segment nằm trong bảng transcription_segments
+# (result_json không có marker này là blob pack_result cũ, chứa luôn text + segments)
+SEGMENT_STORAGE = "segments"
+
+class SegmentWriter:
+    """
+    Ghi segment vào bảng transcription_segments theo từng batch trong lúc decode,
+    đồng thời cập nhật job.progress = seg.end / duration
+    """
+
+    def __init__(self, db: Session, job: TranscriptionJob, duration: Optional[float],
+                 batch_size: int = SEGMENT_BATCH_SIZE, flush_interval: float = SEGMENT_FLUSH_INTERVAL,
+                 timer: Optional[StageTimer] = None):
+        self.db = db
+        self.timer = timer
+        self.job = job
+        self.duration = duration or 0
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.count = 0
+        self.last_end = 0.0
+        self._logprob_sum = 0.0
+        self._logprob_count = 0
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def add(self, start: float, end: float, text: str, avg_logprob: Optional[float] = None):
+        self.count += 1
+        self.last_end = end
+        if avg_logprob is not None:
+            self._logprob_sum += math.exp(avg_logprob)
+            self._logprob_count += 1
+        self._buffer.append({
+            "job_id": self.job.id,
+            "seg_index": self.count,
+            "start": start,
+            "end": end,
+            "text": text,
+        })
+        if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        with optional_stage(self.timer, "persist"):
+            if self._buffer:
+                self.db.execute(insert(TranscriptionSegment), self._buffer)
+                self._buffer = []
+            if self.duration > 0:
+                # 1.0 chỉ được set khi job hoàn tất
+                self.job.progress = min(self.last_end / self.duration, 0.99)
+            self.db.commit()
+        self._last_flush = time.monotonic()
+
+    def confidence(self) -> Optional[float]:
+        """Trung bình exp(avg_logprob) của các segment (xác suất token trung bình, 0-1)"""
+        if not self._logprob_count:
+            return None
+        return self._logprob_sum / self._logprob_count
+
+def reset_segments(db: Session, job_id: str, commit: bool = True):
+    """Xoá segment cũ của job (khi retry) trước khi ghi lại từ đầu"""
+    db.execute(delete(TranscriptionSegment).where(TranscriptionSegment.job_id == job_id))
+    if commit:
+        db.commit()
+
+def _segment_query(start: Optional[float] = None, end: Optional[float] = None):
+    query = select(TranscriptionSegment.job_id, TranscriptionSegment.seg_index, TranscriptionSegment.start,
+                   TranscriptionSegment.end, TranscriptionSegment.text)
+    # Segment giao với khoảng [start, end) giây
+    if start is not None:
+        query = query.where(TranscriptionSegment.end > start)
+    if end is not None:
+        query = query.where(TranscriptionSegment.start < end)
+    return query
+
+def _segment_dict(row) -> dict:
+    return {"id": row.seg_index, "start": row.start, "end": row.end, "text": row.text}
+
+def load_segments(db: Session, job_id: str, start: Optional[float] = None, end: Optional[float] = None) -> List[dict]:
+    """Đọc segment của job theo thứ tự, cùng format với pack_result; start/end để lấy một khoảng thời gian"""
+    rows = db.execute(
+        _segment_query(start, end)
+        .where(TranscriptionSegment.job_id == job_id)
+        .order_by(TranscriptionSegment.seg_index)
+    ).all()
+    return [_segment_dict(r) for r in rows]
+
+def load_segments_many(db: Session, job_ids: Iterable[str]) -> Dict[str, List[dict]]:
+    """Segment của nhiều job trong một query: {job_id: [segment, ...]}"""
+    job_ids = list(job_ids)
+    found = defaultdict(list)
+    if not job_ids:
+        return found
+    rows = db.execute(
+        _segment_query()
+        .where(TranscriptionSegment.job_id.in_(job_ids))
+        .order_by(TranscriptionSegment.job_id, TranscriptionSegment.seg_index)
+    ).all()
+    for r in rows:
+        found[r.job_id].append(_segment_dict(r))
+    return found
+
+def pack_result_meta(language: Optional[str], segment_count: int) -> str:
+    """result_json của job có segment trong bảng: chỉ metadata, text nằm ở formatted_text"""
+    return json.dumps({"language": language or "auto", "segment_count": segment_count, "storage": SEGMENT_STORAGE})
+
+def unpack_result(result_json: Optional[str], formatted_text: Optional[str], segments=None) -> Optional[dict]:
+    """
+    Ghép result {"text", "language", "segments"} từ result_json + segment đã load.
+    Blob pack_result cũ (không có marker storage) được trả về nguyên dạng.
+    """
+    if not result_json:
+        return None
+    data = json.loads(result_json)
+    if data.get("storage") != SEGMENT_STORAGE:
+        return data
+    return {"text": formatted_text or "", "language": data.get("language") or "auto", "segments": segments or []}
+
+def load_result(db: Session, job_id: str, result_json: Optional[str], formatted_text: Optional[str],
+                start: Optional[float] = None, end: Optional[float] = None) -> Optional[dict]:
+    """Result đầy đủ của job (segment đọc từ bảng, có thể giới hạn theo khoảng thời gian)"""
+    if not result_json:
+        return None
+    segments = None
+    if json.loads(result_json).get("storage") == SEGMENT_STORAGE:
+        segments = load_segments(db, job_id, start, end)
+    result = unpack_result(result_json, formatted_text, segments)
+    if segments is None and (start is not None or end is not None):
+        # Blob cũ: lọc khoảng thời gian phía Python
+        result["segments"] = [
+            s for s in result.get("segments", [])
+            if (start is None or s["end"] > start) and (end is None or s["start"] < end)
+        ]
+    return result
@@ -1,5 +1,7 @@
-import boto3, os, uuid
-from urllib.parse import quote_plus
+import boto3, os, uuid, threading
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from apps.backend.services.metrics import track_s3_transfer
 
 S3_ENDPOINT=os.getenv("S3_ENDPOINT","http://localhost:9000")
 S3_REGION=os.getenv("S3_REGION","us-east-1")
@@ -10,20 +12,75 @@ S3_BUCKET=os.getenv("S3_BUCKET","uploads")
 # Public endpoint cho frontend (có thể khác với internal endpoint)
 S3_PUBLIC_ENDPOINT=os.getenv("S3_PUBLIC_ENDPOINT","http://localhost:9000")
 
+# Connection pool của client dùng chung: đủ cho các thread upload/download song song
+S3_MAX_POOL_CONNECTIONS=int(os.getenv("S3_MAX_POOL_CONNECTIONS","32"))
+S3_TCP_KEEPALIVE=os.getenv("S3_TCP_KEEPALIVE","true").lower() == "true"
+S3_CONNECT_TIMEOUT=float(os.getenv("S3_CONNECT_TIMEOUT","5"))
+S3_READ_TIMEOUT=float(os.getenv("S3_READ_TIMEOUT","60"))
+S3_MAX_ATTEMPTS=int(os.getenv("S3_MAX_ATTEMPTS","3"))
+
+# Multipart transfer cho upload_file/download_file
+MB = 1024 * 1024
+TRANSFER_CONFIG = TransferConfig(
+  multipart_threshold=int(os.getenv("S3_MULTIPART_THRESHOLD_MB","16")) * MB,
+  multipart_chunksize=int(os.getenv("S3_MULTIPART_CHUNKSIZE_MB","16")) * MB,
+  max_concurrency=int(os.getenv("S3_MAX_CONCURRENCY","8")),
+  use_threads=True,
+)
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
 def s3_client():
-  return boto3.client(
-    "s3",
-    endpoint_url=S3_ENDPOINT,
-    aws_access_key_id=S3_ACCESS_KEY,
-    aws_secret_access_key=S3_SECRET_KEY,
-    region_name=S3_REGION
-  )
+  """
+  Client dùng chung cho cả process (boto3 client thread-safe), tạo lần đầu khi được gọi.
+  Sau fork (rq fork mode, worker pool) process con tạo client riêng thay vì dùng lại
+  socket của process cha.
+  """
+  global _client, _client_pid
+  if _client is None or _client_pid != os.getpid():
+    with _client_lock:
+      if _client is None or _client_pid != os.getpid():
+        _client = boto3.session.Session().client(
+          "s3",
+          endpoint_url=S3_ENDPOINT,
+          aws_access_key_id=S3_ACCESS_KEY,
+          aws_secret_access_key=S3_SECRET_KEY,
+          region_name=S3_REGION,
+          config=Config(
+            max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+            tcp_keepalive=S3_TCP_KEEPALIVE,
+            connect_timeout=S3_CONNECT_TIMEOUT,
+            read_timeout=S3_READ_TIMEOUT,
+            retries={"max_attempts": S3_MAX_ATTEMPTS, "mode": "standard"},
+          ),
+        )
+        _client_pid = os.getpid()
+  return _client
+
+def public_url(key:str)->str:
+  return f"{S3_PUBLIC_ENDPOINT}/{S3_BUCKET}/{key}"
+
+def upload_file(path:str, key:str, content_type:str=None):
+  extra = {"ContentType": content_type} if content_type else None
+  with track_s3_transfer("upload", os.path.getsize(path)):
+    s3_client().upload_file(path, S3_BUCKET, key, ExtraArgs=extra, Config=TRANSFER_CONFIG)
+
+def download_file(key:str, path:str):
+  with track_s3_transfer("download") as transfer:
+    s3_client().download_file(S3_BUCKET, key, path, Config=TRANSFER_CONFIG)
+    transfer.nbytes = os.path.getsize(path)
 
 def ensure_bucket_exists():
-  """Ensure S3 bucket exists, create if not"""
+  """Ensure S3 bucket exists, create if not (gọi một lần lúc startup, không gọi theo request)"""
+  client = s3_client()
+  try:
+    client.head_bucket(Bucket=S3_BUCKET)
+    return
+  except Exception:
+    pass
   try:
-    client = s3_client()
-    # Try to create bucket directly - MinIO won't error if it exists
     client.create_bucket(Bucket=S3_BUCKET)
     print(f"Ensured bucket exists: {S3_BUCKET}")
   except client.exceptions.BucketAlreadyExists:
@@ -36,24 +93,73 @@ def ensure_bucket_exists():
     print(f"Warning: Could not ensure bucket {S3_BUCKET} exists: {e}")
     # Continue anyway - bucket might exist or be accessible
 
+# Presigned URL hết hạn sau (giây)
+PRESIGN_EXPIRES=int(os.getenv("PRESIGN_EXPIRES","3600"))
+
+_presign_client = None
+_presign_lock = threading.Lock()
+
+def presign_client():
+  """
+  Client chỉ dùng để ký URL, endpoint là S3_PUBLIC_ENDPOINT: chữ ký SigV4 gồm cả host nên
+  phải ký trực tiếp với host public (thay chuỗi endpoint sau khi ký làm sai chữ ký).
+  generate_presigned_url ký local, không có network I/O.
+  """
+  global _presign_client
+  if _presign_client is None:
+    with _presign_lock:
+      if _presign_client is None:
+        _presign_client = boto3.session.Session().client(
+          "s3",
+          endpoint_url=S3_PUBLIC_ENDPOINT,
+          aws_access_key_id=S3_ACCESS_KEY,
+          aws_secret_access_key=S3_SECRET_KEY,
+          region_name=S3_REGION,
+          config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+        )
+  return _presign_client
+
 def gen_file_key(filename:str)->str:
   ext = filename.split(".")[-1] if "." in filename else "bin"
   return f"audios/{uuid.uuid4()}.{ext}"
 
 def presign_put(file_name:str, content_type:str):
-  # Ensure bucket exists before creating presigned URL
-  ensure_bucket_exists()
-  
   key = gen_file_key(file_name)
-  client = s3_client()
-  url = client.generate_presigned_url(
+  url = presign_client().generate_presigned_url(
     ClientMethod="put_object",
     Params={"Bucket": S3_BUCKET, "Key": key, "ContentType": content_type},
-    ExpiresIn=3600
+    ExpiresIn=PRESIGN_EXPIRES
+  )
+  return url, key
+
+def create_multipart_upload(file_name:str, content_type:str):
+  """Khởi tạo multipart upload cho file lớn, trả về (upload_id, key)"""
+  key = gen_file_key(file_name)
+  resp = s3_client().create_multipart_upload(Bucket=S3_BUCKET, Key=key, ContentType=content_type)
+  return resp["UploadId"], key
+
+def presign_upload_parts(key:str, upload_id:str, part_numbers):
+  """Presigned PUT URL cho từng part (ký local)"""
+  client = presign_client()
+  return [
+    (n, client.generate_presigned_url(
+      ClientMethod="upload_part",
+      Params={"Bucket": S3_BUCKET, "Key": key, "UploadId": upload_id, "PartNumber": n},
+      ExpiresIn=PRESIGN_EXPIRES
+    ))
+    for n in part_numbers
+  ]
+
+def complete_multipart_upload(key:str, upload_id:str, parts):
+  """parts: [(part_number, etag)] do client nhận được khi PUT từng part"""
+  s3_client().complete_multipart_upload(
+    Bucket=S3_BUCKET, Key=key, UploadId=upload_id,
+    MultipartUpload={"Parts": [{"PartNumber": n, "ETag": etag} for n, etag in sorted(parts)]}
   )
-  
-  # Replace internal endpoint with public endpoint for frontend
-  if S3_ENDPOINT != S3_PUBLIC_ENDPOINT:
-    url = url.replace(S3_ENDPOINT, S3_PUBLIC_ENDPOINT)
-  
-  return url, key
\ No newline at end of file
+
+def abort_multipart_upload(key:str, upload_id:str):
+  s3_client().abort_multipart_upload(Bucket=S3_BUCKET, Key=key, UploadId=upload_id)
+
+def object_etag(key:str):
+  """ETag của object (HEAD request, không tải nội dung)"""
+  return s3_client().head_object(Bucket=S3_BUCKET, Key=key).get("ETag")
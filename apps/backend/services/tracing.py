@@ -0,0 +1,208 @@
+import functools
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+# Distributed tracing (OpenTelemetry) tuỳ chọn: API -> RQ -> worker -> MinIO/OpenAI trên một trace.
+# Không cài opentelemetry (requirements-tracing.txt) hoặc TRACING_EXPORTER trống thì mọi hàm là no-op.
+try:
+    from opentelemetry import context as otel_context, propagate, trace
+    from opentelemetry.trace import SpanKind
+except ImportError:
+    trace = None
+
+# otlp (OTLP/HTTP tới collector, endpoint theo OTEL_EXPORTER_OTLP_ENDPOINT) | file | console | trống = tắt
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "").lower()
+# Exporter file: mỗi span một dòng JSON
+TRACING_FILE = os.getenv("TRACING_FILE", "/tmp/any2text-traces.jsonl")
+# Giới hạn độ dài câu SQL lưu trong span
+TRACING_MAX_STATEMENT = int(os.getenv("TRACING_MAX_STATEMENT", "500"))
+
+# Key trong job.meta của RQ chứa trace context (W3C traceparent)
+TRACE_META_KEY = "trace"
+
+_enabled = False
+
+def _file_exporter(path: str):
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class JsonLinesSpanExporter(SpanExporter):
+        def __init__(self):
+            self._lock = threading.Lock()
+
+        def export(self, spans):
+            # Process con (fork/pool) cùng append vào một file: mỗi batch một lần write
+            lines = "".join(json.dumps(json.loads(span.to_json())) + "\n" for span in spans)
+            with self._lock, open(path, "a") as f:
+                f.write(lines)
+            return SpanExportResult.SUCCESS
+
+    return JsonLinesSpanExporter()
+
+def init_tracing(service_name: str, engines=()) -> bool:
+    """
+    Cấu hình TracerProvider cho process (gọi một lần lúc startup, trước khi fork worker)
+    và gắn span cho query của các SQLAlchemy engine. Trả về False khi tracing tắt.
+    """
+    global _enabled
+    if trace is None or not TRACING_EXPORTER:
+        return False
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+        if TRACING_EXPORTER == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            exporter = OTLPSpanExporter()
+        elif TRACING_EXPORTER == "file":
+            exporter = _file_exporter(TRACING_FILE)
+        elif TRACING_EXPORTER == "console":
+            exporter = ConsoleSpanExporter()
+        else:
+            raise ValueError(f"Unknown TRACING_EXPORTER: {TRACING_EXPORTER}")
+    except (ImportError, ValueError) as e:
+        print(f"⚠️ Tracing disabled: {e}")
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", service_name)}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    for engine in engines:
+        instrument_engine(engine)
+    _enabled = True
+    print(f"🔭 Tracing enabled: {service_name} -> {TRACING_EXPORTER}")
+    return True
+
+def _tracer():
+    return trace.get_tracer("any2text")
+
+def _clean(attributes: dict) -> dict:
+    # OpenTelemetry không nhận None làm giá trị attribute
+    return {k: v for k, v in attributes.items() if v is not None}
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    """
+    Span con của span hiện tại; exception được ghi vào span rồi raise tiếp.
+    kind: internal | client (gọi ra ngoài: S3, OpenAI, YouTube) | server | consumer
+    """
+    if not _enabled:
+        yield None
+        return
+    with _tracer().start_as_current_span(name, kind=SpanKind[kind.upper()], attributes=_clean(attributes)) as current:
+        yield current
+
+def set_attributes(**attributes):
+    """Gắn attribute vào span hiện tại (vd model, language của job)"""
+    if _enabled:
+        trace.get_current_span().set_attributes(_clean(attributes))
+
+def set_error(message: str):
+    """Đánh dấu span hiện tại là lỗi khi job tự bắt exception (không raise ra khỏi span)"""
+    if _enabled:
+        trace.get_current_span().set_status(trace.Status(trace.StatusCode.ERROR, message))
+
+def trace_meta(meta: Optional[dict] = None) -> Optional[dict]:
+    """job.meta cho RQ enqueue, kèm trace context hiện tại để worker nối tiếp trace"""
+    if not _enabled:
+        return meta
+    carrier = {}
+    propagate.inject(carrier)
+    if not carrier:
+        return meta
+    return {**(meta or {}), TRACE_META_KEY: carrier}
+
+def traced_job(func):
+    """
+    Bọc RQ job function trong một span CONSUMER, parent là trace context lưu trong job.meta lúc enqueue.
+    Flush span khi job kết thúc: work horse của fork mode thoát bằng os._exit, không chạy atexit.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        from rq import get_current_job
+        rq_job = get_current_job()
+        carrier = (rq_job.meta or {}).get(TRACE_META_KEY) if rq_job else None
+        parent = propagate.extract(carrier) if carrier else None
+        attributes = {"rq.job_id": rq_job.id if rq_job else None, "rq.queue": rq_job.origin if rq_job else None}
+        if args:
+            attributes["job.id"] = str(args[0])
+        token = otel_context.attach(parent) if parent is not None else None
+        try:
+            with span(f"job {func.__name__}", kind="consumer", **attributes):
+                return func(*args, **kwargs)
+        finally:
+            if token is not None:
+                otel_context.detach(token)
+            trace.get_tracer_provider().force_flush()
+    return wrapper
+
+def instrument_engine(engine):
+    """Span cho mỗi câu SQL của engine sync (engine async: truyền async_engine.sync_engine)"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        if not _enabled:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+        context._otel_span = _tracer().start_span(f"db {operation}", kind=SpanKind.CLIENT, attributes={
+            "db.system": engine.dialect.name,
+            "db.statement": statement[:TRACING_MAX_STATEMENT],
+        })
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        current = getattr(context, "_otel_span", None)
+        if current is not None:
+            current.end()
+            context._otel_span = None
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        current = getattr(exception_context.execution_context, "_otel_span", None)
+        if current is not None:
+            current.record_exception(exception_context.original_exception)
+            current.set_status(trace.Status(trace.StatusCode.ERROR))
+            current.end()
+            exception_context.execution_context._otel_span = None
+
+class TracingMiddleware:
+    """ASGI middleware: span SERVER cho mỗi request, nhận traceparent từ client nếu có"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not _enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        token = otel_context.attach(propagate.extract(headers))
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            with _tracer().start_as_current_span(f"{scope['method']} {scope['path']}", kind=SpanKind.SERVER) as current:
+                try:
+                    await self.app(scope, receive, send_with_status)
+                finally:
+                    route = getattr(scope.get("route"), "path", None)
+                    if route:
+                        # Tên span theo route template, không theo path thật
+                        current.update_name(f"{scope['method']} {route}")
+                    current.set_attributes(_clean({
+                        "http.method": scope["method"], "http.route": route,
+                        "http.target": scope["path"], "http.status_code": status[0],
+                    }))
+                    if status[0] >= 500:
+                        current.set_status(trace.Status(trace.StatusCode.ERROR))
+        finally:
+            otel_context.detach(token)
@@ -3,16 +3,38 @@ import re
 import yt_dlp
 import tempfile
 from typing import Tuple
+from apps.backend.services.tracing import span
+
+# native: giữ nguyên stream audio gốc (m4a/opus), không re-encode
+# wav16k: ghi thẳng 16 kHz mono PCM - định dạng Whisper decode trực tiếp
+# mp3: transcode sang MP3 192k như trước
+YOUTUBE_AUDIO_MODE = os.getenv("YOUTUBE_AUDIO_MODE", "native")
+
+AUDIO_POSTPROCESSORS = {
+    "native": [],
+    "wav16k": [{
+        'key': 'FFmpegExtractAudio',
+        'preferredcodec': 'wav',
+    }],
+    "mp3": [{
+        'key': 'FFmpegExtractAudio',
+        'preferredcodec': 'mp3',
+        'preferredquality': '192',
+    }],
+}
 
 def sanitize_filename(title: str) -> str:
     """Bỏ dấu, bỏ ký tự đặc biệt, chỉ giữ lại chữ cái, số và gạch dưới"""
     return re.sub(r'[^a-zA-Z0-9_]', '_', title)
 
-def download_youtube_audio(youtube_url: str) -> Tuple[str, str]:
+def download_youtube_audio(youtube_url: str, audio_mode: str = YOUTUBE_AUDIO_MODE) -> Tuple[str, str]:
     """
     Download audio từ YouTube URL
+    audio_mode: native | wav16k | mp3 (xem YOUTUBE_AUDIO_MODE)
     Returns: (audio_file_path, video_title)
     """
+    if audio_mode not in AUDIO_POSTPROCESSORS:
+        raise ValueError(f"Unknown audio mode: {audio_mode}")
     # Tạo temp directory
     temp_dir = tempfile.mkdtemp(prefix="youtube_audio_")
     output_template = os.path.join(temp_dir, '%(title).50s.%(ext)s')
@@ -20,11 +42,7 @@ def download_youtube_audio(youtube_url: str) -> Tuple[str, str]:
     ydl_opts = {
         'format': 'bestaudio[ext=m4a]/bestaudio/best[ext=mp4]/best',
         'outtmpl': output_template,
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'mp3',
-            'preferredquality': '192',
-        }],
+        'postprocessors': AUDIO_POSTPROCESSORS[audio_mode],
         'quiet': True,
         'no_warnings': True,
         # Enhanced anti-bot measures
@@ -57,19 +75,21 @@ def download_youtube_audio(youtube_url: str) -> Tuple[str, str]:
         'geo_bypass': True,
         'geo_bypass_country': 'US',
     }
+    if audio_mode == "wav16k":
+        ydl_opts['postprocessor_args'] = {'extractaudio': ['-ar', '16000', '-ac', '1']}
 
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+    with span("yt-dlp download", kind="client", url=youtube_url, audio_mode=audio_mode), yt_dlp.YoutubeDL(ydl_opts) as ydl:
         info_dict = ydl.extract_info(youtube_url, download=True)
         title = info_dict.get("title", "unknown_title")
 
-    # Tìm file mp3 vừa tạo
-    files = [f for f in os.listdir(temp_dir) if f.endswith(".mp3")]
+    # Tìm file audio vừa tạo (bỏ qua file tạm của yt-dlp)
+    files = [f for f in os.listdir(temp_dir) if not f.endswith((".part", ".ytdl"))]
     if not files:
-        raise FileNotFoundError("Không tìm thấy file mp3 nào sau khi tải.")
+        raise FileNotFoundError("Không tìm thấy file audio nào sau khi tải.")
 
     # Lấy file mới nhất
     files.sort(key=lambda f: os.path.getmtime(os.path.join(temp_dir, f)), reverse=True)
-    mp3_file_path = os.path.join(temp_dir, files[0])
+    audio_file_path = os.path.join(temp_dir, files[0])
     
-    print(f"✅ Đã tải file audio từ YouTube: {mp3_file_path}")
-    return mp3_file_path, title
\ No newline at end of file
+    print(f"✅ Đã tải file audio từ YouTube: {audio_file_path}")
+    return audio_file_path, title
\ No newline at end of file
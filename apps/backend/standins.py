@@ -0,0 +1,33 @@
+"""
+Stand-in local cho hạ tầng, dùng chung bởi benchmark (benchmarks/transcribe_bench)
+và load test (loadtest/stand_ins): port trống, moto server thay MinIO, schema qua Alembic.
+"""
+import os
+import socket
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_s3():
+    """moto server làm stand-in cho MinIO (S3 API thật qua HTTP, dữ liệu trong RAM)"""
+    import logging
+    from moto.server import ThreadedMotoServer
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    port = free_port()
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+    server.start()
+    return server, f"http://127.0.0.1:{port}"
+
+def migrate(database_url: str):
+    """Schema như production (alembic upgrade head, gồm index và backfill chỉ có trong migration)"""
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "-c", os.path.join(REPO_ROOT, "apps", "backend", "alembic.ini"),
+         "-x", f"url={database_url}", "upgrade", "head"],
+        cwd=REPO_ROOT, check=True, capture_output=True
+    )
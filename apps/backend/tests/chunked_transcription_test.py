@@ -0,0 +1,100 @@
+import math
+from types import SimpleNamespace
+from apps.backend.services import chunked_transcription
+from apps.backend.services.chunked_transcription import Window, owned_segments, plan_windows
+
+def seg(start, end, text="x", avg_logprob=-0.1):
+    return SimpleNamespace(start=start, end=end, text=text, avg_logprob=avg_logprob)
+
+def test_plan_windows_short_audio_is_one_window():
+    windows = plan_windows([], 400, target=300, overlap=2)
+    assert windows == [Window(0, 0.0, 400, 0.0, math.inf)]
+
+def test_plan_windows_cuts_at_longest_silence_in_range():
+    # Khoảng lặng 2s quanh 250s dài hơn khoảng 0.5s quanh 320s; 50s nằm ngoài [150, 450]
+    silences = [(49.0, 51.0), (249.0, 251.0), (319.75, 320.25)]
+    windows = plan_windows(silences, 600, target=300, overlap=2)
+    assert [w.own_start for w in windows] == [0.0, 250.0]
+    assert windows[0] == Window(0, 0.0, 252.0, 0.0, 250.0)
+    assert windows[1] == Window(1, 248.0, 600, 250.0, math.inf)
+
+def test_plan_windows_hard_cut_without_silence():
+    windows = plan_windows([], 1000, target=300, overlap=2)
+    assert [w.own_start for w in windows] == [0.0, 300.0, 600.0]
+    assert windows[-1].end == 1000
+    assert windows[-1].own_end == math.inf
+
+def test_plan_windows_covers_audio_without_gaps():
+    silences = [(t, t + 1.0) for t in range(100, 3600, 170)]
+    windows = plan_windows(silences, 3600, target=300, overlap=2)
+    assert windows[0].start == 0.0
+    assert windows[-1].end == 3600
+    for prev, cur in zip(windows, windows[1:]):
+        # Vùng sở hữu nối tiếp nhau, vùng decode chồng lên nhau 2 * overlap
+        assert prev.own_end == cur.own_start
+        assert prev.end - cur.start == 4.0
+        assert cur.own_start - prev.own_start <= 300 * 1.5
+
+def test_owned_segments_shifts_to_absolute_time():
+    window = Window(1, 248.0, 552.0, 250.0, 550.0)
+    assert owned_segments(window, [seg(10.0, 12.5, "hello", -0.2)]) == [(258.0, 260.5, "hello", -0.2)]
+
+def test_overlap_segment_is_kept_by_exactly_one_window():
+    first = Window(0, 0.0, 252.0, 0.0, 250.0)
+    second = Window(1, 248.0, 600.0, 250.0, math.inf)
+    # Cùng một câu 247-251s được decode ở cả hai window: điểm giữa 249s thuộc window đầu
+    assert owned_segments(first, [seg(247.0, 251.0)]) == [(247.0, 251.0, "x", -0.1)]
+    assert owned_segments(second, [seg(-1.0, 3.0)]) == []
+    # Điểm giữa 251s thuộc window sau
+    assert owned_segments(first, [seg(249.0, 253.0)]) == []
+    assert owned_segments(second, [seg(1.0, 5.0)]) == [(249.0, 253.0, "x", -0.1)]
+
+def test_midpoint_on_cut_belongs_to_next_window():
+    first = Window(0, 0.0, 252.0, 0.0, 250.0)
+    second = Window(1, 248.0, 600.0, 250.0, math.inf)
+    assert owned_segments(first, [seg(249.0, 251.0)]) == []
+    assert owned_segments(second, [seg(1.0, 3.0)]) == [(249.0, 251.0, "x", -0.1)]
+
+def test_pool_size_divides_cores_between_transcribe_workers(monkeypatch):
+    from apps.backend.services import redis_queue
+    monkeypatch.setattr(chunked_transcription.os, "cpu_count", lambda: 16)
+    monkeypatch.setattr(chunked_transcription, "CHUNK_WORKERS", 0)
+    monkeypatch.setattr(chunked_transcription, "CHUNK_THREADS_PER_WORKER", 4)
+    monkeypatch.setitem(redis_queue.QUEUE_CONCURRENCY, "transcribe", 2)
+    assert chunked_transcription.pool_size() == (2, 4)
+    monkeypatch.setitem(redis_queue.QUEUE_CONCURRENCY, "transcribe", 32)
+    assert chunked_transcription.pool_size() == (1, 1)
+
+class InlinePool:
+    """Pool chạy ngay trong process test, thay ProcessPoolExecutor"""
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+def test_initial_prompt_reaches_every_window(monkeypatch):
+    from apps.backend.services import model_registry
+    monkeypatch.setattr(model_registry, "WHISPER_INITIAL_PROMPT", "Thuật ngữ: Kubernetes, Postgres")
+    monkeypatch.setattr(model_registry, "WHISPER_PARAM_OVERRIDES", {})
+    params = model_registry.transcription_params(None, duration=model_registry.LONG_AUDIO_VAD_DURATION + 1)
+    assert params["vad_filter"] and params["initial_prompt"] == "Thuật ngữ: Kubernetes, Postgres"
+
+    calls = []
+    def transcribe(audio, **kwargs):
+        calls.append(kwargs)
+        return [seg(1.0, 2.0)], SimpleNamespace(language="vi")
+    monkeypatch.setattr(chunked_transcription, "_worker_model", SimpleNamespace(transcribe=transcribe), raising=False)
+    monkeypatch.setattr(chunked_transcription, "load_audio_window", lambda source, start, duration: None)
+    monkeypatch.setattr(chunked_transcription, "find_silences", lambda source, duration: [])
+    monkeypatch.setattr(chunked_transcription, "get_pool", lambda spec: InlinePool())
+    segments = []
+    language = chunked_transcription.transcribe_chunked("a.wav", 1000, params, None, lambda *s: segments.append(s))
+    assert language == "vi" and len(calls) == 3 and segments
+    assert all(call["initial_prompt"] == "Thuật ngữ: Kubernetes, Postgres" for call in calls)
+
+def test_no_initial_prompt_key_without_config(monkeypatch):
+    from apps.backend.services import model_registry
+    monkeypatch.setattr(model_registry, "WHISPER_INITIAL_PROMPT", "")
+    monkeypatch.setattr(model_registry, "WHISPER_PARAM_OVERRIDES", {})
+    assert "initial_prompt" not in model_registry.transcription_params("en", duration=3600)
@@ -0,0 +1,47 @@
+import os
+import tempfile
+import pytest
+
+# core/db và redis_queue đọc env lúc import: set trước khi import app.
+# Gán đè (không setdefault) để test không bao giờ chạy trên DB thật trong env của máy dev.
+_workdir = tempfile.mkdtemp(prefix="any2text-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir}/test.db"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{_workdir}/test.db"
+os.environ["TRACING_EXPORTER"] = ""
+
+@pytest.fixture(scope="session")
+def tables():
+    from apps.backend.core.db import Base, engine
+    import apps.backend.models  # noqa: F401 - đăng ký model vào Base.metadata
+    Base.metadata.create_all(engine)
+    return Base.metadata
+
+@pytest.fixture
+def db(tables):
+    """Session sync để seed dữ liệu, xoá sạch các bảng sau mỗi test"""
+    from apps.backend.core.db import SessionLocal, engine
+    session = SessionLocal()
+    yield session
+    session.close()
+    with engine.begin() as conn:
+        for table in reversed(tables.sorted_tables):
+            conn.execute(table.delete())
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Response cache trên fakeredis (client sync của worker và async của API dùng chung một server)"""
+    import fakeredis
+    from apps.backend.services import response_cache
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(response_cache, "redis_conn", fakeredis.FakeRedis(server=server))
+    monkeypatch.setattr(response_cache, "async_redis_conn", fakeredis.FakeAsyncRedis(server=server))
+    monkeypatch.setattr(response_cache, "_entries", type(response_cache._entries)())
+    monkeypatch.setattr(response_cache, "_used_bytes", 0)
+    return response_cache.async_redis_conn
+
+@pytest.fixture
+def client(db, fake_redis):
+    # Không dùng `with`: bỏ qua startup hook cần S3
+    from fastapi.testclient import TestClient
+    from apps.backend.main import app
+    return TestClient(app)
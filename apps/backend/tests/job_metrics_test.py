@@ -0,0 +1,73 @@
+import json
+import pytest
+from apps.backend.models import TranscriptionJob, TranscriptionDetail, JobStatus
+from apps.backend.services import job_metrics
+from apps.backend.services.job_metrics import JobMetrics, StageTimer, save_job_metrics
+from apps.backend.services.segment_store import pack_result_meta
+
+def add_job(db, job_id="job"):
+    job = TranscriptionJob(id=job_id, status=JobStatus.done, file_key="a.mp3", engine="local", language="en")
+    db.add(job)
+    db.add(TranscriptionDetail(id=f"detail-{job_id}", job_id=job_id, result_json=pack_result_meta("en", 0),
+                               formatted_text="hello", word_count=1))
+    db.commit()
+    return job
+
+def run_metrics(inference=2.0, **values):
+    metrics = JobMetrics()
+    with metrics.stage("download"):
+        pass
+    metrics.timer.add("inference", inference)
+    metrics.set(**values)
+    return metrics.finish()
+
+def test_nested_stage_is_exclusive(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(job_metrics.time, "perf_counter", lambda: now[0])
+    timer = StageTimer()
+    with timer.stage("inference"):
+        now[0] += 3
+        # Flush segment trong vòng decode: bị trừ khỏi inference
+        with timer.stage("persist"):
+            now[0] += 1
+    assert timer.summary() == {"inference": 3.0, "persist": 1.0, "total": 4.0}
+
+def test_finish_reports_stages_resources_and_rtf():
+    result = run_metrics(inference=2.0, audio_seconds=4.0, model="small")
+    # Chạy ngoài RQ: không có queue wait
+    assert result["queue_wait"] is None
+    assert set(result["stages"]) == {"download", "inference"}
+    assert result["stages"]["inference"] == 2.0
+    assert result["rtf"] == 0.5
+    assert result["wall"] >= 0 and result["cpu_seconds"] >= 0 and result["peak_rss_mb"] > 0
+    assert result["audio_seconds"] == 4.0 and result["model"] == "small"
+    assert "finished_at" in result
+    json.dumps(result)
+
+def test_save_job_metrics_keys_by_function(db):
+    job = add_job(db)
+    save_job_metrics(db, job, "prepare_youtube", run_metrics(0.0))
+    save_job_metrics(db, job, "transcribe", run_metrics(3.0, audio_seconds=6.0))
+    # Lần chạy lại (retry) ghi đè lần trước của cùng function
+    save_job_metrics(db, job, "transcribe", run_metrics(1.0, audio_seconds=4.0))
+    db.expire_all()
+    data = json.loads(db.get(TranscriptionJob, "job").metrics_json)
+    assert set(data) == {"prepare_youtube", "transcribe"}
+    assert data["transcribe"]["rtf"] == 0.25
+
+def test_save_job_metrics_does_not_fail_job(db, monkeypatch):
+    job = add_job(db)
+    monkeypatch.setattr(db, "commit", lambda: (_ for _ in ()).throw(RuntimeError("db down")))
+    save_job_metrics(db, job, "transcribe", run_metrics())
+
+@pytest.mark.parametrize("path, key", [("/api/v1/transcriptions/job/full", "job"), ("/api/v1/transcriptions/job", None)])
+def test_metrics_are_exposed_by_job_endpoints(client, db, path, key):
+    job = add_job(db)
+    body = client.get(path).json()
+    assert (body[key] if key else body)["metrics"] is None
+
+    save_job_metrics(db, job, "transcribe", run_metrics(2.0, audio_seconds=4.0))
+    body = client.get(path).json()
+    metrics = (body[key] if key else body)["metrics"]
+    assert metrics["transcribe"]["rtf"] == 0.5
+    assert metrics["transcribe"]["stages"]["inference"] == 2.0
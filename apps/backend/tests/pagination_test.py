@@ -0,0 +1,91 @@
+import base64
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi import HTTPException
+from apps.backend.api.v1.transcription import decode_cursor, encode_cursor
+from apps.backend.models import TranscriptionJob, TranscriptionDetail, JobStatus
+from apps.backend.services.segment_store import pack_result_meta
+
+BASE = datetime(2026, 10, 18, 8, 0, 0, 123456)
+
+def add_jobs(db, specs):
+    """specs: (job_id, giây sau BASE, status); job done có detail"""
+    for job_id, seconds, status in specs:
+        db.add(TranscriptionJob(id=job_id, status=status, file_key=f"{job_id}.mp3", engine="local",
+                                created_at=BASE + timedelta(seconds=seconds)))
+        if status == JobStatus.done:
+            db.add(TranscriptionDetail(id=f"detail-{job_id}", job_id=job_id, result_json=pack_result_meta("en", 0),
+                                       formatted_text="one two three", word_count=3))
+    db.commit()
+
+def list_all(client, limit, **params):
+    """Đi hết các trang theo X-Next-Cursor, trả về id theo thứ tự và số trang"""
+    ids, pages, cursor = [], 0, None
+    while True:
+        query = {"limit": limit, **params}
+        if cursor:
+            query["cursor"] = cursor
+        resp = client.get("/api/v1/transcriptions", params=query)
+        assert resp.status_code == 200
+        pages += 1
+        ids += [item["id"] for item in resp.json()]
+        cursor = resp.headers.get("x-next-cursor")
+        if not cursor:
+            return ids, pages
+
+@pytest.mark.parametrize("created_at", [BASE, BASE.replace(tzinfo=timezone.utc), BASE.replace(microsecond=0)])
+def test_cursor_round_trip(created_at):
+    cursor = encode_cursor(created_at, "job|with|pipes")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, "job|with|pipes")
+
+@pytest.mark.parametrize("cursor", [
+    "%%%",
+    base64.urlsafe_b64encode(b"no-separator").decode(),
+    base64.urlsafe_b64encode(b"not-a-date|job-1").decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe|job-1").decode(),
+])
+def test_invalid_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
+
+def test_invalid_cursor_request_is_400(client):
+    resp = client.get("/api/v1/transcriptions", params={"cursor": "garbage!"})
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Invalid cursor"
+
+def test_pages_are_continuous_when_created_at_ties(client, db):
+    # 4 job cùng created_at: thứ tự trong nhóm theo id DESC, cursor cắt giữa nhóm
+    add_jobs(db, [("a", 0, JobStatus.done), ("b", 10, JobStatus.done), ("c", 10, JobStatus.done),
+                  ("d", 10, JobStatus.done), ("e", 10, JobStatus.done), ("f", 20, JobStatus.done), ("g", 30, JobStatus.done)])
+    expected = ["g", "f", "e", "d", "c", "b", "a"]
+    for limit in (1, 2, 3, 7):
+        ids, _ = list_all(client, limit)
+        assert ids == expected
+
+def test_next_cursor_only_when_page_is_full(client, db):
+    add_jobs(db, [(f"job-{i}", i, JobStatus.done) for i in range(4)])
+    first = client.get("/api/v1/transcriptions", params={"limit": 3})
+    assert len(first.json()) == 3 and first.headers.get("x-next-cursor")
+    last = client.get("/api/v1/transcriptions", params={"limit": 3, "cursor": first.headers["x-next-cursor"]})
+    assert [item["id"] for item in last.json()] == ["job-0"]
+    assert "x-next-cursor" not in last.headers
+
+def test_list_keeps_jobs_without_detail(client, db):
+    add_jobs(db, [("done", 0, JobStatus.done), ("queued", 1, JobStatus.queued),
+                  ("processing", 2, JobStatus.processing), ("failed", 3, JobStatus.error)])
+    items = {item["id"]: item for item in client.get("/api/v1/transcriptions").json()}
+    assert set(items) == {"done", "queued", "processing", "failed"}
+    assert items["done"]["word_count"] == 3
+    assert items["queued"]["word_count"] is None
+    assert items["queued"]["result"] is None
+
+def test_cursor_pages_with_status_filter(client, db):
+    add_jobs(db, [(f"done-{i}", i, JobStatus.done) for i in range(5)] + [(f"queued-{i}", i, JobStatus.queued) for i in range(5)])
+    ids, pages = list_all(client, 2, status="done")
+    assert ids == [f"done-{i}" for i in reversed(range(5))]
+    assert pages == 3
+
+def test_invalid_status_is_400(client):
+    assert client.get("/api/v1/transcriptions", params={"status": "finished"}).status_code == 400
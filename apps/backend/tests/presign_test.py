@@ -0,0 +1,21 @@
+from apps.backend.api.v1 import presign
+
+def part_urls(client, part_numbers):
+    return client.post("/api/v1/uploads/multipart/parts",
+                       json={"upload_id": "upload-1", "file_key": "uploads/a.mp3", "part_numbers": part_numbers})
+
+def test_part_urls_are_deduplicated_in_request_order(client):
+    resp = part_urls(client, [3, 1, 3, 2, 1])
+    assert resp.status_code == 200
+    assert [p["part_number"] for p in resp.json()] == [3, 1, 2]
+    assert all("partNumber=" in p["upload_url"] for p in resp.json())
+
+def test_too_many_part_numbers_is_400(client, monkeypatch):
+    monkeypatch.setattr(presign, "MAX_BATCH_SIZE", 5)
+    assert part_urls(client, list(range(1, 7))).status_code == 400
+    # Trùng lặp không tính vào giới hạn
+    assert part_urls(client, [1, 2, 3, 4, 5, 5, 5]).status_code == 200
+
+def test_part_number_out_of_range_is_400(client):
+    assert part_urls(client, [0]).status_code == 400
+    assert part_urls(client, [presign.MAX_MULTIPART_PARTS + 1]).status_code == 400
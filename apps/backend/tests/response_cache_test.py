@@ -0,0 +1,123 @@
+import asyncio
+from datetime import datetime, timezone
+from apps.backend.models import TranscriptionJob, TranscriptionDetail, TranscriptionSegment, JobStatus
+from apps.backend.services import response_cache
+from apps.backend.services.response_cache import etag_matches, job_version, response_etag
+from apps.backend.services.segment_store import pack_result_meta
+
+ETAG = '"0123456789abcdef0123"'
+UPDATED_AT = datetime(2026, 10, 18, 8, 30, tzinfo=timezone.utc)
+
+def add_job(db, job_id="job-1", status=JobStatus.done, updated_at=UPDATED_AT):
+    db.add(TranscriptionJob(id=job_id, status=status, file_key="a.mp3", engine="local", language="en",
+                            created_at=UPDATED_AT, updated_at=updated_at))
+    if status == JobStatus.done:
+        db.add(TranscriptionDetail(id=f"detail-{job_id}", job_id=job_id, result_json=pack_result_meta("en", 0),
+                                   formatted_text="hello", word_count=1))
+    db.commit()
+
+def test_etag_matches_parses_if_none_match():
+    assert etag_matches(ETAG, ETAG)
+    assert etag_matches(f'"other", {ETAG}', ETAG)
+    assert etag_matches(f'"other",{ETAG}', ETAG)
+    assert etag_matches(f"W/{ETAG}", ETAG)
+    assert etag_matches("*", ETAG)
+
+def test_etag_matches_rejects_missing_or_different_tag():
+    assert not etag_matches(None, ETAG)
+    assert not etag_matches("", ETAG)
+    assert not etag_matches('"other"', ETAG)
+    # ETag thiếu dấu nháy không phải cùng một tag
+    assert not etag_matches(ETAG.strip('"'), ETAG)
+
+def test_job_version_changes_with_status_and_updated_at():
+    version = job_version(JobStatus.done, UPDATED_AT)
+    assert job_version(JobStatus.done, UPDATED_AT) == version
+    assert job_version(JobStatus.error, UPDATED_AT) != version
+    assert job_version(JobStatus.done, UPDATED_AT.replace(second=31)) != version
+    assert job_version(JobStatus.queued, None) == "queued:0:0:0"
+
+def test_running_job_version_tracks_progress_and_segments():
+    version = job_version(JobStatus.processing, UPDATED_AT, 0.5, 10)
+    assert job_version(JobStatus.processing, UPDATED_AT, 0.6, 10) != version
+    # Flush chỉ insert segment (progress đứng yên ở 0.99 hoặc duration = 0)
+    assert job_version(JobStatus.processing, UPDATED_AT, 0.5, 11) != version
+    # Job đã xong: chỉ status + updated_at
+    assert job_version(JobStatus.done, UPDATED_AT, 0.5, 10) == job_version(JobStatus.done, UPDATED_AT)
+
+def test_response_etag_depends_on_route_job_and_version():
+    version = job_version(JobStatus.done, UPDATED_AT)
+    etag = response_etag("job", "job-1", version)
+    assert etag.startswith('"') and etag.endswith('"')
+    assert response_etag("detail", "job-1", version) != etag
+    assert response_etag("job", "job-2", version) != etag
+    assert response_etag("job", "job-1", job_version(JobStatus.done, None)) != etag
+
+def test_cached_body_is_invalidated_by_new_version(fake_redis):
+    old, new = job_version(JobStatus.done, UPDATED_AT), job_version(JobStatus.done, UPDATED_AT.replace(second=31))
+    asyncio.run(response_cache.put_response("job", "job-1", old, b'{"a": 1}'))
+    assert asyncio.run(response_cache.get_response("job", "job-1", old)) == b'{"a": 1}'
+    assert asyncio.run(response_cache.get_response("job", "job-1", new)) is None
+    # Process khác (LRU trống) đọc lại từ Redis
+    response_cache._entries.clear()
+    assert asyncio.run(response_cache.get_response("job", "job-1", old)) == b'{"a": 1}'
+
+def test_invalidate_job_drops_local_and_redis_entries(fake_redis):
+    version = job_version(JobStatus.done, UPDATED_AT)
+    asyncio.run(response_cache.put_response("detail", "job-1", version, b"{}"))
+    asyncio.run(response_cache.invalidate_job_async(TranscriptionJob(id="job-1")))
+    assert ("detail", "job-1") not in response_cache._entries
+    assert asyncio.run(fake_redis.get("resp:detail:job-1")) is None
+
+def test_get_transcription_returns_304_for_matching_etag(client, db):
+    add_job(db)
+    first = client.get("/api/v1/transcriptions/job-1")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"].startswith("private, max-age=")
+
+    again = client.get("/api/v1/transcriptions/job-1", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+def test_get_transcription_serves_new_etag_after_job_update(client, db):
+    add_job(db)
+    etag = client.get("/api/v1/transcriptions/job-1").headers["etag"]
+    job = db.get(TranscriptionJob, "job-1")
+    job.title = "Renamed"
+    job.updated_at = UPDATED_AT.replace(minute=45)
+    db.commit()
+
+    resp = client.get("/api/v1/transcriptions/job-1", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != etag
+    assert resp.json()["title"] == "Renamed"
+
+def test_running_job_is_not_cached(client, db):
+    add_job(db, status=JobStatus.processing)
+    resp = client.get("/api/v1/transcriptions/job-1")
+    assert resp.status_code == 200
+    assert resp.headers["cache-control"] == "no-cache"
+    assert ("job", "job-1") not in response_cache._entries
+    # ETag vẫn dùng được để revalidate
+    assert client.get("/api/v1/transcriptions/job-1", headers={"If-None-Match": resp.headers["etag"]}).status_code == 304
+
+def test_running_job_etag_changes_when_segments_are_flushed(client, db):
+    add_job(db, status=JobStatus.processing)
+    job = db.get(TranscriptionJob, "job-1")
+    job.progress = 0.99
+    db.add(TranscriptionSegment(job_id="job-1", seg_index=1, start=0.0, end=1.0, text="one"))
+    db.commit()
+    first = client.get("/api/v1/transcriptions/job-1")
+    assert len(first.json()["result"]["segments"]) == 1
+    # Flush tiếp theo không UPDATE job: progress vẫn 0.99, updated_at không đổi
+    db.add(TranscriptionSegment(job_id="job-1", seg_index=2, start=1.0, end=2.0, text="two"))
+    db.commit()
+    resp = client.get("/api/v1/transcriptions/job-1", headers={"If-None-Match": first.headers["etag"]})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != first.headers["etag"]
+    assert len(resp.json()["result"]["segments"]) == 2
+
+def test_unknown_job_is_404(client):
+    assert client.get("/api/v1/transcriptions/missing", headers={"If-None-Match": "*"}).status_code == 404
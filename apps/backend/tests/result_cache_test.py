@@ -0,0 +1,66 @@
+from sqlalchemy import select
+from apps.backend.models import TranscriptionJob, TranscriptionDetail, TranscriptionSegment, JobStatus
+from apps.backend.services.result_cache import link_cached_result
+from apps.backend.services.segment_store import pack_result_meta
+
+URL = "https://www.youtube.com/watch?v=abcdefghijk"
+
+def add_source(db, file_url="http://minio/uploads/youtube/src.m4a"):
+    source = TranscriptionJob(id="src", status=JobStatus.done, file_key="youtube/src.m4a", file_url=file_url,
+                              engine="local", youtube_url=URL, audio_codec="aac", duration=3, title="Source")
+    db.add(source)
+    db.add(TranscriptionDetail(id="detail-src", job_id="src", result_json=pack_result_meta("en", 2),
+                               formatted_text="one two", word_count=2))
+    db.add_all([TranscriptionSegment(job_id="src", seg_index=i, start=i - 1.0, end=float(i), text=t)
+                for i, t in ((1, "one"), (2, "two"))])
+    db.commit()
+    return source
+
+def segments_of(db, job_id):
+    return db.execute(select(TranscriptionSegment.seg_index, TranscriptionSegment.text)
+                      .where(TranscriptionSegment.job_id == job_id).order_by(TranscriptionSegment.seg_index)).all()
+
+def test_link_copies_result_and_source_audio(db):
+    source = add_source(db)
+    job = TranscriptionJob(id="job", status=JobStatus.queued, file_key="youtube/job.mp3", file_url="",
+                           engine="local", youtube_url=URL)
+    db.add(job)
+    db.commit()
+    link_cached_result(db, job, source, "detail-job")
+    db.commit()
+    assert job.status == JobStatus.done and job.title == "Source"
+    assert (job.file_key, job.file_url, job.audio_codec) == (source.file_key, source.file_url, "aac")
+    assert segments_of(db, "job") == [(1, "one"), (2, "two")]
+
+def test_link_keeps_audio_the_job_already_archived(db):
+    source = add_source(db)
+    # Queued mode: prepare_youtube_job đã upload audio của job rồi mới có content-hash hit
+    job = TranscriptionJob(id="job", status=JobStatus.processing, file_key="youtube/job.webm",
+                           file_url="http://minio/uploads/youtube/job.webm", audio_codec="opus",
+                           engine="local", youtube_url=URL)
+    db.add(job)
+    db.commit()
+    link_cached_result(db, job, source, "detail-job")
+    db.commit()
+    assert (job.file_key, job.file_url, job.audio_codec) == ("youtube/job.webm", "http://minio/uploads/youtube/job.webm", "opus")
+
+def test_link_does_not_copy_placeholder_key_of_unarchived_source(db):
+    source = add_source(db, file_url="")
+    job = TranscriptionJob(id="job", status=JobStatus.queued, file_key="youtube/job.mp3", file_url="",
+                           engine="local", youtube_url=URL)
+    db.add(job)
+    db.commit()
+    link_cached_result(db, job, source, "detail-job")
+    assert (job.file_key, job.file_url) == ("", "")
+
+def test_link_replaces_result_of_requeued_job(db):
+    source = add_source(db)
+    job = TranscriptionJob(id="job", status=JobStatus.queued, file_key="a.mp3", file_url="", engine="local")
+    db.add(job)
+    db.add(TranscriptionDetail(id="detail-old", job_id="job", result_json=pack_result_meta("en", 3), formatted_text="old"))
+    db.add_all([TranscriptionSegment(job_id="job", seg_index=i, start=0.0, end=1.0, text="old") for i in (1, 2, 3)])
+    db.commit()
+    link_cached_result(db, job, source, "detail-job")
+    db.commit()
+    assert segments_of(db, "job") == [(1, "one"), (2, "two")]
+    assert db.scalars(select(TranscriptionDetail.id).where(TranscriptionDetail.job_id == "job")).all() == ["detail-job"]
@@ -0,0 +1,90 @@
+import io
+import boto3
+import pytest
+from moto import mock_aws
+from apps.backend.services import s3_stream
+from apps.backend.services.s3_stream import S3RangeReader, open_object
+
+BUCKET = "stream-test"
+KEY = "audio/a.m4a"
+DATA = bytes(range(256)) * 4096  # 1 MB, mỗi offset có giá trị khác nhau trong chu kỳ 256
+
+@pytest.fixture
+def s3(monkeypatch):
+    for name, value in (("AWS_ACCESS_KEY_ID", "test"), ("AWS_SECRET_ACCESS_KEY", "test"), ("AWS_DEFAULT_REGION", "us-east-1")):
+        monkeypatch.setenv(name, value)
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        client.put_object(Bucket=BUCKET, Key=KEY, Body=DATA)
+        yield client
+
+@pytest.fixture
+def reader(s3, monkeypatch):
+    monkeypatch.setattr(s3_stream, "S3_STREAM_SKIP_BYTES", 64 * 1024)
+    r = S3RangeReader(s3, BUCKET, KEY, size=len(DATA))
+    yield r
+    r.close()
+
+def read(r, n):
+    buf = bytearray(n)
+    return bytes(buf[:r.readinto(buf)])
+
+def test_sequential_read_uses_one_get(reader):
+    chunks = []
+    while chunk := read(reader, 100_000):
+        chunks.append(chunk)
+    assert b"".join(chunks) == DATA
+    assert reader.requests == 1
+
+def test_size_from_head_object(s3):
+    assert S3RangeReader(s3, BUCKET, KEY).size == len(DATA)
+
+def test_forward_skip_under_threshold_reuses_body(reader):
+    assert read(reader, 1000) == DATA[:1000]
+    reader.seek(60 * 1024, io.SEEK_CUR)
+    pos = 1000 + 60 * 1024
+    assert read(reader, 500) == DATA[pos:pos + 500]
+    assert reader.requests == 1
+
+def test_forward_skip_over_threshold_reopens(reader):
+    assert read(reader, 1000) == DATA[:1000]
+    reader.seek(500_000)
+    assert read(reader, 500) == DATA[500_000:500_500]
+    assert reader.requests == 2
+
+def test_backward_seek_reopens_get(reader):
+    assert read(reader, 5000) == DATA[:5000]
+    assert reader.seek(10) == 10
+    assert read(reader, 100) == DATA[10:110]
+    assert reader.requests == 2
+    assert reader.tell() == 110
+
+def test_seek_end(reader):
+    assert reader.seek(-100, io.SEEK_END) == len(DATA) - 100
+    # Đọc quá cuối object chỉ trả về phần còn lại
+    assert read(reader, 1000) == DATA[-100:]
+    assert reader.tell() == len(DATA)
+
+def test_eof_returns_empty_without_new_get(reader):
+    reader.seek(0, io.SEEK_END)
+    assert read(reader, 10) == b""
+    reader.seek(len(DATA) + 50)
+    assert read(reader, 10) == b""
+    assert reader.requests == 0
+
+def test_invalid_seek(reader):
+    with pytest.raises(ValueError):
+        reader.seek(-1)
+    with pytest.raises(ValueError):
+        reader.seek(0, 3)
+
+def test_open_object_buffered_reads(s3, monkeypatch):
+    monkeypatch.setattr(s3_stream, "S3_STREAM_BUFFER_SIZE", 64 * 1024)
+    with open_object(s3, BUCKET, KEY) as f:
+        assert f.seekable()
+        # Nhiều read nhỏ của decoder gom trong buffer của BufferedReader
+        assert b"".join(f.read(1024) for _ in range(100)) == DATA[:100 * 1024]
+        f.seek(-10, io.SEEK_END)
+        assert f.read() == DATA[-10:]
+        assert f.read() == b""
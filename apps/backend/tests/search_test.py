@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+import pytest
+from sqlalchemy.dialects import postgresql, sqlite
+from apps.backend.core.db import engine
+from apps.backend.models import ChannelCrawler, TranscriptionJob, TranscriptionSegment, JobStatus
+from apps.backend.services.search import _match_query, search_segments
+
+postgres_only = pytest.mark.skipif(engine.dialect.name != "postgresql", reason="tsvector/ts_rank chỉ có trên Postgres")
+
+def session_on(dialect):
+    """Chỉ cần get_bind().dialect để _match_query chọn nhánh"""
+    return SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=dialect))
+
+def compiled(query, dialect):
+    return str(query.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+def add_job(db, job_id, texts, language="en", channel_crawler_id=None):
+    db.add(TranscriptionJob(id=job_id, status=JobStatus.done, file_key=f"{job_id}.mp3", engine="local",
+                            language=language, title=f"Title {job_id}", channel_crawler_id=channel_crawler_id))
+    db.add_all([TranscriptionSegment(job_id=job_id, seg_index=i, start=10.0 * (i - 1), end=10.0 * i, text=text)
+                for i, text in enumerate(texts, 1)])
+    db.commit()
+
+def test_postgres_query_uses_indexed_tsvector_expression():
+    sql = compiled(_match_query(session_on(postgresql.dialect()), 'kubernetes -docker'), postgresql.dialect())
+    # Cùng biểu thức với ix_transcription_segments_text_search thì planner mới dùng GIN index
+    assert "to_tsvector('simple', transcription_segments.text) @@ websearch_to_tsquery('simple', 'kubernetes -docker')" in sql
+    assert "ts_rank(to_tsvector('simple', transcription_segments.text), websearch_to_tsquery(" in sql
+
+def test_fallback_query_matches_escaped_substring():
+    sql = compiled(_match_query(session_on(sqlite.dialect()), "100%_Sure"), sqlite.dialect())
+    assert "to_tsvector" not in sql
+    assert "lower(transcription_segments.text) LIKE '%' || '100/%/_sure' || '%' ESCAPE '/'" in sql
+
+def test_hits_are_grouped_by_job(db):
+    add_job(db, "a", ["hello world", "nothing", "Hello again"])
+    add_job(db, "b", ["say hello"])
+    add_job(db, "c", ["no match"])
+    results = search_segments(db, "hello")
+    # SQLite: rank = 1.0 mỗi hit, score = số hit
+    assert [(r["job_id"], r["score"], r["hit_count"]) for r in results] == [("a", 2.0, 2), ("b", 1.0, 1)]
+    assert results[0]["title"] == "Title a" and results[0]["language"] == "en"
+    assert [(h["id"], h["start"], h["text"]) for h in results[0]["hits"]] == [(1, 0.0, "hello world"), (3, 20.0, "Hello again")]
+
+def test_hits_per_job_caps_hits_not_hit_count(db):
+    add_job(db, "a", ["hello"] * 8)
+    [result] = search_segments(db, "hello", hits_per_job=3)
+    assert result["hit_count"] == 8
+    assert [h["id"] for h in result["hits"]] == [1, 2, 3]
+
+def test_limit_keeps_best_jobs_with_stable_ties(db):
+    add_job(db, "a", ["hello"])
+    add_job(db, "b", ["hello", "hello"])
+    add_job(db, "c", ["hello"])
+    assert [r["job_id"] for r in search_segments(db, "hello", limit=2)] == ["b", "a"]
+
+def test_language_and_channel_filters(db):
+    db.add(ChannelCrawler(id="crawler", channel_url="https://www.youtube.com/@channel"))
+    db.commit()
+    add_job(db, "en", ["xin chào hello"], language="en")
+    add_job(db, "vi", ["xin chào"], language="vi", channel_crawler_id="crawler")
+    assert [r["job_id"] for r in search_segments(db, "xin chào", language="vi")] == ["vi"]
+    assert [r["job_id"] for r in search_segments(db, "xin chào", channel_crawler_id="crawler")] == ["vi"]
+    assert search_segments(db, "xin chào", language="vi", channel_crawler_id="other") == []
+
+def test_search_endpoint(client, db):
+    add_job(db, "a", ["hello world"])
+    resp = client.get("/api/v1/search", params={"q": "  hello  "})
+    assert resp.status_code == 200
+    assert [(r["job_id"], [h["text"] for h in r["hits"]]) for r in resp.json()] == [("a", ["hello world"])]
+    assert client.get("/api/v1/search", params={"q": "   "}).status_code == 400
+
+@postgres_only
+def test_postgres_ranks_jobs_by_relevance(db):
+    add_job(db, "weak", ["the deployment uses kubernetes", "nothing here"])
+    add_job(db, "strong", ["kubernetes kubernetes kubernetes cluster", "kubernetes again"])
+    results = search_segments(db, "kubernetes")
+    assert [r["job_id"] for r in results] == ["strong", "weak"]
+    hits = results[0]["hits"]
+    assert hits[0]["rank"] >= hits[1]["rank"]
+
+@postgres_only
+def test_postgres_websearch_syntax(db):
+    add_job(db, "a", ["kubernetes on docker", "kubernetes alone"])
+    [result] = search_segments(db, "kubernetes -docker")
+    assert [h["text"] for h in result["hits"]] == ["kubernetes alone"]
@@ -0,0 +1,92 @@
+import math
+import pytest
+from sqlalchemy import func, select
+from apps.backend.models import TranscriptionJob, TranscriptionSegment, JobStatus
+from apps.backend.services import segment_store
+from apps.backend.services.segment_store import SegmentWriter, load_segments, reset_segments
+
+@pytest.fixture
+def job(db):
+    job = TranscriptionJob(id="job", status=JobStatus.processing, file_key="a.mp3", engine="local", progress=0)
+    db.add(job)
+    db.commit()
+    return job
+
+@pytest.fixture
+def clock(monkeypatch):
+    """time.monotonic giả, test tự đẩy thời gian"""
+    now = [1000.0]
+    monkeypatch.setattr(segment_store.time, "monotonic", lambda: now[0])
+    return now
+
+def stored(db, job_id="job"):
+    return db.scalar(select(func.count()).select_from(TranscriptionSegment).where(TranscriptionSegment.job_id == job_id))
+
+def test_writer_flushes_every_batch_size_segments(db, job, clock):
+    writer = SegmentWriter(db, job, 100, batch_size=3, flush_interval=60)
+    writer.add(0.0, 1.0, "one")
+    writer.add(1.0, 2.0, "two")
+    assert stored(db) == 0
+    writer.add(2.0, 3.0, "three")
+    assert stored(db) == 3
+    writer.add(3.0, 4.0, "four")
+    assert stored(db) == 3
+    writer.flush()
+    assert [(s["id"], s["text"]) for s in load_segments(db, "job")] == [(1, "one"), (2, "two"), (3, "three"), (4, "four")]
+
+def test_writer_flushes_after_interval(db, job, clock):
+    writer = SegmentWriter(db, job, 100, batch_size=50, flush_interval=5)
+    writer.add(0.0, 1.0, "one")
+    assert stored(db) == 0
+    clock[0] += 5
+    writer.add(1.0, 2.0, "two")
+    assert stored(db) == 2
+    # Đếm lại từ lần flush vừa rồi
+    clock[0] += 4
+    writer.add(2.0, 3.0, "three")
+    assert stored(db) == 2
+
+def test_flush_writes_progress_from_last_segment_end(db, job, clock):
+    writer = SegmentWriter(db, job, 200, batch_size=1)
+    writer.add(0.0, 50.0, "one")
+    db.expire_all()
+    assert db.get(TranscriptionJob, "job").progress == 0.25
+    # Segment cuối chạm duration: 1.0 chỉ được set khi job hoàn tất
+    writer.add(50.0, 200.0, "two")
+    db.expire_all()
+    assert db.get(TranscriptionJob, "job").progress == 0.99
+
+def test_flush_keeps_progress_without_duration(db, job, clock):
+    writer = SegmentWriter(db, job, None, batch_size=1)
+    writer.add(0.0, 50.0, "one")
+    db.expire_all()
+    assert db.get(TranscriptionJob, "job").progress == 0
+    assert stored(db) == 1
+
+def test_confidence_is_mean_token_probability(db, job, clock):
+    writer = SegmentWriter(db, job, 100)
+    assert writer.confidence() is None
+    writer.add(0.0, 1.0, "one", math.log(0.8))
+    writer.add(1.0, 2.0, "two")
+    writer.add(2.0, 3.0, "three", math.log(0.6))
+    assert writer.confidence() == pytest.approx(0.7)
+
+def test_reset_segments_before_retry(db, job, clock):
+    db.add(TranscriptionJob(id="other", status=JobStatus.done, file_key="b.mp3", engine="local"))
+    db.add(TranscriptionSegment(job_id="other", seg_index=1, start=0.0, end=1.0, text="keep"))
+    writer = SegmentWriter(db, job, 100, batch_size=1)
+    writer.add(0.0, 1.0, "first try")
+    writer.add(1.0, 2.0, "first try")
+    reset_segments(db, "job")
+    assert stored(db) == 0
+    assert stored(db, "other") == 1
+    # Lần chạy lại ghi từ seg_index 1, không trùng với segment của lần trước
+    retry = SegmentWriter(db, job, 100, batch_size=1)
+    retry.add(0.0, 1.0, "second try")
+    assert [(s["id"], s["text"]) for s in load_segments(db, "job")] == [(1, "second try")]
+
+def test_reset_segments_without_commit_rolls_back(db, job, clock):
+    SegmentWriter(db, job, 100, batch_size=1).add(0.0, 1.0, "one")
+    reset_segments(db, "job", commit=False)
+    db.rollback()
+    assert stored(db) == 1
@@ -0,0 +1,71 @@
+import json
+import pytest
+from apps.backend.models import TranscriptionJob, TranscriptionDetail, TranscriptionSegment, JobStatus
+from apps.backend.services.segment_store import pack_result_meta
+
+# Segment i chiếm [10 * (i - 1), 10 * i) giây
+SEGMENTS = [(i, 10.0 * (i - 1), 10.0 * i, f"seg {i}") for i in range(1, 6)]
+
+def add_job(db, job_id="job", status=JobStatus.done, legacy=False):
+    db.add(TranscriptionJob(id=job_id, status=status, file_key="a.mp3", engine="local"))
+    if legacy:
+        # Blob pack_result cũ: segment nằm trong result_json
+        blob = {"text": "", "language": "en", "segments": [{"id": i, "start": s, "end": e, "text": t} for i, s, e, t in SEGMENTS]}
+        db.add(TranscriptionDetail(id=f"detail-{job_id}", job_id=job_id, result_json=json.dumps(blob)))
+    else:
+        if status == JobStatus.done:
+            db.add(TranscriptionDetail(id=f"detail-{job_id}", job_id=job_id, result_json=pack_result_meta("en", len(SEGMENTS))))
+        db.add_all([TranscriptionSegment(job_id=job_id, seg_index=i, start=s, end=e, text=t) for i, s, e, t in SEGMENTS])
+    db.commit()
+
+def segment_ids(client, job_id="job", **params):
+    resp = client.get(f"/api/v1/transcriptions/{job_id}/segments", params=params)
+    assert resp.status_code == 200
+    return [s["id"] for s in resp.json()]
+
+RANGES = [
+    ({}, [1, 2, 3, 4, 5]),
+    # [start, end): segment kết thúc đúng tại start hoặc bắt đầu đúng tại end không giao
+    ({"start": 10, "end": 20}, [2]),
+    ({"start": 9.5, "end": 20.5}, [1, 2, 3]),
+    ({"start": 0, "end": 0.1}, [1]),
+    ({"start": 40}, [5]),
+    ({"start": 50}, []),
+    ({"end": 10}, [1]),
+    ({"end": 10.01}, [1, 2]),
+]
+
+@pytest.mark.parametrize("params, expected", RANGES)
+def test_range_returns_overlapping_segments(client, db, params, expected):
+    add_job(db)
+    assert segment_ids(client, **params) == expected
+
+@pytest.mark.parametrize("params, expected", RANGES)
+def test_range_on_legacy_blob(client, db, params, expected):
+    add_job(db, legacy=True)
+    assert segment_ids(client, **params) == expected
+
+def test_range_on_running_job_without_detail(client, db):
+    add_job(db, status=JobStatus.processing)
+    assert segment_ids(client, start=15, end=35) == [2, 3, 4]
+
+def test_segments_are_returned_in_order_with_times(client, db):
+    add_job(db)
+    resp = client.get("/api/v1/transcriptions/job/segments", params={"start": 20, "end": 30})
+    assert resp.json() == [{"id": 3, "start": 20.0, "end": 30.0, "text": "seg 3"}]
+
+@pytest.mark.parametrize("params", [{"start": 20, "end": 20}, {"start": 30, "end": 20}])
+def test_empty_or_reversed_range_is_400(client, db, params):
+    add_job(db)
+    resp = client.get("/api/v1/transcriptions/job/segments", params=params)
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "end must be greater than start"
+
+def test_negative_bound_is_rejected(client, db):
+    add_job(db)
+    assert client.get("/api/v1/transcriptions/job/segments", params={"start": -1}).status_code == 422
+
+def test_unknown_job_is_404(client):
+    resp = client.get("/api/v1/transcriptions/missing/segments", params={"start": 0, "end": 10})
+    assert resp.status_code == 404
+    assert resp.json()["detail"] == "Transcription job not found"
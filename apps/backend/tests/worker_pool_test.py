@@ -0,0 +1,17 @@
+from apps.backend import worker
+from apps.backend.worker import restart_backoff
+
+def test_restart_backoff_doubles_up_to_cap(monkeypatch):
+    monkeypatch.setattr(worker, "WORKER_RESTART_MAX_DELAY", 60.0)
+    monkeypatch.setattr(worker, "WORKER_RESTART_STABLE_SECONDS", 30.0)
+    delays, delay = [], 0.0
+    for _ in range(8):
+        delay = restart_backoff(delay, uptime=0.5)
+        delays.append(delay)
+    assert delays == [1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 60.0, 60.0]
+
+def test_restart_backoff_resets_after_stable_uptime(monkeypatch):
+    monkeypatch.setattr(worker, "WORKER_RESTART_STABLE_SECONDS", 30.0)
+    assert restart_backoff(32.0, uptime=45.0) == 0.0
+    # Chết ngay sau lần restart tức thì: bắt đầu lại từ 1 giây
+    assert restart_backoff(0.0, uptime=0.1) == 1.0
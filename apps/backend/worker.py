@@ -1,49 +1,160 @@
-import time, json, os, uuid, re
-import boto3
+import time, json, os, uuid, re, mimetypes, threading
 from redis import Redis
 import requests
-from apps.backend.services.storage import S3_PUBLIC_ENDPOINT
+from apps.backend.services.storage import S3_BUCKET, s3_client, public_url, upload_file, download_file
 from rq import Worker, Queue, Connection
-from apps.backend.services.redis_queue import redis_conn
+from apps.backend.services.redis_queue import redis_conn, STAGES, listen_queue_names, default_worker_count, YOUTUBE_PIPELINE_MODE, YOUTUBE_PREPARE_STAGE
 from sqlalchemy.orm import Session
-from apps.backend.core.db import SessionLocal, engine, Base
+from apps.backend.core.db import SessionLocal, engine
 from apps.backend.models.transcription import TranscriptionJob, TranscriptionDetail, TranscriptionImage, JobStatus, ImageType
 from apps.backend.models.channel_crawler import ChannelCrawler
-from apps.backend.utils.utils import pack_result
+from apps.backend.services.segment_store import SegmentWriter, reset_segments, load_segments, pack_result_meta
 from apps.backend.services.youtube import download_youtube_audio
-from faster_whisper import WhisperModel
-
-# Load model once when worker starts
-model = WhisperModel("small.en", device="cpu")
-
-# S3/MinIO configuration
-S3_ENDPOINT = os.getenv("S3_ENDPOINT", "http://localhost:9000")
-S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY", "minioadmin")
-S3_SECRET_KEY = os.getenv("S3_SECRET_KEY", "minioadmin")
-S3_REGION = os.getenv("S3_REGION", "us-east-1")
-
-def s3_client():
-  return boto3.client(
-    "s3",
-    endpoint_url=S3_ENDPOINT,
-    aws_access_key_id=S3_ACCESS_KEY,
-    aws_secret_access_key=S3_SECRET_KEY,
-    region_name=S3_REGION
-  )
-
-# Function to download file from URL (MinIO/S3) to local
-def download_from_s3(url, out_path):
-    """Tải audio từ MinIO/URL về local."""
-    r = requests.get(url)
-    r.raise_for_status()
-    with open(out_path, "wb") as f:
-        f.write(r.content)
-    return out_path
+from apps.backend.services.media_probe import probe_audio
+from apps.backend.services.chunked_transcription import transcribe_chunked, CHUNKED_TRANSCRIPTION, CHUNKED_MIN_DURATION
+from apps.backend.services.result_cache import params_fingerprint, youtube_video_id, file_md5, etag_content_hash, find_cached_job, link_cached_result, known_video_ids
+from apps.backend.services.response_cache import invalidate_job
+from apps.backend.services.job_metrics import JobMetrics, optional_stage, save_job_metrics
+from apps.backend.services.metrics import observe_download, track_s3_transfer, start_worker_exporter
+from apps.backend.services.tracing import init_tracing, traced_job, span
+from apps.backend.services.s3_stream import S3_STREAM_READS, open_object, presigned_get_url
+from apps.backend.services.model_registry import resolve_model, get_model, transcription_params as build_transcription_params
+
+def transcribe_audio(db: Session, job: TranscriptionJob, audio_path: str, audio_file=None, metrics: JobMetrics = None):
+    """
+    Transcribe audio và lưu kết quả cho job.
+    audio_path là path local hoặc URL (ffprobe/ffmpeg đọc bằng HTTP range request);
+    audio_file là file-like seekable cho decoder của faster-whisper, mặc định dùng audio_path.
+    Dùng chung cho transcribe_job (audio trên MinIO) và pipeline fused của prepare_youtube_job.
+    Caller chịu trách nhiệm set status processing, xử lý lỗi và xoá file.
+    metrics (tuỳ chọn) nhận wall time của các stage hash, probe, model_load, inference, persist
+    cùng audio_seconds, model, language, segments.
+    """
+    started = time.perf_counter()
+    timer = metrics.timer if metrics else None
+    # Cùng nội dung audio + cùng model/params đã có kết quả: bỏ qua inference
+    # (đọc stream thì dùng ETag của object, không tải cả file chỉ để hash)
+    if os.path.exists(audio_path):
+        with optional_stage(timer, "hash"):
+            job.content_hash = file_md5(audio_path)
+    job.params_fingerprint = params_fingerprint(job.language, job.engine)
+    cached = find_cached_job(db, job.params_fingerprint, content_hash=job.content_hash, exclude_id=job.id)
+    if cached:
+        link_cached_result(db, job, cached, str(uuid.uuid4()))
+        db.commit()
+        if metrics:
+            metrics.set(cache_hit=True)
+        return
+    db.commit()
 
+    # Enhanced transcription với optimized parameters
+    print(f"🎙️ Starting transcription...")
+    
+    # Determine language for transcription
+    transcribe_language = None
+    if job.language and job.language != "auto":
+        transcribe_language = job.language
+        
+    print(f"🌍 Using language: {transcribe_language or 'auto-detect'}")
+    
+    # Audio duration analysis for long content optimization
+    # (đọc từ metadata của container, không decode toàn bộ file)
+    duration = job.duration or 0
+    if not duration:
+        try:
+            with optional_stage(timer, "probe"):
+                media = probe_audio(audio_path)
+            duration = media.duration or 0
+            job.audio_codec = job.audio_codec or media.codec
+            print(f"🔎 Probed audio: codec={media.codec}, sample_rate={media.sample_rate}")
+            if duration:
+                job.duration = round(duration)
+                db.commit()
+        except Exception as e:
+            print(f"⚠️ Could not analyze audio duration: {e}")
+            duration = 0
+    print(f"📊 Audio duration: {duration:.1f}s ({duration/60:.1f}min)")
+    
+    # Enhanced transcription parameters (audio dài: bật VAD filter, xem model_registry)
+    transcription_params = build_transcription_params(transcribe_language, duration)
+    if transcribe_language == 'vi':
+        print("🇻🇳 Using Vietnamese-optimized parameters")
+    if transcription_params.get('vad_filter'):
+        print("🔄 VAD filter enabled")
+    
+    use_chunked = CHUNKED_TRANSCRIPTION and duration > CHUNKED_MIN_DURATION
+    
+    # Stream segments vào DB theo batch - API đọc được kết quả từng phần trong lúc decode
+    reset_segments(db, job.id)
+    
+    # Model được load lazily theo language/engine của job (xem services/model_registry)
+    spec = resolve_model(transcribe_language, job.engine)
+    print(f"🧠 Using model: {spec.name} ({spec.compute_type})")
+    if metrics:
+        metrics.set(model=spec.name, compute_type=spec.compute_type, chunked=use_chunked)
+    
+    print(f"⏳ Starting transcription with timeout protection...")
+    if use_chunked:
+        # Model được load trong từng process của pool: tính vào inference
+        writer = SegmentWriter(db, job, duration, timer=timer)
+        with optional_stage(timer, "inference"):
+            detected_language = transcribe_chunked(audio_path, duration, transcription_params, spec, writer.add)
+    else:
+        with optional_stage(timer, "model_load"):
+            model = get_model(spec)
+        # faster-whisper decode lazily: phần lớn thời gian nằm trong vòng lặp segment
+        with optional_stage(timer, "inference"):
+            segments, info = model.transcribe(audio_file or audio_path, **transcription_params)
+            detected_language = info.language
+            print(f"🎯 Transcription started - Language: {info.language}, Duration: {info.duration:.2f}s")
+            
+            writer = SegmentWriter(db, job, info.duration, timer=timer)
+            for seg in segments:
+                writer.add(seg.start, seg.end, seg.text, seg.avg_logprob)
+                
+                # Progress update for every 100 segments in long content
+                if writer.count % 100 == 0:
+                    print(f"⏳ Progress: {job.progress * 100 if job.progress else 0:.1f}% ({writer.count} segments, {seg.end:.0f}s)")
+    writer.flush()
+            
+    print(f"✅ Processed {writer.count} segments total")
+    confidence = writer.confidence()
+    if metrics:
+        metrics.set(audio_seconds=round(writer.duration, 2), language=detected_language,
+                    segments=writer.count, confidence=round(confidence, 4) if confidence is not None else None)
+
+    # Save results to database: segment đã nằm trong transcription_segments, result_json chỉ giữ metadata
+    with optional_stage(timer, "persist"):
+        seg_list = load_segments(db, job.id)
+        text = " ".join(s["text"] for s in seg_list).strip()
+        result_data = pack_result_meta(detected_language, len(seg_list))
+        
+        # Create TranscriptionDetail
+        detail = TranscriptionDetail(
+            id=str(uuid.uuid4()),
+            job_id=job.id,
+            result_json=result_data,
+            formatted_text=text,
+            word_count=len(text.split()) if text else 0,
+            # Giây wall time của job tính đến lúc lưu kết quả (gồm download khi có metrics của job)
+            processing_time=round(timer.elapsed() if timer else time.perf_counter() - started),
+            confidence_score=f"{confidence:.3f}" if confidence is not None else None
+        )
+        db.add(detail)
+        
+        job.status = JobStatus.done
+        job.progress = 1.0
+        db.commit()
+
+@traced_job
 def transcribe_job(transcription_id: str):
-    """Unified transcription job - handles both uploaded files and YouTube audio"""
+    """
+    Unified transcription job - handles both uploaded files and YouTube audio.
+    Trả về metrics của lần chạy (RQ lưu làm job result, benchmark đọc lại), cũng được lưu vào job.metrics_json.
+    """
     db: Session = SessionLocal()
     job = None
+    metrics = JobMetrics()
 
     try:
         job = db.get(TranscriptionJob, transcription_id)
@@ -57,114 +168,40 @@ def transcribe_job(transcription_id: str):
             print(f"📺 YouTube source: {job.youtube_url}")
 
         job.status = JobStatus.processing
+        job.progress = 0.0
         db.commit()
 
-        # Download audio từ MinIO về /tmp/ 
-        audio_path = f"/tmp/{job.id}.mp3"
         client = s3_client()
-        bucket = os.getenv('S3_BUCKET', 'uploads')
-        
-        print(f"⬇️ Downloading from MinIO: {bucket}/{job.file_key}")
-        client.download_file(bucket, job.file_key, audio_path)
-        print(f"✅ Downloaded to: {audio_path}")
-
-        # Enhanced transcription với optimized parameters
-        print(f"🎙️ Starting transcription...")
-        
-        # Determine language for transcription
-        transcribe_language = None
-        if job.language and job.language != "auto":
-            transcribe_language = job.language
-            
-        print(f"🌍 Using language: {transcribe_language or 'auto-detect'}")
-        
-        # Enhanced transcription parameters
-        transcription_params = {
-            'beam_size': 5,
-            'language': transcribe_language,  # None means auto-detect
-            'task': 'transcribe',  # Always transcribe, not translate
-            'temperature': 0.0,  # More deterministic output
-            'compression_ratio_threshold': 2.4,
-            'log_prob_threshold': -1.0,
-            'no_speech_threshold': 0.6,
-            'word_timestamps': False,  # Disable for speed
-            'condition_on_previous_text': True,
-        }
         
-        # Language-specific optimizations
-        if transcribe_language == 'vi':
-            transcription_params.update({
-                'temperature': [0.0, 0.2, 0.4],
-                'beam_size': 3,
-                'log_prob_threshold': -1.5,
-                'no_speech_threshold': 0.4,
-            })
-            print("🇻🇳 Using Vietnamese-optimized parameters")
-        
-        # Audio duration analysis for long content optimization
-        try:
-            import librosa
-            y, sr = librosa.load(audio_path, sr=None)
-            duration = len(y) / sr
-            print(f"📊 Audio duration: {duration:.1f}s ({duration/60:.1f}min)")
-            
-            if duration > 1200:  # 20 minutes
-                print("🔄 Long audio detected - using chunked processing...")
-                transcription_params.update({
-                    'vad_filter': True,
-                    'vad_parameters': dict(min_silence_duration_ms=500),
-                    'initial_prompt': None,
-                })
-        except Exception as e:
-            print(f"⚠️ Could not analyze audio duration: {e}")
-            duration = 0
-        
-        print(f"⏳ Starting transcription with timeout protection...")
-        segments, info = model.transcribe(audio_path, **transcription_params)
-        print(f"🎯 Transcription completed - Language: {info.language}, Duration: {info.duration:.2f}s")
-        
-        # Process segments with progress tracking
-        text = ""
-        seg_list = []
-        
-        segments_list = list(segments)  # Convert to list once
-        total_segments = len(segments_list)
-        print(f"📝 Processing {total_segments} segments...")
-
-        for i, seg in enumerate(segments_list):
-            text += seg.text + " "
-            seg_list.append({
-                "id": seg.id,
-                "start": seg.start,
-                "end": seg.end,
-                "text": seg.text
-            })
-            
-            # Progress update for every 100 segments in long content
-            if total_segments > 100 and i % 100 == 0 and i > 0:
-                progress = (i / total_segments) * 100
-                print(f"⏳ Progress: {progress:.1f}% ({i}/{total_segments} segments)")
-                
-        print(f"✅ Processed {len(seg_list)} segments total")
-
-        # Save results to database
-        result_data = pack_result(text=text.strip(), segments=seg_list, language=info.language)
-        
-        # Create TranscriptionDetail
-        detail = TranscriptionDetail(
-            id=str(uuid.uuid4()),
-            job_id=job.id,
-            result_json=result_data,
-            formatted_text=text.strip(),
-            word_count=len(text.strip().split()) if text.strip() else 0
-        )
-        db.add(detail)
-        
-        job.status = JobStatus.done
-        db.commit()
+        if S3_STREAM_READS:
+            # Không staging qua /tmp: ffprobe/ffmpeg đọc presigned URL, faster-whisper đọc
+            # file-like object trên ranged GET (seek được nên không cần bản copy local)
+            # Đọc stream: download chỉ còn HEAD + presign, phần đọc body nằm trong decode
+            with metrics.stage("download"):
+                head = client.head_object(Bucket=S3_BUCKET, Key=job.file_key)
+                job.content_hash = job.content_hash or etag_content_hash(head.get("ETag"))
+                print(f"📡 Streaming from MinIO: {S3_BUCKET}/{job.file_key} ({head['ContentLength']} bytes)")
+                audio_url = presigned_get_url(client, S3_BUCKET, job.file_key)
+                audio_file = open_object(client, S3_BUCKET, job.file_key, size=head["ContentLength"])
+            metrics.set(audio_bytes=head["ContentLength"])
+            try:
+                transcribe_audio(db, job, audio_url, audio_file, metrics=metrics)
+            finally:
+                audio_file.close()
+        else:
+            # Download audio từ MinIO về /tmp/ 
+            # Giữ extension của object để decoder nhận đúng container (mp3, m4a, webm, wav...)
+            audio_path = f"/tmp/{job.id}{os.path.splitext(job.file_key)[1] or '.mp3'}"
+            print(f"⬇️ Downloading from MinIO: {S3_BUCKET}/{job.file_key}")
+            with metrics.stage("download"):
+                download_file(job.file_key, audio_path)
+            print(f"✅ Downloaded to: {audio_path}")
+            metrics.set(audio_bytes=os.path.getsize(audio_path))
+            try:
+                transcribe_audio(db, job, audio_path, metrics=metrics)
+            finally:
+                os.remove(audio_path)
 
-        # Cleanup
-        os.remove(audio_path)
         print(f"✅ Transcription completed for job: {transcription_id}")
         if job.title:
             print(f"🎬 Title: {job.title}")
@@ -172,20 +209,31 @@ def transcribe_job(transcription_id: str):
     except Exception as e:
         error_msg = str(e)
         print(f"❌ Transcription error: {error_msg}")
+        metrics.set(error=error_msg)
         if job:
             job.status = JobStatus.error
             job.error = error_msg
             db.commit()
 
     finally:
+        result = metrics.finish()
+        if job:
+            save_job_metrics(db, job, "transcribe", result)
         db.close()
 
-def prepare_youtube_job(transcription_id: str):
-    """Download and upload YouTube audio to MinIO, then trigger transcription"""
-    from apps.backend.services.redis_queue import q
+    return result
+
+@traced_job
+def prepare_youtube_job(transcription_id: str, priority: bool = False):
+    """
+    Download YouTube audio, then either upload to MinIO and trigger transcribe_job (queued)
+    or transcribe the local file directly while archiving to MinIO in the background (fused)
+    """
+    from apps.backend.services.redis_queue import enqueue_stage
     
     db: Session = SessionLocal()
     job = None
+    metrics = JobMetrics()
 
     try:
         job = db.get(TranscriptionJob, transcription_id)
@@ -196,13 +244,27 @@ def prepare_youtube_job(transcription_id: str):
         print(f"🎯 Preparing YouTube job: {transcription_id}")
         print(f"📺 YouTube URL: {job.youtube_url}")
         
+        # Video có thể đã được job khác transcribe xong trong lúc job này chờ trong queue
+        job.video_id = job.video_id or youtube_video_id(job.youtube_url)
+        job.params_fingerprint = params_fingerprint(job.language, job.engine)
+        cached = find_cached_job(db, job.params_fingerprint, video_id=job.video_id, exclude_id=job.id)
+        if cached:
+            link_cached_result(db, job, cached, str(uuid.uuid4()))
+            db.commit()
+            metrics.set(cache_hit=True)
+            return
+        
         job.status = JobStatus.processing
+        job.progress = 0.0
         db.commit()
 
         # Download audio từ YouTube
         print(f"⬇️ Downloading YouTube audio from: {job.youtube_url}")
         try:
-            audio_path, video_title = download_youtube_audio(job.youtube_url)
+            with metrics.stage("download"):
+                audio_path, video_title = download_youtube_audio(job.youtube_url)
+            metrics.set(audio_bytes=os.path.getsize(audio_path))
+            observe_download("youtube", metrics.values["audio_bytes"], metrics.timer.stages["download"])
             print(f"✅ Downloaded: {audio_path}")
             print(f"🎬 Title: {video_title}")
         except Exception as download_error:
@@ -212,17 +274,69 @@ def prepare_youtube_job(transcription_id: str):
         # Update job với title
         job.title = video_title
         
+        # Duration từ metadata để scheduler và transcribe_job biết trước độ dài
+        try:
+            with metrics.stage("probe"):
+                media = probe_audio(audio_path)
+            if media.duration:
+                job.duration = round(media.duration)
+            job.audio_codec = media.codec
+            print(f"🔎 Probed audio: {media.duration or 0:.1f}s, codec={media.codec}")
+        except Exception as probe_error:
+            print(f"⚠️ Could not probe audio: {probe_error}")
+        
         # Upload audio file lên MinIO
-        client = s3_client()
-        bucket = os.getenv('S3_BUCKET', 'uploads')
-        file_key = f"youtube/{job.id}.mp3"
+        # Giữ nguyên extension của file đã tải (m4a/webm/wav/mp3, xem YOUTUBE_AUDIO_MODE)
+        ext = os.path.splitext(audio_path)[1] or ".mp3"
+        file_key = f"youtube/{job.id}{ext}"
+        content_type = mimetypes.guess_type(audio_path)[0] or "application/octet-stream"
+        file_url = public_url(file_key)
+        
+        if YOUTUBE_PIPELINE_MODE == "fused":
+            # Transcribe luôn file local trên worker này, upload MinIO chỉ để lưu trữ
+            # nên chạy song song trong background thread
+            upload_errors = []
+            def upload_archive():
+                upload_started = time.perf_counter()
+                try:
+                    upload_file(audio_path, file_key, content_type)
+                except Exception as upload_error:
+                    upload_errors.append(upload_error)
+                # Chạy song song với inference nên không phải stage (stage cộng lại bằng wall time)
+                metrics.set(background_upload=round(time.perf_counter() - upload_started, 3))
+            
+            print(f"⬆️ Archiving to MinIO in background: {S3_BUCKET}/{file_key}")
+            uploader = threading.Thread(target=upload_archive, name=f"upload-{job.id}", daemon=True)
+            uploader.start()
+            try:
+                transcribe_audio(db, job, audio_path, metrics=metrics)
+            finally:
+                with metrics.stage("upload"):
+                    # Chỉ phần upload còn chạy sau khi transcribe xong
+                    uploader.join()
+                os.remove(audio_path)
+            
+            if upload_errors:
+                # Kết quả transcript vẫn dùng được, chỉ thiếu bản lưu audio:
+                # bỏ key placeholder lúc tạo job, không trỏ tới object không tồn tại
+                print(f"⚠️ Archive upload failed: {upload_errors[0]}")
+                job.file_key = ""
+                job.file_url = ""
+            else:
+                job.file_key = file_key
+                job.file_url = file_url
+            db.commit()
+            
+            print(f"✅ YouTube transcription completed for: {video_title}")
+            return
         
-        print(f"⬆️ Uploading to MinIO: {bucket}/{file_key}")
-        client.upload_file(audio_path, bucket, file_key)
+        print(f"⬆️ Uploading to MinIO: {S3_BUCKET}/{file_key}")
+        with metrics.stage("upload"):
+            upload_file(audio_path, file_key, content_type)
         
         # Update job với file info
         job.file_key = file_key
-        job.file_url = f"{os.getenv('S3_PUBLIC_ENDPOINT', 'http://localhost:9000')}/{bucket}/{file_key}"
+        job.file_url = file_url
         job.status = JobStatus.queued  # Reset to queued for transcription
         db.commit()
 
@@ -234,7 +348,7 @@ def prepare_youtube_job(transcription_id: str):
         print(f"🔄 Enqueueing transcription job...")
         
         # Enqueue actual transcription job
-        q.enqueue("apps.backend.worker.transcribe_job", transcription_id, job_timeout=7200)
+        enqueue_stage("transcribe", "apps.backend.worker.transcribe_job", transcription_id, priority=priority)
         print(f"📤 Transcription job enqueued: {transcription_id}")
 
     except Exception as e:
@@ -253,12 +367,15 @@ def prepare_youtube_job(transcription_id: str):
             error_message = "YouTube is rate-limiting requests. Please try again later."
         
         print(f"❌ YouTube preparation error: {error_message}")
+        metrics.set(error=error_message)
         if job:
             job.status = JobStatus.error
             job.error = error_message
             db.commit()
 
     finally:
+        if job:
+            save_job_metrics(db, job, "prepare_youtube", metrics.finish())
         db.close()
 
 # Alias for backward compatibility
@@ -266,12 +383,11 @@ def transcribe_youtube_job(transcription_id: str):
     """Backward compatibility alias - now just calls prepare_youtube_job"""
     prepare_youtube_job(transcription_id)
 
-# Ensure tables exist in worker too (first run)
-Base.metadata.create_all(bind=engine)
-
+@traced_job
 def crawl_channel_job(crawler_id: str):
     """Crawl all videos from a YouTube channel and create transcription jobs"""
-    from apps.backend.services.redis_queue import q
+    from apps.backend.services.redis_queue import enqueue_stage_many
+    from apps.backend.services.job_batch import create_jobs_bulk
     import yt_dlp
     
     db: Session = SessionLocal()
@@ -306,7 +422,7 @@ def crawl_channel_job(crawler_id: str):
                 info.get('duration', 0) > 60
             ) else f"Too short for regular video: {info.get('duration', 0)}s"
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with span("yt-dlp extract", kind="client", url=crawler.channel_url), yt_dlp.YoutubeDL(ydl_opts) as ydl:
             # Extract channel/playlist info
             try:
                 info = ydl.extract_info(crawler.channel_url, download=False)
@@ -323,40 +439,44 @@ def crawl_channel_job(crawler_id: str):
                 
                 print(f"Found {len(entries)} videos in channel")
                 
-                jobs_created = 0
+                fingerprint = params_fingerprint(crawler.language, crawler.engine)
+                candidates = []
                 for entry in entries[:crawler.max_videos]:
-                    try:
-                        video_url = entry.get('url') or f"https://www.youtube.com/watch?v={entry.get('id')}"
-                        video_title = entry.get('title', 'Unknown Title')
-                        
-                        # Create transcription job
-                        job_id = str(uuid.uuid4())
-                        file_key = f"youtube/{job_id}.mp3"
-                        
-                        transcription_job = TranscriptionJob(
-                            id=job_id,
-                            status=JobStatus.queued,
-                            file_key=file_key,
-                            engine=crawler.engine,
-                            language=crawler.language,
-                            youtube_url=video_url,
-                            title=video_title,
-                            channel_crawler_id=crawler.id,
-                            file_url=""
-                        )
-                        
-                        db.add(transcription_job)
-                        db.commit()
-                        
-                        # Enqueue YouTube preparation job (which will then trigger transcription)
-                        q.enqueue("apps.backend.worker.prepare_youtube_job", job_id, job_timeout=7200)
-                        jobs_created += 1
-                        
-                        print(f"Created transcription job for: {video_title[:50]}...")
-                        
-                    except Exception as e:
-                        print(f"Error creating job for video {entry.get('title', 'Unknown')}: {str(e)}")
+                    video_url = entry.get('url') or f"https://www.youtube.com/watch?v={entry.get('id')}"
+                    candidates.append((entry, video_url, entry.get('id') or youtube_video_id(video_url)))
+                
+                # Incremental: bỏ qua video đã có job chưa lỗi (một query cho cả channel)
+                known = set()
+                if crawler.incremental:
+                    known = known_video_ids(db, [video_id for _, _, video_id in candidates])
+                
+                rows = []
+                for entry, video_url, video_id in candidates:
+                    if video_id in known:
                         continue
+                    if video_id:
+                        known.add(video_id)  # Video trùng trong cùng một lần crawl
+                    job_id = str(uuid.uuid4())
+                    rows.append({
+                        "id": job_id,
+                        "status": JobStatus.queued,
+                        "file_key": f"youtube/{job_id}.mp3",
+                        "engine": crawler.engine,
+                        "language": crawler.language,
+                        "youtube_url": video_url,
+                        "title": entry.get('title', 'Unknown Title'),
+                        "channel_crawler_id": crawler.id,
+                        "file_url": "",
+                        "video_id": video_id,
+                        "params_fingerprint": fingerprint,
+                    })
+                crawler.total_videos_skipped = len(candidates) - len(rows)
+                print(f"Skipping {crawler.total_videos_skipped} already known videos")
+                
+                # Một multi-row INSERT + một Redis pipeline cho toàn bộ video mới
+                pending = create_jobs_bulk(db, rows)
+                enqueue_stage_many(YOUTUBE_PREPARE_STAGE, "apps.backend.worker.prepare_youtube_job", [(job_id,) for job_id in pending])
+                jobs_created = len(rows)
                 
                 crawler.total_jobs_created = jobs_created
                 crawler.status = JobStatus.done
@@ -385,11 +505,14 @@ def crawl_channel_job(crawler_id: str):
 # NEW WORKER FUNCTIONS: OPENAI PROCESSING & IMAGE GENERATION
 # =============================================================================
 
+@traced_job
 def format_dialogue_job(transcription_id: str, original_text: str):
     """Format transcription as dialogue using OpenAI"""
     from apps.backend.services.openai_service import format_as_dialogue
     
     db: Session = SessionLocal()
+    job = None
+    metrics = JobMetrics()
     try:
         job = db.get(TranscriptionJob, transcription_id)
         if not job or not job.transcription_detail:
@@ -399,30 +522,40 @@ def format_dialogue_job(transcription_id: str, original_text: str):
         print(f"🤖 Starting dialogue formatting for {transcription_id}...")
         
         # Format dialogue using OpenAI
-        formatted_dialogue = format_as_dialogue(original_text)
+        with metrics.stage("inference"):
+            formatted_dialogue = format_as_dialogue(original_text)
+        metrics.set(input_chars=len(original_text), output_chars=len(formatted_dialogue or ""))
         
         # Update transcription detail with formatted dialogue
-        job.transcription_detail.summary = formatted_dialogue
-        job.transcription_detail.keywords = "formatted_dialogue"
-        
-        db.commit()
+        with metrics.stage("persist"):
+            job.transcription_detail.summary = formatted_dialogue
+            job.transcription_detail.keywords = "formatted_dialogue"
+            invalidate_job(job)
+            db.commit()
         print(f"✅ Dialogue formatting completed for {transcription_id}")
         
     except Exception as e:
         print(f"❌ Dialogue formatting failed: {str(e)}")
+        metrics.set(error=str(e))
         # Optionally save error to job
         if job and job.transcription_detail:
             job.transcription_detail.summary = f"Error: {str(e)}"
+            invalidate_job(job)
             db.commit()
     finally:
+        if job:
+            save_job_metrics(db, job, "format_dialogue", metrics.finish())
         db.close()
 
+@traced_job
 def generate_image_job(transcription_id: str, prompt: str):
     """Generate image for dialogue using OpenAI DALL-E"""
     from apps.backend.services.openai_service import generate_image_with_dalle, generate_image_prompt
     
     db: Session = SessionLocal()
     s3 = s3_client()
+    job = None
+    metrics = JobMetrics()
     
     try:
         job = db.get(TranscriptionJob, transcription_id)
@@ -434,31 +567,36 @@ def generate_image_job(transcription_id: str, prompt: str):
         
         # Generate enhanced prompt if needed
         if len(prompt) < 50:
-            enhanced_prompt = generate_image_prompt(prompt)
+            with metrics.stage("inference"):
+                enhanced_prompt = generate_image_prompt(prompt)
             print(f"📝 Enhanced prompt: {enhanced_prompt}")
             prompt = enhanced_prompt
         
         # Generate image with DALL-E
-        image_url = generate_image_with_dalle(prompt)
+        with metrics.stage("inference"):
+            image_url = generate_image_with_dalle(prompt)
         print(f"🖼️  Generated image URL: {image_url}")
         
         # Download generated image
-        image_response = requests.get(image_url)
-        image_response.raise_for_status()
+        with metrics.stage("download"):
+            image_response = requests.get(image_url)
+            image_response.raise_for_status()
+        metrics.set(image_bytes=len(image_response.content))
         
         # Upload to S3/MinIO
         image_id = str(uuid.uuid4())
         image_key = f"generated/{transcription_id}/{image_id}.png"
         
-        s3.put_object(
-            Bucket="uploads",
-            Key=image_key,
-            Body=image_response.content,
-            ContentType="image/png"
-        )
+        with metrics.stage("upload"), track_s3_transfer("put_object", len(image_response.content)):
+            s3.put_object(
+                Bucket=S3_BUCKET,
+                Key=image_key,
+                Body=image_response.content,
+                ContentType="image/png"
+            )
         
         # Generate file URL
-        file_url = f"{S3_PUBLIC_ENDPOINT}/uploads/{image_key}"
+        file_url = public_url(image_key)
         
         # Save image record to database
         image_record = TranscriptionImage(
@@ -472,13 +610,16 @@ def generate_image_job(transcription_id: str, prompt: str):
             description=f"Generated from prompt: {prompt[:100]}..."
         )
         
-        db.add(image_record)
-        db.commit()
+        with metrics.stage("persist"):
+            db.add(image_record)
+            invalidate_job(job)
+            db.commit()
         
         print(f"✅ Image generation completed for {transcription_id}: {file_url}")
         
     except Exception as e:
         print(f"❌ Image generation failed: {str(e)}")
+        metrics.set(error=str(e))
         # Save error as image record for debugging
         try:
             error_image = TranscriptionImage(
@@ -492,14 +633,139 @@ def generate_image_job(transcription_id: str, prompt: str):
                 description=f"Generation error: {str(e)}"
             )
             db.add(error_image)
+            if job:
+                invalidate_job(job)
             db.commit()
         except:
             pass
     finally:
+        if job:
+            save_job_metrics(db, job, "generate_image", metrics.finish())
         db.close()
 
+# =============================================================================
+# WORKER ENTRY POINT
+# =============================================================================
+
+WORKER_MODE = os.getenv("WORKER_MODE", "pool")  # fork | simple | pool
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", "0"))  # 0 = theo QUEUE_CONCURRENCY của stage
+WORKER_QUEUES = os.getenv("WORKER_QUEUES", "download,transcribe,llm")
+WORKER_PRELOAD_LANGUAGES = os.getenv("WORKER_PRELOAD_LANGUAGES", "en")
+# Mode pool: process con chết liên tục (Redis không kết nối được, preload model lỗi) thì chờ lâu dần
+# trước khi fork lại (1, 2, 4... giây, tối đa WORKER_RESTART_MAX_DELAY); reset khi process sống đủ lâu
+WORKER_RESTART_MAX_DELAY = float(os.getenv("WORKER_RESTART_MAX_DELAY", "60"))
+WORKER_RESTART_STABLE_SECONDS = float(os.getenv("WORKER_RESTART_STABLE_SECONDS", "60"))
+
+def worker_redis():
+    return Redis(host=os.getenv("REDIS_HOST","redis"), port=int(os.getenv("REDIS_PORT","6379")))
+
+def preload_models(languages):
+    """Load trước model cho các language để job đầu tiên không phải chờ"""
+    for language in languages:
+        try:
+            get_model(resolve_model(None if language == "auto" else language))
+        except Exception as e:
+            print(f"⚠️ Could not preload model for {language}: {e}")
+
+def run_simple_worker(queues, languages, index=0):
+    """Một process sống lâu: load model một lần rồi xử lý job tuần tự, không fork mỗi job"""
+    from rq import SimpleWorker
+    # Connection pool của SQLAlchemy không được dùng chung giữa các process sau fork
+    engine.dispose(close=False)
+    # Tạo sẵn S3 client dùng chung (load botocore service model) trước job đầu tiên
+    s3_client()
+    preload_models(languages)
+    conn = worker_redis()
+    worker = SimpleWorker([Queue(n, connection=conn) for n in queues], connection=conn,
+                          name=f"{os.uname().nodename}.{os.getpid()}.{index}")
+    worker.work()
+
+def restart_backoff(previous: float, uptime: float) -> float:
+    """Delay trước lần restart tiếp theo của một slot: 0 nếu process đã chạy ổn định, sau đó tăng gấp đôi"""
+    if uptime >= WORKER_RESTART_STABLE_SECONDS:
+        return 0.0
+    return min(max(1.0, previous * 2), WORKER_RESTART_MAX_DELAY)
+
+def run_worker_pool(queues, languages, count):
+    """Giữ `count` process SimpleWorker, tự khởi động lại process bị chết (có backoff theo từng slot)"""
+    import multiprocessing, signal
+    ctx = multiprocessing.get_context("fork")
+    procs = {}
+    started_at = {}
+    backoff = {i: 0.0 for i in range(count)}
+    restart_at = {}
+    stopping = False
+
+    def start(i):
+        p = ctx.Process(target=run_simple_worker, args=(queues, languages, i), name=f"rq-worker-{i}")
+        p.start()
+        procs[i] = p
+        started_at[i] = time.monotonic()
+        print(f"🚀 Started worker process {i} (pid {p.pid})")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for p in procs.values():
+            if p.is_alive():
+                # SIGTERM cho RQ warm shutdown: chờ job hiện tại xong
+                os.kill(p.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for i in range(count):
+        start(i)
+    while procs or (restart_at and not stopping):
+        for i, p in list(procs.items()):
+            p.join(timeout=1)
+            if p.is_alive():
+                continue
+            del procs[i]
+            if not stopping:
+                backoff[i] = restart_backoff(backoff[i], time.monotonic() - started_at[i])
+                restart_at[i] = time.monotonic() + backoff[i]
+                print(f"⚠️ Worker process {i} exited with code {p.exitcode}, restarting in {backoff[i]:.0f}s...")
+        if stopping:
+            restart_at.clear()
+            continue
+        for i, at in list(restart_at.items()):
+            if time.monotonic() >= at:
+                del restart_at[i]
+                start(i)
+        if not procs and restart_at:
+            # Mọi slot đang chờ backoff: không có process nào để join
+            time.sleep(max(0.0, min(1.0, min(restart_at.values()) - time.monotonic())))
+
 if __name__ == "__main__":
-    listen = ["transcribe"]
-    with Connection(Redis(host=os.getenv("REDIS_HOST","redis"), port=int(os.getenv("REDIS_PORT","6379")))):
-        worker = Worker([Queue(n) for n in listen])
-        worker.work()
+    import argparse
+    parser = argparse.ArgumentParser(description="any2text RQ worker")
+    parser.add_argument("--mode", choices=["fork", "simple", "pool"], default=WORKER_MODE,
+                        help="fork: rq.Worker fork mỗi job; simple: 1 process giữ model; pool: N process giữ model")
+    parser.add_argument("--workers", type=int, default=WORKER_COUNT, help="Số process ở mode pool (0 = theo stage)")
+    parser.add_argument("--queues", default=WORKER_QUEUES,
+                        help="Stage (download, transcribe, llm) hoặc tên queue, cách nhau bởi dấu phẩy")
+    parser.add_argument("--preload", default=WORKER_PRELOAD_LANGUAGES,
+                        help="Language cần load model trước, vd: en,vi (để trống nếu không preload)")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.queues.split(",") if n.strip()]
+    stages = [n for n in names if n in STAGES]
+    # Mỗi stage nghe lane ưu tiên trước lane thường
+    listen = listen_queue_names(stages) + [n for n in names if n not in STAGES]
+    languages = [l.strip() for l in args.preload.split(",") if l.strip()]
+    if "transcribe" not in stages:
+        languages = []  # Worker chỉ chạy download/llm không cần model
+    workers = args.workers or (default_worker_count(stages) if stages else 1)
+    print(f"👂 Listening on queues: {', '.join(listen)}")
+    # fork/pool: job chạy ở process con, exporter ở process cha đọc file của PROMETHEUS_MULTIPROC_DIR
+    start_worker_exporter(multiprocess_mode=args.mode != "simple")
+    # Trước khi fork: process con dùng lại TracerProvider (BatchSpanProcessor tự khởi tạo lại thread sau fork)
+    init_tracing("any2text-worker", engines=[engine])
+    if args.mode == "fork":
+        with Connection(worker_redis()):
+            worker = Worker([Queue(n) for n in listen])
+            worker.work()
+    elif args.mode == "simple":
+        run_simple_worker(listen, languages)
+    else:
+        run_worker_pool(listen, languages, max(1, workers))
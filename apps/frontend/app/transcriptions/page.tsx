@@ -38,19 +38,23 @@ export default function TranscriptionsList() {
   const [filter, setFilter] = useState<string>('all');
   const [page, setPage] = useState(1);
   const [hasMore, setHasMore] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
   const loadTranscriptions = async (reset = false) => {
     try {
       setLoading(true);
-      const offset = reset ? 0 : (page - 1) * 20;
       const statusParam = filter === 'all' ? '' : `&status=${filter}`;
+      const cursorParam = !reset && nextCursor ? `&cursor=${encodeURIComponent(nextCursor)}` : '';
       
-      const response = await fetch(`${API_BASE}/transcriptions?limit=20&offset=${offset}${statusParam}`);
+      const response = await fetch(`${API_BASE}/transcriptions?limit=20${cursorParam}${statusParam}`);
       if (!response.ok) {
         throw new Error(`HTTP error! status: ${response.status}`);
       }
       
       const data = await response.json();
+      // Keyset pagination: backend trả cursor của trang tiếp theo qua header
+      const cursor = response.headers.get('X-Next-Cursor');
+      setNextCursor(cursor);
       
       if (reset) {
         setTranscriptions(data);
@@ -59,7 +63,7 @@ export default function TranscriptionsList() {
         setTranscriptions(prev => [...prev, ...data]);
       }
       
-      setHasMore(data.length === 20);
+      setHasMore(!!cursor);
       setError(null);
     } catch (err) {
       console.error('Error loading transcriptions:', err);